@@ -5,6 +5,13 @@ import plotly.graph_objects as go
 from datetime import datetime, date
 import os
 
+# Os snapshots do DatasetRegistry são compartilhados por todas as sessões: com
+# copy-on-write (padrão a partir do pandas 3) fatias e projeções não copiam os
+# dados e qualquer alteração feita em uma visão derivada fica só nela. Ligado
+# aqui, na inicialização do app, e não na importação dos módulos.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
 # SOLUÇÃO PARA O ERRO removeChild
 import streamlit as st
 from streamlit import _bottom
@@ -35,7 +42,18 @@ class DataHandler:
 # Importações locais (com fallback)
 try:
     from utils.data_handler import DataHandler
-    from utils.visualizations import create_visualizations
+    from utils.visualizations import create_visualizations, create_salary_analysis
+    from utils.report_bundle import create_report_bundle, build_salary_report, build_department_analysis, build_monthly_hires
+    from utils.report_scheduler import ReportScheduler
+    from utils.date_index import DateIndex
+    from utils.datasets import DatasetRegistry, DEFAULT_DATASET, RESERVED_SUFFIXES, list_datasets
+    from utils.dedupe import find_duplicates
+    from utils.email_allocator import EmailAllocator
+    from utils.importer import read_csv_flexible, normalize_columns, missing_import_columns, normalize_import_rows, REQUIRED_IMPORT_COLUMNS
+    from utils.import_jobs import ImportJobManager, RESUMABLE, MAX_CHUNK_SIZE
+    from utils.batch_import import expand_uploads, parse_import_files, combine_import_results, locate_duplicates, batch_summary
+    from utils.memory_profiler import MemoryProfiler
+    from utils.scenarios import TABLE_COLUMNS as SCENARIO_COLUMNS, RAISE, HIRE, scenarios_from_table, scenario_summary
 except ImportError:
     # Fallback caso os módulos não estejam disponíveis
     class DataHandler:
@@ -125,42 +143,142 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Inicializar o manipulador de dados - CORREÇÃO AQUI
-_data_handler = None
-def get_data_handler():
-    global _data_handler
-    if _data_handler is None:
-        _data_handler = DataHandler()
-    return _data_handler
+# Registro de empresas (conjuntos de dados) compartilhado por todas as sessões.
+# Cada empresa tem seu próprio armazenamento, índice e análises em cache; só as
+# HEADCOUNT_MAX_DATASETS usadas mais recentemente ficam em memória (LRU).
+@st.cache_resource(show_spinner=False)
+def get_dataset_registry():
+    return DatasetRegistry(max_loaded=int(os.environ.get("HEADCOUNT_MAX_DATASETS", "4")))
+
+dataset_registry = get_dataset_registry()
+
+# Importações em segundo plano (pool de workers compartilhado pelo processo)
+@st.cache_resource(show_spinner=False)
+def get_import_jobs():
+    return ImportJobManager(
+        lambda name: dataset_registry.get(name).handler,
+        max_workers=int(os.environ.get("HEADCOUNT_IMPORT_WORKERS", "2")),
+    )
+
+import_jobs = get_import_jobs()
+
+# Relatórios pesados materializados em disco (agendados e após gravações, com debounce)
+@st.cache_resource(show_spinner=False)
+def get_report_scheduler():
+    return ReportScheduler(
+        dataset_registry,
+        interval=int(os.environ.get("HEADCOUNT_REPORTS_INTERVAL", "3600")),
+        debounce=int(os.environ.get("HEADCOUNT_REPORTS_DEBOUNCE", "30")),
+    ).start()
+
+report_scheduler = get_report_scheduler()
+
+# Perfil de memória por página e operação (desligado por padrão; ligue em Configurações)
+@st.cache_resource(show_spinner=False)
+def get_memory_profiler():
+    return MemoryProfiler(enabled=os.environ.get("HEADCOUNT_MEMORY_PROFILE") == "1")
 
-data_handler = get_data_handler()
+memory_profiler = get_memory_profiler()
+
+# API JSON somente leitura (opcional), servida pelo mesmo registro de empresas
+@st.cache_resource(show_spinner=False)
+def get_api_server():
+    from utils.api import start_server
+    return start_server(dataset_registry, os.environ.get("HEADCOUNT_API_HOST", "127.0.0.1"), int(os.environ["HEADCOUNT_API_PORT"]))
+
+if os.environ.get("HEADCOUNT_API_PORT"):
+    get_api_server()
 
 # Título principal
 st.title("👥 Sistema de Gestão de Funcionários")
 st.markdown("---")
 
-# Cache para dados - CORREÇÃO AQUI
-@st.cache_data(ttl=300, show_spinner=False)
+# Dados da empresa selecionada (snapshot atualizado só com as alterações desde a última versão vista)
+def load_indexed_data():
+    snapshot = dataset.snapshot()
+    return snapshot.df, snapshot.date_index
+
+# Mesma visão com data_admissao em datetime, convertida uma vez por versão
+def load_dated_data():
+    return dataset.snapshot().dated()
+
 def load_cached_data():
-    return data_handler.load_data()
+    with memory_profiler.track("load_cached_data") as measurement:
+        return measurement.frame(dataset.snapshot().df)
+
+# Agregações calculadas pelo backend (GROUP BY no banco quando SQL)
+def load_department_costs():
+    return dataset.department_costs()
+
+def load_monthly_hires():
+    return dataset.monthly_hires()
+
+def load_salary_stats(start_date, end_date):
+    return dataset.salary_stats(start_date, end_date)
+
+def load_headcount_index():
+    return dataset.headcount_index()
+
+# Colunas salario/data_admissao em arrays NumPy mapeados do disco
+def load_numeric_columns():
+    return dataset.numeric_columns()
+
+# Percentis salariais por departamento (sketches atualizados a cada gravação)
+def load_salary_sketches():
+    return dataset.salary_sketches()
+
+# Cubo departamento × cargo × status × mês (recalculado uma vez por versão)
+def load_salary_cube():
+    return dataset.salary_cube()
+
+# Arquivos da importação processados em paralelo uma vez por envio: o resultado
+# fica na sessão (um por tipo de importação) e é trocado quando o envio muda, sem
+# reprocessar planilhas a cada rerun nem guardar envios antigos no cache do servidor
+def parse_uploaded_imports(uploads, prefix, upload_key):
+    state_key = f"{prefix}_parsed_import"
+    parsed = st.session_state.get(state_key)
+    if parsed is None or parsed[0] != upload_key:
+        st.session_state.pop(state_key, None)
+        parsed = (upload_key, parse_import_files(expand_uploads(uploads)))
+        st.session_state[state_key] = parsed
+    return parsed[1]
+
+# Prováveis duplicados de um envio (uma vez por arquivo e versão do cadastro, não a cada rerun)
+@st.cache_data(show_spinner=False, max_entries=4)
+def find_upload_duplicates(upload_key, dataset_name, data_version, _records):
+    duplicates = find_duplicates(_records, load_cached_data())
+    return duplicates, duplicates.attrs.get('blocos_limitados', [])
+
+def show_limited_blocks(blocks):
+    if blocks:
+        st.caption(
+            f"ℹ️ {len(blocks)} grupos de nomes muito comuns foram comparados só entre os nomes mais próximos "
+            f"em ordem alfabética: {', '.join(blocks[:10])}{'…' if len(blocks) > 10 else ''}"
+        )
 
 # Sidebar para navegação
 st.sidebar.title("📋 Menu de Navegação")
 
+# Seleção da empresa
+dataset_name = st.sidebar.selectbox("🏢 Empresa", list_datasets(), key="dataset_select_unique")
+dataset = dataset_registry.get(dataset_name or DEFAULT_DATASET)
+data_handler = dataset.handler
+
 # Botão de atualização automática
 st.sidebar.markdown("---")
 if st.sidebar.button("🔄 Atualizar Dados", use_container_width=True, key="refresh_button_unique"):
+    dataset.invalidate()
     st.cache_data.clear()
     st.rerun()
 
-# Carregar dados com cache - CORREÇÃO AQUI
-df = load_cached_data()
-
-# Informações em tempo real
-if not df.empty:
-    st.sidebar.metric("Total de Funcionários", len(df), key="total_func_metric_unique")
-    st.sidebar.metric("Folha Salarial", f"R$ {df['salario'].sum():,.2f}", key="folha_metric_unique")
-    st.sidebar.metric("Último Update", datetime.now().strftime("%H:%M:%S"), key="update_metric_unique")
+# Informações em tempo real (totais mantidos a cada gravação, sem ler o cadastro)
+totals = data_handler.get_totals()
+if totals['total_employees'] > 0:
+    st.sidebar.metric("Total de Funcionários", totals['total_employees'], key="total_func_metric_unique")
+    st.sidebar.metric("Folha Salarial", f"R$ {totals['total_salary']:,.2f}", key="folha_metric_unique")
+    st.sidebar.metric("Departamentos", totals['departments'], key="dept_count_metric_unique")
+    last_write = pd.Timestamp(totals['last_write']).strftime("%d/%m %H:%M:%S") if totals['last_write'] else "-"
+    st.sidebar.metric("Último Update", last_write, key="update_metric_unique")
 
 st.sidebar.markdown("---")
 page = st.sidebar.selectbox(
@@ -174,26 +292,26 @@ def show_dashboard():
     st.header("📊 Dashboard - Visão Geral")
     
     # Carregar dados com cache - CORREÇÃO AQUI
-    df = load_cached_data()
+    df, date_index = load_indexed_data()
     
     if df.empty:
         st.warning("⚠️ Nenhum funcionário cadastrado. Vá para a seção 'Funcionários' para adicionar dados.", key="empty_warning")
         return
     
-    # Criar cópia para manipulação - CORREÇÃO AQUI
-    df_temp = df.copy()
-    df_temp['data_admissao'] = pd.to_datetime(df_temp['data_admissao'])
+    # Visão compartilhada com datas convertidas (sem cópia por sessão)
+    df_temp = load_dated_data()
     
-    # Métricas principais
+    # Métricas principais (arrays numéricos mapeados do disco, sem parse do CSV)
     col1, col2, col3, col4, col5 = st.columns(5)
     
-    total_funcionarios = len(df_temp)
-    salario_total = float(df_temp['salario'].sum())
-    salario_medio = float(df_temp['salario'].mean())
-    departamentos = int(df_temp['departamento'].nunique())
+    columns = load_numeric_columns()
+    total_funcionarios = len(columns)
+    salario_total = columns.total_payroll()
+    salario_medio = columns.mean_salary()
+    departamentos = totals['departments']
     
     # Funcionários recentes (últimos 30 dias)
-    recent_hires = df_temp[df_temp['data_admissao'] >= (datetime.now() - pd.Timedelta(days=30))]
+    recent_count = columns.hired_since(datetime.now() - pd.Timedelta(days=30))
     
     with col1:
         st.metric("Total de Funcionários", total_funcionarios, key="total_metric_unique")
@@ -205,7 +323,7 @@ def show_dashboard():
         st.metric("Salário Médio", f"R$ {salario_medio:,.2f}", key="salario_medio_metric_unique")
     
     with col4:
-        st.metric("Contratados Recentemente", len(recent_hires), delta=f"Últimos 30 dias", key="recent_metric_unique")
+        st.metric("Contratados Recentemente", recent_count, delta=f"Últimos 30 dias", key="recent_metric_unique")
     
     with col5:
         st.metric("Departamentos", departamentos, key="dept_metric_unique")
@@ -216,11 +334,7 @@ def show_dashboard():
     st.subheader("💰 Custo por Setor")
     
     # Calcular custo por departamento
-    dept_costs = df_temp.groupby('departamento').agg({
-        'salario': ['sum', 'mean', 'count']
-    }).round(2)
-    dept_costs.columns = ['Custo Total', 'Salário Médio', 'Funcionários']
-    dept_costs = dept_costs.sort_values('Custo Total', ascending=False)
+    dept_costs = load_department_costs()
     
     # Gráfico principal de custo por setor
     fig_cost = px.bar(
@@ -300,7 +414,8 @@ def show_dashboard():
     
     st.markdown("---")
     
-    # Funcionários Recentes - Seção destacada
+    # Funcionários Recentes - Seção destacada (busca binária no índice de datas)
+    recent_hires = date_index.since(df_temp, datetime.now() - pd.Timedelta(days=30))
     if len(recent_hires) > 0:
         st.subheader("🆕 Funcionários Adicionados Recentemente")
         
@@ -308,8 +423,8 @@ def show_dashboard():
         
         with col1:
             # Lista dos funcionários recentes
-            recent_display = recent_hires[['nome', 'cargo', 'departamento', 'salario', 'data_admissao']].copy()
-            recent_display['data_admissao'] = recent_display['data_admissao'].dt.strftime('%d/%m/%Y')
+            recent_display = recent_hires[['nome', 'cargo', 'departamento', 'salario', 'data_admissao']]
+            recent_display = recent_display.assign(data_admissao=recent_display['data_admissao'].dt.strftime('%d/%m/%Y'))
             recent_display = recent_display.sort_values('data_admissao', ascending=False)
             
             st.dataframe(
@@ -358,8 +473,7 @@ def show_dashboard():
     with col2:
         # Contratações ao longo do tempo
         if len(df_temp) > 0:
-            monthly_hires = df_temp.groupby(df_temp['data_admissao'].dt.to_period('M')).size().reset_index()
-            monthly_hires['data_admissao'] = monthly_hires['data_admissao'].astype(str)
+            monthly_hires = load_monthly_hires().rename_axis('data_admissao').reset_index(name=0)
             
             fig_line = px.line(
                 monthly_hires,
@@ -370,8 +484,125 @@ def show_dashboard():
                 color_discrete_sequence=['#FF0000']
             )
             st.plotly_chart(fig_line, use_container_width=True, key="hires_line_chart_unique")
+    
+    # Headcount real ao longo do tempo (admissões menos desligamentos)
+    headcount_index = load_headcount_index()
+    first_day = headcount_index.first_day()
+    if first_day is not None:
+        headcount_series = headcount_index.series(first_day, datetime.now(), freq='MS').reset_index()
+        fig_headcount = px.area(
+            headcount_series,
+            x='data',
+            y='Headcount',
+            title="👥 Headcount ao Longo do Tempo",
+            labels={'data': 'Mês', 'Headcount': 'Funcionários'},
+            hover_data=['Folha'],
+            color_discrete_sequence=['#FF0000']
+        )
+        st.plotly_chart(fig_headcount, use_container_width=True, key="headcount_chart_unique")
+
+# Progresso das importações em segundo plano
+def show_import_job(job):
+    total = max(job['total'], 1)
+    st.progress(
+        min(job['processados'] / total, 1.0),
+        text=f"Importação {job['id']} ({job['status']}): {job['processados']}/{job['total']} linhas, {job['importados']} importadas"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        if job['status'] in ('pendente', 'executando'):
+            if st.button("⏹️ Cancelar Importação", key=f"cancel_job_{job['id']}"):
+                import_jobs.cancel(job['id'])
+                st.rerun()
+    with col2:
+        if job['status'] in RESUMABLE:
+            if st.button("▶️ Retomar Importação", key=f"resume_job_{job['id']}"):
+                import_jobs.resume(job['id'])
+                st.session_state['import_job_id'] = job['id']
+                st.rerun()
+    if job['status'] == 'concluido':
+        st.success(f"✅ {job['importados']} funcionários importados com sucesso!")
+    elif job['status'] == 'erro' and job.get('falha'):
+        st.error(f"❌ Importação interrompida: {job['falha']}")
+    if job['erros']:
+        with st.expander(f"⚠️ {len(job['erros'])} linhas não foram importadas"):
+            for error in job['erros']:
+                st.write(f"- {error}")
+
+# Atualiza só este trecho da página a cada segundo enquanto o job roda
+@st.fragment(run_every=1)
+def show_running_import_job(job_id):
+    job = import_jobs.get(job_id)
+    if job is None:
+        return
+    show_import_job(job)
+    if not import_jobs.is_active(job_id):
+        # Terminou: recarrega a página inteira para mostrar os novos dados
+        st.rerun()
+
+def show_import_jobs():
+    job_id = st.session_state.get('import_job_id')
+    if job_id and import_jobs.is_active(job_id):
+        show_running_import_job(job_id)
+    elif job_id and import_jobs.get(job_id):
+        show_import_job(import_jobs.get(job_id))
+
+    # Outros jobs desta empresa (ex.: iniciados antes de recarregar a página)
+    others = [job for job in import_jobs.list_jobs(dataset.name) if job['id'] != job_id]
+    if others:
+        with st.expander("🕒 Importações Recentes", key="import_jobs_expander_unique"):
+            for job in others:
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.write(f"**{job['id']}** — {job['status']} — {job['processados']}/{job['total']} linhas ({job['criado_em']})")
+                with col2:
+                    if st.button("Acompanhar", key=f"follow_job_{job['id']}"):
+                        st.session_state['import_job_id'] = job['id']
+                        st.rerun()
 
 # Função para gerenciar funcionários
+def show_parsed_import(uploads, prefix, upload_key):
+    """Resumo, erros, duplicados e botão de importação de arquivos processados em lote"""
+    try:
+        with st.spinner("Processando arquivos..."):
+            results = parse_uploaded_imports(uploads, prefix, upload_key)
+        records, errors = combine_import_results(results)
+        duplicates, limited_blocks = find_upload_duplicates(upload_key, dataset.name, data_handler.data_version(), records)
+        duplicates = locate_duplicates(records, duplicates)
+        
+        if not results:
+            st.error("❌ Nenhum arquivo CSV ou Excel encontrado")
+            return
+        st.dataframe(batch_summary(results), use_container_width=True, key=f"{prefix}_files_table_unique")
+        
+        if not errors.empty:
+            st.warning(f"⚠️ {len(errors)} erros de validação (linhas com erro serão ignoradas)")
+            st.dataframe(errors.head(1000), use_container_width=True, key=f"{prefix}_errors_table_unique")
+            st.download_button(
+                "📥 Baixar erros (CSV)",
+                errors.to_csv(index=False, sep=';').encode('utf-8-sig'),
+                file_name="erros_importacao.csv",
+                mime="text/csv",
+                key=f"download_{prefix}_errors_unique"
+            )
+        
+        if not duplicates.empty:
+            st.warning(f"⚠️ {len(duplicates)} prováveis duplicados entre os arquivos ou com o cadastro")
+            st.dataframe(duplicates.drop(columns=['registro']), use_container_width=True, key=f"{prefix}_duplicates_table_unique")
+            if st.checkbox("Ignorar prováveis duplicados na importação", value=True, key=f"{prefix}_skip_duplicates_unique"):
+                records = records.drop(index=duplicates['registro'])
+        show_limited_blocks(limited_blocks)
+        
+        if records.empty:
+            st.error("❌ Nenhuma linha válida para importar")
+        elif st.button(f"📂 Importar {len(records)} Funcionários", key=f"{prefix}_import_button_unique"):
+            # Gravações em blocos grandes (até MAX_CHUNK_SIZE registros), em segundo plano
+            job_id = import_jobs.submit(dataset.name, records, chunk_size=MAX_CHUNK_SIZE)
+            st.session_state['import_job_id'] = job_id
+            st.rerun()
+    except Exception as e:
+        st.error(f"❌ Erro ao processar arquivos: {str(e)}")
+
 def show_employees():
     st.header("👤 Gestão de Funcionários")
     
@@ -380,9 +611,11 @@ def show_employees():
     
     with tab1:
         st.subheader("Adicionar Novo Funcionário")
-        
+
+        show_import_jobs()
+
         # Botão para adicionar múltiplos funcionários
-        with st.expander("📋 Adicionar Múltiplos Funcionários (CSV)", key="multi_add_expander_unique"):
+        with st.expander("📋 Adicionar Múltiplos Funcionários (CSV ou Excel)", key="multi_add_expander_unique"):
             st.write("**O sistema aceita automaticamente seus arquivos CSV do Excel**")
             
             col1, col2 = st.columns([2, 1])
@@ -400,7 +633,7 @@ def show_employees():
 JOÃO SILVA;ANALISTA; R$ 5.000,00 ;TECNOLOGIA;15/01/2024
 MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
                 
-                st.info("💡 **Dica:** Salve direto do Excel como CSV e faça upload. O sistema converte automaticamente!")
+                st.info("💡 **Dica:** Envie a planilha .xlsx direto do Excel, sem converter para CSV. O sistema converte automaticamente!")
             
             with col2:
                 st.write("**Baixar Template:**")
@@ -431,48 +664,29 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
                 st.markdown("""
                 1. Baixe o template (formato Excel padrão)
                 2. Edite no Excel normalmente
-                3. Salve como CSV
+                3. Salve como .xlsx (ou CSV)
                 4. Faça upload - conversão automática!
                 
                 **Formatos aceitos:**
                 - Salário: R$ 1.500,00 ou 1500
                 - Data: 15/01/2024 ou 2024-01-15
+                - Status (opcional): Ativo, Inativo ou Férias
                 - Separador: ; ou ,
                 """)
             
-            uploaded_file = st.file_uploader("Selecionar arquivo CSV", type=['csv'], key="csv_uploader_unique")
-            if uploaded_file is not None:
+            uploaded_file = st.file_uploader("Selecionar arquivo CSV ou Excel (.xlsx)", type=['csv', 'xlsx'], key="csv_uploader_unique")
+            if uploaded_file is None or not uploaded_file.name.lower().endswith('.xlsx'):
+                # Sem planilha enviada: libera a que foi processada antes
+                st.session_state.pop("xlsx_parsed_import", None)
+            if uploaded_file is not None and uploaded_file.name.lower().endswith('.xlsx'):
+                # Excel lido em streaming, bloco a bloco, direto para a validação
+                show_parsed_import(((uploaded_file.name, uploaded_file.getvalue()),), "xlsx", (uploaded_file.file_id,))
+            elif uploaded_file is not None:
                 # Prévia dos dados
                 try:
-                    # Reset file pointer
-                    uploaded_file.seek(0)
-                    
                     # Tentar diferentes separadores e encodings
-                    preview_df = None
-                    error_messages = []
-                    
-                    # Lista de configurações para tentar
-                    configs = [
-                        {'sep': ';', 'encoding': 'utf-8'},
-                        {'sep': ';', 'encoding': 'latin-1'},
-                        {'sep': ';', 'encoding': 'cp1252'},
-                        {'sep': ';', 'encoding': 'iso-8859-1'},
-                        {'sep': ',', 'encoding': 'utf-8'},
-                        {'sep': ',', 'encoding': 'latin-1'},
-                    ]
-                    
-                    for config in configs:
-                        try:
-                            uploaded_file.seek(0)
-                            preview_df = pd.read_csv(uploaded_file, sep=config['sep'], encoding=config['encoding'])
-                            if len(preview_df.columns) > 0 and len(preview_df) > 0:
-                                break
-                            else:
-                                error_messages.append(f"Config {config}: arquivo vazio ou sem colunas")
-                        except Exception as e:
-                            error_messages.append(f"Config {config}: {str(e)}")
-                            continue
-                    
+                    preview_df, error_messages = read_csv_flexible(uploaded_file)
+
                     if preview_df is None or len(preview_df.columns) == 0:
                         st.error("❌ Erro ao ler arquivo CSV: Não foi possível detectar o formato")
                         st.write("**Tentativas realizadas:**")
@@ -481,29 +695,16 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
                         st.info("💡 Certifique-se de que o arquivo tem dados e está no formato CSV correto")
                         return
                     
-                    # Limpar nomes das colunas (remover espaços)
-                    preview_df.columns = preview_df.columns.str.strip()
-                    
-                    # Mapear colunas com nomes alternativos
-                    column_mapping = {
-                        'data admissao': 'data_admissao',
-                        'data_admissao': 'data_admissao',
-                        'salario': 'salario',
-                        ' salario ': 'salario'
-                    }
-                    
-                    for old_name, new_name in column_mapping.items():
-                        if old_name in preview_df.columns:
-                            preview_df = preview_df.rename(columns={old_name: new_name})
-                    
+                    # Limpar nomes das colunas e mapear nomes alternativos
+                    preview_df = normalize_columns(preview_df)
+
                     # Verificar se todas as colunas obrigatórias estão presentes
-                    required_columns = ['nome', 'cargo', 'salario', 'departamento', 'data_admissao']
-                    missing_columns = [col for col in required_columns if col not in preview_df.columns]
-                    
+                    missing_columns = missing_import_columns(preview_df)
+
                     if missing_columns:
                         st.error(f"❌ Colunas obrigatórias faltando: {', '.join(missing_columns)}")
                         st.write("**Colunas encontradas no arquivo:**", list(preview_df.columns))
-                        st.write("**Colunas obrigatórias:**", required_columns)
+                        st.write("**Colunas obrigatórias:**", REQUIRED_IMPORT_COLUMNS)
                     else:
                         st.success("✅ Todas as colunas obrigatórias encontradas!")
                         
@@ -512,67 +713,45 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
                         
                         st.write(f"**Total de funcionários no arquivo:** {len(preview_df)}")
                         
-                        if st.button("📂 Importar Funcionários", key="import_button_unique"):
-                            success_count = 0
-                            error_count = 0
-                            errors_list = []
-                            
-                            for index, row in preview_df.iterrows():
-                                try:
-                                    # Criar email automático baseado no nome
-                                    nome_parts = str(row['nome']).lower().split()
-                                    if len(nome_parts) >= 2:
-                                        email = f"{nome_parts[0]}.{nome_parts[-1]}@empresa.com"
-                                    else:
-                                        email = f"{nome_parts[0]}@empresa.com"
-                                    
-                                    # Limpar valor do salário (remover R$, espaços e converter vírgula para ponto)
-                                    salario_str = str(row['salario']).strip()
-                                    salario_str = salario_str.replace('R$', '').replace(' ', '').replace('.', '').replace(',', '.')
-                                    try:
-                                        salario_value = float(salario_str)
-                                    except:
-                                        salario_value = 0.0
-                                    
-                                    # Converter data do formato DD/MM/AAAA para AAAA-MM-DD
-                                    data_str = str(row['data_admissao']).strip()
-                                    if '/' in data_str:
-                                        parts = data_str.split('/')
-                                        if len(parts) == 3:
-                                            data_formatted = f"{parts[2]}-{parts[1].zfill(2)}-{parts[0].zfill(2)}"
-                                        else:
-                                            data_formatted = data_str
-                                    else:
-                                        data_formatted = data_str
-                                    
-                                    employee_data = {
-                                        'nome': str(row['nome']).strip(),
-                                        'email': email,
-                                        'telefone': '',
-                                        'departamento': str(row['departamento']).strip(),
-                                        'cargo': str(row['cargo']).strip(),
-                                        'salario': salario_value,
-                                        'data_admissao': data_formatted,
-                                        'status': 'Ativo',
-                                        'observacoes': ''
-                                    }
-                                    
-                                    if data_handler.add_employee(employee_data):
-                                        success_count += 1
-                                    else:
-                                        error_count += 1
-                                        errors_list.append(f"Linha {index + 2}: {row['nome']} (email já existe)")
-                                except Exception as e:
-                                    error_count += 1
-                                    errors_list.append(f"Linha {index + 2}: {row['nome']} - {str(e)}")
-                            
-                            if success_count > 0:
-                                st.success(f"✅ {success_count} funcionários importados com sucesso!")
-                            if error_count > 0:
-                                st.warning(f"⚠️ {error_count} funcionários não foram importados")
-                                with st.expander("Ver detalhes dos erros"):
-                                    for error in errors_list:
-                                        st.write(f"- {error}")
+                        # Prováveis duplicados (no cadastro ou dentro do próprio arquivo)
+                        duplicates, limited_blocks = find_upload_duplicates(
+                            (uploaded_file.file_id,), dataset.name, data_handler.data_version(), preview_df
+                        )
+                        skip_rows = set()
+                        if not duplicates.empty:
+                            st.warning(f"⚠️ {len(duplicates)} prováveis duplicados encontrados")
+                            st.dataframe(
+                                duplicates.assign(linha=duplicates['linha'] + 2),
+                                use_container_width=True,
+                                key="duplicates_table_unique"
+                            )
+                            if st.checkbox("Ignorar prováveis duplicados na importação", value=True, key="skip_duplicates_unique"):
+                                skip_rows = set(duplicates['linha'])
+                        show_limited_blocks(limited_blocks)
+                        
+                        # Validação de tipos, faixas, datas e status (linhas com erro não entram)
+                        to_import = preview_df[~preview_df.index.isin(skip_rows)]
+                        records, validation_errors = normalize_import_rows(to_import)
+                        if not validation_errors.empty:
+                            invalid_count = validation_errors['linha'].nunique()
+                            st.warning(f"⚠️ {invalid_count} linhas com erros de validação serão ignoradas")
+                            st.dataframe(validation_errors.head(1000), use_container_width=True, key="validation_errors_table_unique")
+                            st.download_button(
+                                "📥 Baixar erros (CSV)",
+                                validation_errors.to_csv(index=False, sep=';').encode('utf-8-sig'),
+                                file_name="erros_importacao.csv",
+                                mime="text/csv",
+                                key="download_validation_errors_unique"
+                            )
+
+                        if records.empty:
+                            st.error("❌ Nenhuma linha válida para importar")
+                        elif st.button(f"📂 Importar {len(records)} Funcionários", key="import_button_unique"):
+                            # Importação em segundo plano: a página continua respondendo
+                            job_id = import_jobs.submit(dataset.name, records)
+                            st.session_state['import_job_id'] = job_id
+                            if skip_rows:
+                                st.info(f"ℹ️ {len(skip_rows)} prováveis duplicados ignorados")
                             st.rerun()
                 except Exception as e:
                     st.error(f"❌ Erro ao ler arquivo CSV: {str(e)}")
@@ -582,6 +761,22 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
                     st.write("- Separador incorreto (deve ser vírgula)")
                     st.write("- Verifique se as colunas estão nomeadas corretamente")
         
+        with st.expander("🗂️ Importar Vários Arquivos (CSV, Excel ou ZIP)", key="batch_import_expander_unique"):
+            st.write("**Um arquivo por unidade?** Envie todos de uma vez ou um .zip com os CSVs/planilhas.")
+            st.caption("Cada arquivo é lido e validado em paralelo; duplicados entre arquivos e com o cadastro são apontados e tudo é gravado de uma só vez.")
+            
+            batch_files = st.file_uploader(
+                "Selecionar arquivos",
+                type=['csv', 'xlsx', 'zip'],
+                accept_multiple_files=True,
+                key="batch_uploader_unique"
+            )
+            if batch_files:
+                uploads = tuple((uploaded.name, uploaded.getvalue()) for uploaded in batch_files)
+                show_parsed_import(uploads, "batch", tuple(uploaded.file_id for uploaded in batch_files))
+            else:
+                st.session_state.pop("batch_parsed_import", None)
+        
         st.markdown("---")
         
         with st.form("add_employee_form", clear_on_submit=True):
@@ -611,11 +806,9 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
                 if nome and departamento and cargo and salario > 0:
                     # Gerar email automaticamente se não fornecido
                     if not email_opt:
-                        nome_parts = nome.lower().split()
-                        if len(nome_parts) >= 2:
-                            email_final = f"{nome_parts[0]}.{nome_parts[-1]}@empresa.com"
-                        else:
-                            email_final = f"{nome_parts[0]}@empresa.com"
+                        existing_df = data_handler.load_data()
+                        allocator = EmailAllocator(existing_df['email'] if not existing_df.empty else [])
+                        email_final = allocator.allocate(nome)
                     else:
                         email_final = email_opt
                     
@@ -661,8 +854,8 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
         with col3:
             search_term = st.text_input("🔍 Buscar por nome", key="search_input_unique")
         
-        # Aplicar filtros
-        filtered_df = df.copy()
+        # Aplicar filtros (cada filtro gera uma nova visão; df não é alterado)
+        filtered_df = df
         
         if dept_filter != "Todos":
             filtered_df = filtered_df[filtered_df['departamento'] == dept_filter]
@@ -742,18 +935,33 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
     with tab3:
         st.subheader("Editar ou Excluir Funcionário")
         
-        df = load_cached_data()
-        
-        if df.empty:
+        if data_handler.get_totals()['total_employees'] == 0:
             st.info("📭 Nenhum funcionário cadastrado.", key="empty_info_edit")
             return
         
-        # Selecionar funcionário
-        employee_names = df['nome'].tolist()
-        selected_employee = st.selectbox("Selecione um funcionário:", employee_names, key="employee_edit_select_unique")
+        # Busca no servidor: só os candidatos encontrados vão para a página
+        search_limit = 20
+        edit_query = st.text_input("🔍 Buscar funcionário (nome ou email)", key="employee_edit_search_unique")
+        candidates = dataset.search_employees(edit_query, limit=search_limit)
+        if candidates.empty:
+            st.info("Nenhum funcionário encontrado.", key="empty_search_edit")
+            return
+        if len(candidates) == search_limit:
+            st.caption(f"Mostrando os primeiros {search_limit} resultados; refine a busca para encontrar outros.")
+        
+        labels = {
+            int(row.id): f"{row.nome} — {row.email} ({row.departamento})"
+            for row in candidates.itertuples(index=False)
+        }
+        selected_id = st.selectbox(
+            "Selecione um funcionário:",
+            list(labels),
+            format_func=lambda employee_id: labels[employee_id],
+            key="employee_edit_select_unique"
+        )
         
-        if selected_employee:
-            employee_data = df[df['nome'] == selected_employee].iloc[0]
+        employee_data = dataset.employee(selected_id) if selected_id is not None else None
+        if employee_data:
             
             col1, col2 = st.columns([3, 1])
             
@@ -818,31 +1026,36 @@ MARIA SANTOS;GERENTE; R$ 8.500,50 ;VENDAS;01/02/2024""")
 def show_reports():
     st.header("📊 Relatórios e Análises")
     
-    df = load_cached_data()
+    df, date_index = load_indexed_data()
     
     if df.empty:
         st.warning("⚠️ Nenhum dado disponível para gerar relatórios.", key="reports_warning")
         return
     
-    # Criar cópia para manipulação - CORREÇÃO AQUI
-    df_temp = df.copy()
-    df_temp['data_admissao'] = pd.to_datetime(df_temp['data_admissao'])
+    # Visão compartilhada com datas convertidas (sem cópia por sessão)
+    df_temp = load_dated_data()
     
     # Filtros de período
     col1, col2 = st.columns(2)
     with col1:
-        start_date = st.date_input("Data Inicial", value=df_temp['data_admissao'].min().date(), key="start_date_unique")
+        min_date = date_index.min()
+        start_date = st.date_input("Data Inicial", value=min_date.date() if min_date is not None else date.today(), key="start_date_unique")
     with col2:
         end_date = st.date_input("Data Final", value=date.today(), key="end_date_unique")
     
-    # Filtrar dados por período
-    df_filtered = df_temp[
-        (df_temp['data_admissao'].dt.date >= start_date) &
-        (df_temp['data_admissao'].dt.date <= end_date)
-    ]
+    # Filtrar dados por período (duas buscas binárias no índice ordenado)
+    df_filtered = date_index.select(df_temp, start_date, end_date)
+    
+    # Período padrão: relatórios pesados vêm do disco; período personalizado calcula ao vivo
+    materialized = None
+    if min_date is not None and start_date == min_date.date() and end_date == date.today():
+        materialized = report_scheduler.load(dataset)
+    if materialized:
+        manifest, materialized_tables = materialized
+        st.caption(f"📦 Relatórios pré-calculados em {manifest['gerado_em'].replace('T', ' ')}; altere o período para calcular ao vivo.")
     
     # Tabs para diferentes tipos de relatórios
-    tab1, tab2, tab3, tab4 = st.tabs(["💰 Salários", "📈 Crescimento", "🏢 Departamentos", "📋 Exportar"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["💰 Salários", "📈 Crescimento", "🏢 Departamentos", "📋 Exportar", "🧮 Cenários"])
     
     with tab1:
         st.subheader("Análise Salarial")
@@ -871,9 +1084,22 @@ def show_reports():
             fig_top.update_xaxes(tickangle=45)
             st.plotly_chart(fig_top, use_container_width=True, key="top_salaries_chart_unique")
         
+        # Resumo salarial do período sobre as colunas numéricas mapeadas do disco
+        salary_analysis = create_salary_analysis(None, salaries=load_numeric_columns().period(start_date, end_date).salario)
+        if salary_analysis:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Folha do Período", f"R$ {salary_analysis['total_payroll']:,.2f}", key="period_payroll_metric_unique")
+            with col2:
+                st.metric("Mediana", f"R$ {salary_analysis['median_salary']:,.2f}", key="period_median_metric_unique")
+            with col3:
+                st.metric("1º Quartil", f"R$ {salary_analysis['q1']:,.2f}", key="period_q1_metric_unique")
+            with col4:
+                st.metric("3º Quartil", f"R$ {salary_analysis['q3']:,.2f}", key="period_q3_metric_unique")
+            st.plotly_chart(salary_analysis['salary_ranges_chart'], use_container_width=True, key="salary_ranges_chart_unique")
+        
         # Estatísticas salariais por departamento
-        salary_stats = df_filtered.groupby('departamento')['salario'].agg(['mean', 'median', 'min', 'max']).round(2)
-        salary_stats.columns = ['Média', 'Mediana', 'Mínimo', 'Máximo']
+        salary_stats = materialized_tables['estatisticas_salariais'] if materialized else load_salary_stats(start_date, end_date)
         st.subheader("Estatísticas Salariais por Departamento")
         st.dataframe(salary_stats, use_container_width=True, key="salary_stats_table_unique")
     
@@ -881,45 +1107,56 @@ def show_reports():
         st.subheader("Crescimento da Empresa")
         
         # Contratações ao longo do tiempo
-        monthly_hires = df_filtered.groupby(df_filtered['data_admissao'].dt.to_period('M')).size().reset_index()
-        monthly_hires['data_admissao'] = monthly_hires['data_admissao'].astype(str)
+        if materialized:
+            monthly_hires = materialized_tables['contratacoes_mensais'].reset_index()
+        else:
+            monthly_hires = build_monthly_hires(df_filtered)
         
         fig_growth = px.line(
             monthly_hires,
             x='data_admissao',
-            y=0,
+            y='Contratações',
             title="Contratações por Mês"
         )
         fig_growth.update_layout(yaxis_title="Número de Contratações")
         st.plotly_chart(fig_growth, use_container_width=True, key="growth_chart_unique")
         
-        # Crescimento cumulativo
-        cumulative_hires = df_filtered.sort_values('data_admissao')
-        cumulative_hires['funcionarios_acumulados'] = range(1, len(cumulative_hires) + 1)
+        # Headcount real no período (descontando desligamentos)
+        headcount_index = load_headcount_index()
+        if materialized:
+            headcount_series = materialized_tables['headcount'].reset_index()
+        else:
+            headcount_series = headcount_index.series(start_date, end_date, freq='MS').reset_index()
         
         fig_cumulative = px.line(
-            cumulative_hires,
-            x='data_admissao',
-            y='funcionarios_acumulados',
-            title="Crescimento Cumulativo de Funcionários"
+            headcount_series,
+            x='data',
+            y='Headcount',
+            title="Headcount ao Longo do Tempo",
+            hover_data=['Folha']
         )
         st.plotly_chart(fig_cumulative, use_container_width=True, key="cumulative_chart_unique")
+        
+        # Headcount e folha por departamento em uma data
+        reference_date = st.date_input("Headcount na data", value=end_date, key="headcount_date_unique")
+        total_headcount, total_payroll = headcount_index.total_at(reference_date)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Headcount na Data", total_headcount)
+        with col2:
+            st.metric("Folha na Data", f"R$ {total_payroll:,.2f}")
+        st.dataframe(
+            headcount_index.headcount_at(reference_date),
+            use_container_width=True,
+            column_config={"Folha": st.column_config.NumberColumn("Folha", format="R$ %.2f")},
+            key="headcount_table_unique"
+        )
     
     with tab3:
         st.subheader("🏢 Análise Completa por Departamentos")
         
-        # Análise detalhada com múltiplas métricas
-        dept_analysis = df_filtered.groupby('departamento').agg({
-            'salario': ['sum', 'mean', 'median', 'count', 'min', 'max'],
-            'nome': 'count'
-        }).round(2)
-        dept_analysis.columns = ['Custo Total', 'Média Salarial', 'Mediana', 'Funcionários', 'Menor Salário', 'Maior Salário', 'Total']
-        dept_analysis = dept_analysis.drop('Total', axis=1)  # Remove coluna duplicada
-        dept_analysis = dept_analysis.sort_values('Custo Total', ascending=False)
-        
-        # Calcular percentuais
-        total_custo = dept_analysis['Custo Total'].sum()
-        dept_analysis['% do Custo Total'] = (dept_analysis['Custo Total'] / total_custo * 100).round(1)
+        # Análise detalhada com múltiplas métricas e percentual do custo total
+        dept_analysis = materialized_tables['departamentos'] if materialized else build_department_analysis(df_filtered)
         
         # Mostrar tabela com formatação de moeda
         st.subheader("📊 Resumo Financeiro por Departamento")
@@ -994,7 +1231,7 @@ def show_reports():
         st.subheader("⚡ Análise de Eficiência")
         
         # Calcular eficiência (custo médio por funcionário)
-        dept_analysis['Custo por Funcionário'] = dept_analysis['Custo Total'] / dept_analysis['Funcionários']
+        dept_analysis = dept_analysis.assign(**{'Custo por Funcionário': dept_analysis['Custo Total'] / dept_analysis['Funcionários']})
         dept_efficiency = dept_analysis.sort_values('Custo por Funcionário', ascending=False).head(10)
         
         # Preparar dados para o gráfico de eficiência
@@ -1013,6 +1250,55 @@ def show_reports():
         fig_efficiency.update_xaxes(tickangle=45)
         fig_efficiency.update_traces(texttemplate='R$ %{text:,.0f}', textposition='outside')
         st.plotly_chart(fig_efficiency, use_container_width=True, key="efficiency_chart_unique")
+        
+        # Faixas salariais a partir dos sketches mantidos a cada gravação (sem ordenar os salários)
+        st.subheader("📦 Faixas Salariais por Departamento")
+        sketches = load_salary_sketches()
+        st.caption(f"Cadastro atual completo; percentis com erro relativo de até {sketches.accuracy:.0%}")
+        box_stats = sketches.box_stats().sort_values('Mediana', ascending=False).head(15)
+        if not box_stats.empty:
+            fig_box = go.Figure(go.Box(
+                x=box_stats.index,
+                q1=box_stats['Q1'],
+                median=box_stats['Mediana'],
+                q3=box_stats['Q3'],
+                lowerfence=box_stats['Mínimo'],
+                upperfence=box_stats['Máximo'],
+                marker_color='#FF0000',
+                name='Salário'
+            ))
+            fig_box.update_layout(title="Variação Salarial por Departamento (Top 15 por mediana)", height=450)
+            fig_box.update_xaxes(tickangle=45)
+            st.plotly_chart(fig_box, use_container_width=True, key="salary_box_chart_unique")
+        st.dataframe(
+            sketches.percentiles(),
+            use_container_width=True,
+            column_config={
+                column: st.column_config.NumberColumn(column, format="R$ %.2f")
+                for column in ['P10', 'P25', 'P50', 'P75', 'P90']
+            },
+            key="salary_percentiles_table_unique"
+        )
+        
+        # Tabela dinâmica respondida pelo cubo agregado (sem reagrupar o cadastro)
+        st.subheader("🧊 Tabela Dinâmica")
+        cube = load_salary_cube().slice(start_month=start_date.strftime('%Y-%m'), end_month=end_date.strftime('%Y-%m'))
+        dimension_labels = {'departamento': 'Departamento', 'cargo': 'Cargo', 'status': 'Status', 'mes': 'Mês de Admissão'}
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            pivot_rows = st.selectbox("Linhas", list(dimension_labels), format_func=dimension_labels.get, key="pivot_rows_unique")
+        with col2:
+            pivot_columns = st.selectbox(
+                "Colunas", [d for d in dimension_labels if d != pivot_rows],
+                format_func=dimension_labels.get, index=1, key="pivot_columns_unique"
+            )
+        with col3:
+            pivot_measure = st.selectbox("Medida", ['Funcionários', 'Folha', 'Salário Médio', 'Mínimo', 'Máximo'], key="pivot_measure_unique")
+        pivot_status = st.multiselect("Filtrar status", cube.members('status'), key="pivot_status_unique")
+        if pivot_status:
+            cube = cube.slice(status=pivot_status)
+        st.caption("Período aplicado por mês de admissão")
+        st.dataframe(cube.pivot(pivot_rows, pivot_columns, pivot_measure), use_container_width=True, key="pivot_table_unique")
     
     with tab4:
         st.subheader("Exportar Dados")
@@ -1021,8 +1307,18 @@ def show_reports():
         
         with col1:
             st.write("**Exportar Lista Completa de Funcionários**")
-            if st.button("📊 Baixar Excel - Funcionários", key="export_employees_btn_unique"):
-                excel_data = data_handler.export_to_excel(df_filtered)
+            materialized_excel = report_scheduler.reports(dataset.name).export('excel_funcionarios') if materialized else None
+            if materialized_excel:
+                st.download_button(
+                    label="⬇️ Download Excel",
+                    data=materialized_excel,
+                    file_name=f"funcionarios_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="download_materialized_excel_btn_unique"
+                )
+            elif st.button("📊 Baixar Excel - Funcionários", key="export_employees_btn_unique"):
+                with memory_profiler.track("exportação: Excel funcionários"):
+                    excel_data = data_handler.export_to_excel(df_filtered)
                 if excel_data:
                     st.download_button(
                         label="⬇️ Download Excel",
@@ -1034,13 +1330,20 @@ def show_reports():
         
         with col2:
             st.write("**Exportar Relatório de Salários**")
-            if st.button("📈 Baixar Relatório de Salários", key="export_salary_btn_unique"):
-                salary_report = df_filtered.groupby('departamento').agg({
-                    'nome': 'count',
-                    'salario': ['mean', 'sum', 'min', 'max']
-                }).round(2)
+            materialized_report = report_scheduler.reports(dataset.name).export('excel_salarios') if materialized else None
+            if materialized_report:
+                st.download_button(
+                    label="⬇️ Download Relatório",
+                    data=materialized_report,
+                    file_name=f"relatorio_salarios_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="download_materialized_report_btn_unique"
+                )
+            elif st.button("📈 Baixar Relatório de Salários", key="export_salary_btn_unique"):
+                salary_report = build_salary_report(df_filtered)
                 
-                excel_data = data_handler.export_salary_report(salary_report)
+                with memory_profiler.track("exportação: relatório de salários"):
+                    excel_data = data_handler.export_salary_report(salary_report)
                 if excel_data:
                     st.download_button(
                         label="⬇️ Download Relatório",
@@ -1049,6 +1352,116 @@ def show_reports():
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         key="download_report_btn_unique"
                     )
+        
+        st.markdown("---")
+        st.write("**📦 Baixar Tudo**")
+        st.caption("Gera todos os relatórios em paralelo em um único arquivo zip (cadastro, relatório de salários, planilha com as demais tabelas + gráficos).")
+        # Período cobrindo todas as admissões: as contagens por status saem do
+        # cubo (só os meses com data, como o filtro do período)
+        bundle_cube = None
+        max_date = date_index.max()
+        if min_date is not None and start_date <= min_date.date() and end_date >= max_date.date():
+            bundle_cube = load_salary_cube().slice(start_month=start_date.strftime('%Y-%m'))
+        if st.button("📦 Gerar Pacote Completo", key="export_bundle_btn_unique"):
+            with st.spinner("Gerando relatórios..."):
+                with memory_profiler.track("exportação: pacote completo"):
+                    bundle_data = create_report_bundle(df_filtered, data_handler, cube=bundle_cube)
+            if bundle_data:
+                st.download_button(
+                    label="⬇️ Download Pacote (.zip)",
+                    data=bundle_data,
+                    file_name=f"relatorios_{datetime.now().strftime('%Y%m%d')}.zip",
+                    mime="application/zip",
+                    key="download_bundle_btn_unique"
+                )
+            else:
+                st.error("❌ Erro ao gerar pacote de relatórios.")
+
+    with tab5:
+        st.subheader("🧮 Simulação de Cenários de Folha")
+        st.caption(
+            "Uma regra por linha. Reajustes valem na ordem da tabela: cada funcionário recebe o primeiro que o atende "
+            "(departamento, cargo e status em branco = todos). Contratações sem salário usam a média atual do departamento. "
+            "A simulação usa o cadastro inteiro, como o custo por setor do dashboard."
+        )
+        
+        departments = load_department_costs().index.tolist()
+        default_rules = pd.DataFrame([
+            {'cenario': 'Cenário 1', 'tipo': RAISE, 'departamento': departments[0] if departments else '', 'percentual': 8.0},
+            {'cenario': 'Cenário 1', 'tipo': RAISE, 'percentual': 5.0},
+            {'cenario': 'Cenário 1', 'tipo': HIRE, 'departamento': departments[-1] if departments else '', 'quantidade': 20},
+            {'cenario': 'Cenário 2', 'tipo': RAISE, 'percentual': 3.0},
+        ], columns=SCENARIO_COLUMNS)
+        
+        rules = st.data_editor(
+            default_rules,
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "cenario": st.column_config.TextColumn("Cenário", required=True),
+                "tipo": st.column_config.SelectboxColumn("Tipo", options=[RAISE, HIRE], required=True),
+                "departamento": st.column_config.SelectboxColumn("Departamento", options=departments),
+                "cargo": st.column_config.TextColumn("Cargo"),
+                "status": st.column_config.SelectboxColumn("Status", options=["Ativo", "Inativo", "Férias"]),
+                "percentual": st.column_config.NumberColumn("Reajuste (%)", format="%.2f"),
+                "valor": st.column_config.NumberColumn("Valor Fixo (R$)", format="R$ %.2f"),
+                "quantidade": st.column_config.NumberColumn("Contratações", min_value=0, step=1),
+                "salario": st.column_config.NumberColumn("Salário Contratação", format="R$ %.2f"),
+            },
+            key="scenario_rules_editor_unique"
+        )
+        
+        try:
+            scenario_results = dataset.evaluate_scenarios(scenarios_from_table(rules))
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            scenario_results = None
+        
+        if scenario_results is not None and not scenario_results.empty:
+            summary = scenario_summary(scenario_results)
+            st.subheader("📊 Folha por Cenário")
+            st.dataframe(
+                summary,
+                use_container_width=True,
+                column_config={
+                    "Custo Total": st.column_config.NumberColumn("Folha Simulada", format="R$ %.2f"),
+                    "Custo Atual": st.column_config.NumberColumn("Folha Atual", format="R$ %.2f"),
+                    "Variação": st.column_config.NumberColumn("Variação", format="R$ %.2f"),
+                    "Variação %": st.column_config.NumberColumn("Variação %", format="%.2f%%")
+                },
+                key="scenario_summary_table_unique"
+            )
+            
+            selected_scenario = st.selectbox("Cenário", summary.index.tolist(), key="scenario_select_unique")
+            scenario_costs = scenario_results.loc[selected_scenario]
+            fig_scenario = go.Figure()
+            fig_scenario.add_trace(go.Bar(x=scenario_costs.index, y=scenario_costs['Custo Atual'], name='Atual', marker_color='#A0A0A0'))
+            fig_scenario.add_trace(go.Bar(x=scenario_costs.index, y=scenario_costs['Custo Total'], name=selected_scenario, marker_color='#FF0000'))
+            fig_scenario.update_layout(title=f"💸 Custo por Setor - {selected_scenario}", barmode='group', height=400,
+                                       xaxis_title="Departamento", yaxis_title="Custo Total (R$)")
+            fig_scenario.update_xaxes(tickangle=45)
+            st.plotly_chart(fig_scenario, use_container_width=True, key="scenario_chart_unique")
+            
+            st.dataframe(
+                scenario_costs,
+                use_container_width=True,
+                column_config={
+                    "Custo Total": st.column_config.NumberColumn("Custo Total", format="R$ %.2f"),
+                    "Salário Médio": st.column_config.NumberColumn("Salário Médio", format="R$ %.2f"),
+                    "Custo Atual": st.column_config.NumberColumn("Custo Atual", format="R$ %.2f"),
+                    "Variação": st.column_config.NumberColumn("Variação", format="R$ %.2f"),
+                    "Variação %": st.column_config.NumberColumn("Variação %", format="%.2f%%")
+                },
+                key="scenario_costs_table_unique"
+            )
+            
+            st.download_button(
+                label="⬇️ Baixar Cenários (CSV)",
+                data=scenario_results.to_csv().encode('utf-8'),
+                file_name=f"cenarios_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv",
+                key="download_scenarios_btn_unique"
+            )
 
 # Função para configurações
 def show_settings():
@@ -1061,7 +1474,8 @@ def show_settings():
     with col1:
         st.write("**Backup dos Dados**")
         if st.button("💾 Criar Backup", key="backup_btn_unique"):
-            backup_data = data_handler.create_backup()
+            with memory_profiler.track("exportação: backup"):
+                backup_data = data_handler.create_backup()
             if backup_data:
                 st.download_button(
                     label="⬇️ Download Backup",
@@ -1084,6 +1498,158 @@ def show_settings():
                     st.rerun()
                 else:
                     st.error("❌ Erro ao restaurar dados. Verifique o formato do arquivo.")
+                    if getattr(data_handler, 'last_restore_error', None):
+                        st.write(f"**Detalhe:** {data_handler.last_restore_error}")
+    
+    st.markdown("---")
+    
+    st.subheader("🗄️ Backups Incrementais")
+    st.caption("Backups comprimidos guardados no servidor. Só as alterações desde o último backup completo são gravadas.")
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        if st.button("🗄️ Criar Backup Incremental", key="incremental_backup_btn_unique"):
+            entry = data_handler.create_incremental_backup()
+            if entry:
+                tipo = "completo" if entry['type'] == 'full' else "incremental"
+                st.success(f"✅ Backup {tipo} registrado ({entry['rows']} registros).")
+            else:
+                st.error("❌ Erro ao criar backup incremental.")
+        
+        keep_full = st.number_input("Backups completos a manter", min_value=1, value=5, step=1, key="keep_full_input_unique")
+        max_age = st.number_input("Idade máxima (dias, 0 = sem limite)", min_value=0, value=0, step=1, key="max_age_input_unique")
+        if st.button("🧹 Aplicar Retenção", key="prune_backups_btn_unique"):
+            result = data_handler.prune_backups(keep_full=int(keep_full), max_age_days=int(max_age) or None)
+            if result is not None:
+                st.success(f"✅ {result['removed_backups']} backups removidos.")
+            else:
+                st.error("❌ Erro ao aplicar retenção.")
+    
+    with col2:
+        backups = data_handler.list_backups()
+        if backups:
+            backups_df = pd.DataFrame(backups)
+            display_columns = [col for col in ['id', 'created_at', 'type', 'rows', 'added_rows', 'removed_rows'] if col in backups_df.columns]
+            st.dataframe(backups_df[display_columns], use_container_width=True, key="backups_table_unique")
+            
+            selected_backup = st.selectbox("Selecionar backup:", backups_df['id'].tolist(), key="backup_select_unique")
+            if st.button("📦 Preparar Download", key="prepare_backup_btn_unique"):
+                backup_data = data_handler.get_backup(selected_backup)
+                if backup_data:
+                    st.download_button(
+                        label="⬇️ Download Backup Selecionado",
+                        data=backup_data,
+                        file_name=f"backup_funcionarios_{selected_backup}.csv",
+                        mime="text/csv",
+                        key="download_stored_backup_btn_unique"
+                    )
+                else:
+                    st.error("❌ Erro ao ler backup.")
+        else:
+            st.info("Nenhum backup incremental registrado.")
+    
+    st.markdown("---")
+    
+    st.subheader("🔁 Feed de Alterações")
+    st.caption("Inclusões, atualizações e exclusões numeradas em sequência, para sistemas que sincronizam só o que mudou (também em /api/<empresa>/alteracoes?cursor=N).")
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        st.metric("Última alteração (seq)", data_handler.change_sequence())
+        feed_cursor = st.number_input("A partir do cursor", min_value=0, value=0, step=1, key="changes_cursor_input_unique")
+        if st.button("📦 Preparar Exportação", key="prepare_changes_btn_unique"):
+            with memory_profiler.track("exportação: feed de alterações"):
+                changes_data = data_handler.export_changes(int(feed_cursor))
+            if changes_data is not None:
+                st.download_button(
+                    label="⬇️ Download Alterações (JSON Lines)",
+                    data=changes_data.encode('utf-8'),
+                    file_name=f"alteracoes_{dataset.name}_{int(feed_cursor)}.jsonl",
+                    mime="application/x-ndjson",
+                    key="download_changes_btn_unique"
+                )
+            else:
+                st.error("❌ Erro ao exportar alterações.")
+    
+    with col2:
+        events, _ = data_handler.read_changes(max(data_handler.change_sequence() - 20, 0), 20)
+        if events:
+            recent_changes = pd.DataFrame([
+                {'seq': event['seq'], 'operação': event['op'], 'id': event['id'], 'momento': event['momento'],
+                 'nome': (event['registro'] or {}).get('nome', '')}
+                for event in reversed(events)
+            ])
+            st.dataframe(recent_changes, use_container_width=True, hide_index=True, key="recent_changes_table_unique")
+        else:
+            st.info("Nenhuma alteração registrada.")
+    
+    st.markdown("---")
+    
+    st.subheader("🧠 Perfil de Memória")
+    st.caption(
+        "Mede com tracemalloc o pico e a memória retida de cada página, da carga dos dados e das exportações, "
+        "além do tamanho dos DataFrames (memory_usage deep). Deixa o sistema mais lento: ligue só para investigar "
+        "(ou inicie com HEADCOUNT_MEMORY_PROFILE=1)."
+    )
+    
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        profiling = st.checkbox("Ativar perfil de memória", value=memory_profiler.enabled, key="memory_profile_toggle_unique")
+        if profiling != memory_profiler.enabled:
+            if profiling:
+                memory_profiler.enable()
+            else:
+                memory_profiler.disable()
+            st.rerun()
+        if st.button("🧹 Limpar Medições", key="memory_profile_reset_btn_unique"):
+            memory_profiler.reset()
+            st.rerun()
+    
+    with col2:
+        memory_report = memory_profiler.report()
+        if memory_report.empty:
+            st.info("Nenhuma medição. Ative o perfil e navegue pelas páginas.")
+        else:
+            st.dataframe(
+                memory_report,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "pico": st.column_config.NumberColumn("Pico (MB)", format="%.2f"),
+                    "pico máximo": st.column_config.NumberColumn("Pico Máximo (MB)", format="%.2f"),
+                    "retido": st.column_config.NumberColumn("Retido (MB)", format="%.2f"),
+                    "retido total": st.column_config.NumberColumn("Retido Acumulado (MB)", format="%.2f"),
+                    "DataFrames": st.column_config.NumberColumn("DataFrames (MB)", format="%.2f"),
+                },
+                key="memory_report_table_unique"
+            )
+            st.caption("A medição desta página aparece na próxima execução.")
+            profiled_operation = st.selectbox("Maiores alocações retidas", memory_report['operação'].tolist(), key="memory_operation_select_unique")
+            st.dataframe(memory_profiler.top_allocations(profiled_operation), use_container_width=True, hide_index=True, key="memory_allocations_table_unique")
+    
+    st.markdown("---")
+    
+    st.subheader("🏢 Empresas")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        new_dataset = st.text_input("Nome da nova empresa", key="new_dataset_input_unique")
+        if st.button("➕ Criar Empresa", key="create_dataset_btn_unique") and new_dataset:
+            created = dataset_registry.create(new_dataset)
+            if created:
+                st.success(f"✅ Empresa '{created}' criada! Selecione-a no menu lateral.")
+            else:
+                st.error(f"❌ Nome de empresa inválido (não pode ser '{DEFAULT_DATASET}' nem terminar em {', '.join(RESERVED_SUFFIXES)}).")
+    
+    with col2:
+        st.write("**Empresas em memória (da menos para a mais recente):**")
+        for name in dataset_registry.loaded():
+            st.write(f"- {name}")
+        st.caption(f"Limite: {dataset_registry.max_loaded} empresas carregadas ao mesmo tempo")
     
     st.markdown("---")
     
@@ -1104,18 +1670,19 @@ def show_settings():
             st.metric("Última Atualização", "Nunca", key="never_update_metric_unique")
     
     with col3:
-        file_size = os.path.getsize(data_handler.data_file) if os.path.exists(data_handler.data_file) else 0
+        file_size = os.path.getsize(data_handler.data_file) if data_handler.data_file and os.path.exists(data_handler.data_file) else 0
         st.metric("Tamanho do Arquivo", f"{file_size / 1024:.1f} KB", key="file_size_metric_unique")
 
-# Roteamento principal
-if page == "🏠 Dashboard":
-    show_dashboard()
-elif page == "👤 Funcionários":
-    show_employees()
-elif page == "📊 Relatórios":
-    show_reports()
-elif page == "⚙️ Configurações":
-    show_settings()
+# Roteamento principal (cada página medida pelo perfil de memória, se ligado)
+with memory_profiler.track(f"página: {page}"):
+    if page == "🏠 Dashboard":
+        show_dashboard()
+    elif page == "👤 Funcionários":
+        show_employees()
+    elif page == "📊 Relatórios":
+        show_reports()
+    elif page == "⚙️ Configurações":
+        show_settings()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.fixture
+def employee():
+    """Fábrica de registros de funcionário: employee(i, **alterações)"""
+    def make(i, **changes):
+        record = {
+            'nome': f'Funcionário {i}', 'email': f'funcionario{i}@empresa.com', 'telefone': '',
+            'departamento': ['Tecnologia', 'Vendas'][i % 2], 'cargo': 'Analista',
+            'salario': 3000.0 + i, 'data_admissao': '2024-01-15', 'status': 'Ativo', 'observacoes': '',
+        }
+        record.update(changes)
+        return record
+    return make
@@ -0,0 +1,59 @@
+import json
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+from utils.api import start_server
+from utils.data_handler import DataHandler
+from utils.datasets import DatasetRegistry
+
+
+def test_api_pagination_and_etag(tmp_path):
+    handler = DataHandler(str(tmp_path / "funcionarios.csv"))
+    handler.save_data(pd.read_csv('data/funcionarios.csv'))
+    registry = DatasetRegistry(handler_factory=lambda name: handler)
+    server = start_server(registry, port=0, dataset_names=lambda: ['principal'])
+    base = f"http://127.0.0.1:{server.server_address[1]}/api/principal"
+    try:
+        with urllib.request.urlopen(f"{base}/funcionarios?pagina=2&por_pagina=10") as response:
+            page = json.load(response)
+            etag = response.headers['ETag']
+        assert page['pagina'] == 2 and len(page['funcionarios']) == 10
+        assert page['total'] == len(handler.load_data())
+
+        request = urllib.request.Request(f"{base}/funcionarios?pagina=2&por_pagina=10", headers={'If-None-Match': etag})
+        try:
+            urllib.request.urlopen(request)
+            assert False, "esperado 304"
+        except urllib.error.HTTPError as e:
+            assert e.code == 304
+
+        with urllib.request.urlopen(f"{base}/departamentos") as response:
+            assert json.load(response)['departamentos']
+    finally:
+        server.shutdown()
+
+
+def test_api_change_feed_cursor(tmp_path):
+    handler = DataHandler(str(tmp_path / "funcionarios.csv"))
+    employee = {'nome': 'Ana Souza', 'email': 'ana@empresa.com', 'telefone': '', 'departamento': 'Vendas',
+                'cargo': 'Vendedora', 'salario': 3000.0, 'data_admissao': '2024-01-15', 'status': 'Ativo', 'observacoes': ''}
+    handler.add_employee(employee)
+    handler.update_employee('ana@empresa.com', {'salario': 3500.0})
+    handler.delete_employee('ana@empresa.com')
+    registry = DatasetRegistry(handler_factory=lambda name: handler)
+    server = start_server(registry, port=0, dataset_names=lambda: ['principal'])
+    base = f"http://127.0.0.1:{server.server_address[1]}/api/principal"
+    try:
+        with urllib.request.urlopen(f"{base}/alteracoes?cursor=1") as response:
+            feed = json.load(response)
+        assert [event['op'] for event in feed['alteracoes']] == ['update', 'delete']
+        assert feed['alteracoes'][0]['registro']['salario'] == 3500.0
+        assert feed['cursor'] == handler.change_sequence() == 3
+
+        with urllib.request.urlopen(f"{base}/alteracoes?cursor=0&formato=jsonl") as response:
+            lines = response.read().decode('utf-8').splitlines()
+        assert [json.loads(line)['seq'] for line in lines] == [1, 2, 3]
+    finally:
+        server.shutdown()
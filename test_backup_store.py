@@ -0,0 +1,52 @@
+import io
+import os
+
+import pandas as pd
+
+from utils.backup_store import BackupStore
+
+
+def _write(path, df):
+    df.to_csv(path, index=False)
+
+
+def _read(data):
+    return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+
+
+def test_full_delta_restore_and_prune(tmp_path):
+    data_file = str(tmp_path / 'funcionarios.csv')
+    store = BackupStore(str(tmp_path / 'backups'), max_deltas=1)
+    df = pd.DataFrame({'id': range(1, 21), 'nome': [f'F{i}' for i in range(1, 21)], 'salario': [3000.5] * 20})
+
+    _write(data_file, df)
+    full = store.create(data_file)
+    assert full['type'] == 'full'
+    # Sem alteração no arquivo: devolve o mesmo backup
+    assert store.create(data_file)['id'] == full['id']
+
+    changed = pd.concat([df[df['id'] != 5], pd.DataFrame([{'id': 21, 'nome': 'F21', 'salario': 9000.0}])], ignore_index=True)
+    changed.loc[changed['id'] == 7, 'nome'] = 'Alterado'
+    _write(data_file, changed)
+    delta = store.create(data_file)
+    assert delta['type'] == 'delta' and delta['base'] == full['id']
+    assert (delta['added_rows'], delta['removed_rows']) == (2, 2)
+
+    # Ida e volta: o incremental reconstrói o arquivo (ordem das linhas à parte)
+    expected = _read(open(data_file, 'rb').read()).sort_values('id').reset_index(drop=True)
+    restored = _read(store.materialize(delta['id'])).sort_values('id').reset_index(drop=True)
+    pd.testing.assert_frame_equal(restored, expected)
+    pd.testing.assert_frame_equal(_read(store.materialize(full['id'])), _read(df.to_csv(index=False).encode()))
+
+    # max_deltas=1: o próximo vira um completo novo
+    _write(data_file, changed.iloc[:-1])
+    second_full = store.create(data_file)
+    assert second_full['type'] == 'full'
+
+    result = store.prune(keep_full=1)
+    assert result['removed_backups'] == 2
+    assert [entry['id'] for entry in store.list_backups()] == [second_full['id']]
+    # Os objetos referenciados pelo backup mantido continuam no disco
+    objects = {name.split('.')[0] for name in os.listdir(store.objects_dir)}
+    assert objects == {second_full['object'], second_full['keys']}
+    assert _read(store.materialize(second_full['id'])).shape == (19, 3)
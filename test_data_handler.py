@@ -0,0 +1,89 @@
+import io
+import threading
+
+import pandas as pd
+
+from utils.data_handler import DataHandler
+
+
+def _backup(records, ids=None):
+    df = pd.DataFrame(records)
+    if ids is not None:
+        df.insert(0, 'id', ids)
+    return io.BytesIO(df.to_csv(index=False).encode('utf-8'))
+
+
+def test_restore_rejects_duplicate_ids_across_chunks(tmp_path, employee):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    handler.add_employees([employee(i) for i in range(3)])
+    before = open(handler.data_file, 'rb').read()
+
+    backup = _backup([employee(i) for i in range(5)], ids=[1, 2, 3, 4, 2])
+    assert not handler.restore_backup(backup, chunksize=2)
+    assert handler.last_restore_error == 'linha 6: id duplicado'
+    # O arquivo de dados fica intacto após a falha
+    assert open(handler.data_file, 'rb').read() == before
+
+    backup = _backup([employee(i) for i in range(4)] + [employee(1)], ids=[1, 2, 3, 4, 5])
+    assert not handler.restore_backup(backup, chunksize=2)
+    assert handler.last_restore_error == 'linha 6: email duplicado'
+    assert open(handler.data_file, 'rb').read() == before
+
+    assert handler.restore_backup(_backup([employee(i) for i in range(5)], ids=[10, 2, 3, 4, 5]), chunksize=2)
+    assert sorted(handler.load_data()['id']) == [2, 3, 4, 5, 10]
+
+
+def test_column_store_rebuilt_when_stamp_is_stale(tmp_path, employee):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    handler.add_employees([employee(i) for i in range(5)])
+    assert handler.load_numeric_columns().total_payroll() == sum(3000.0 + i for i in range(5))
+
+    # Alteração por fora do sistema: a marca (mtime, tamanho) do CSV muda
+    df = pd.read_csv(handler.data_file)
+    df.loc[0, 'salario'] = 10000.0
+    df.loc[1, 'data_admissao'] = 'sem data'
+    df.to_csv(handler.data_file, index=False)
+    assert handler.column_store.read(handler._data_stamp()) is None
+
+    columns = handler.load_numeric_columns()
+    assert columns.total_payroll() == 10000.0 + sum(3000.0 + i for i in range(1, 5))
+    assert len(columns.period('2024-01-01', '2024-12-31')) == 4
+    # Refeitas e gravadas com a marca nova: a próxima leitura vem do disco
+    assert handler.column_store.read(handler._data_stamp()) is not None
+
+
+def test_change_feed_seqs_are_unique_across_handlers(tmp_path, employee):
+    first = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    second = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    assert first.add_employee(employee(0))
+    seen = first.change_sequence()
+    assert second.add_employee(employee(1))
+    assert first.add_employee(employee(2))
+
+    events, _ = first.read_changes(0)
+    assert [event['seq'] for event in events] == [1, 2, 3]
+    assert [event['registro']['email'] for event in events] == [f'funcionario{i}@empresa.com' for i in range(3)]
+    # O primeiro handler não viu a gravação do segundo: o delta não basta
+    assert first.changes_since(seen) is None
+
+
+def test_concurrent_writers_do_not_lose_updates(tmp_path, employee):
+    path = str(tmp_path / 'funcionarios.csv')
+    # Importação e interface com handlers próprios, gravando ao mesmo tempo
+    handlers = [DataHandler(path), DataHandler(path)]
+
+    def write(worker):
+        for i in range(worker, 40, 2):
+            assert handlers[worker].add_employee(employee(i))
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    df = handlers[0].load_data()
+    assert len(df) == 40 and df['id'].is_unique
+    assert handlers[0].get_totals()['total_employees'] == 40
+    events, _ = handlers[0].read_changes(0, limit=100)
+    assert [event['seq'] for event in events] == list(range(1, 41))
@@ -0,0 +1,95 @@
+import pandas as pd
+
+from utils.data_handler import DataHandler
+from utils.datasets import Dataset, DatasetRegistry
+
+
+def _fail_full_reload():
+    raise AssertionError("snapshot recarregou o arquivo inteiro")
+
+
+def test_snapshot_applies_only_deltas(tmp_path, monkeypatch, employee):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    handler.add_employees([employee(i) for i in range(10)])
+    dataset = Dataset('teste', handler)
+    dataset.snapshot()
+    dataset.department_costs()
+
+    handler.add_employee(employee(10))
+    handler.update_employee('funcionario3@empresa.com', {'salario': 9000.5, 'departamento': 'Financeiro'})
+    handler.delete_employee('funcionario4@empresa.com')
+
+    # Sem recarga completa: só as alterações desde a última sequência vista
+    monkeypatch.setattr(handler, 'load_data', _fail_full_reload)
+    snapshot = dataset.snapshot()
+    monkeypatch.undo()
+
+    assert snapshot.sequence == handler.change_sequence()
+    expected = handler.load_data()
+    pd.testing.assert_frame_equal(snapshot.df, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(dataset.department_costs(), handler.department_costs(df=expected), check_dtype=False)
+
+
+def test_payroll_scenarios_match_recomputed_costs(tmp_path, employee):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    handler.add_employees([employee(i) for i in range(10)])
+    dataset = Dataset('teste', handler)
+    scenarios = [
+        {'nome': 'base'},
+        {'nome': 'reajuste', 'reajustes': [{'departamento': 'Tecnologia', 'percentual': 8}, {'percentual': 5}],
+         'contratacoes': [{'departamento': 'Vendas', 'quantidade': 2}, {'departamento': 'Financeiro', 'quantidade': 1, 'salario': 7000.0}]},
+    ]
+    result = dataset.evaluate_scenarios(scenarios)
+
+    base = result.loc['base'][['Custo Total', 'Salário Médio', 'Funcionários']]
+    assert base.equals(dataset.department_costs().astype({'Funcionários': int}).rename_axis('departamento'))
+
+    df = handler.load_data()
+    raised = df['salario'] * df['departamento'].map({'Tecnologia': 1.08}).fillna(1.05)
+    costs = result.loc['reajuste']
+    assert abs(costs.loc['Tecnologia', 'Custo Total'] - raised[df['departamento'] == 'Tecnologia'].sum()) < 0.01
+    vendas = df[df['departamento'] == 'Vendas']['salario']
+    assert abs(costs.loc['Vendas', 'Custo Total'] - (raised[df['departamento'] == 'Vendas'].sum() + 2 * vendas.mean())) < 0.01
+    assert costs.loc['Vendas', 'Funcionários'] == 7
+    assert costs.loc['Financeiro', 'Custo Total'] == 7000.0
+
+
+def test_sql_dataset_names_skip_side_tables(tmp_path, monkeypatch):
+    from utils.datasets import DatasetRegistry, list_datasets
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'headcount.db'}")
+    registry = DatasetRegistry()
+    assert registry.create('Acme Ltda') == 'acme_ltda'
+    assert registry.create('Estado') is None
+    assert registry.create('Acme Histórico') is None
+    assert registry.create('Alteracoes') is None
+    assert registry.create('Histórico Escolar') == 'historico_escolar'
+    assert list_datasets() == ['principal', 'acme_ltda', 'historico_escolar']
+
+
+def test_registry_evicts_least_recently_used_and_isolates_companies(tmp_path, employee):
+    def handler_factory(name):
+        return DataHandler(str(tmp_path / name / 'funcionarios.csv'))
+
+    registry = DatasetRegistry(max_loaded=2, handler_factory=handler_factory)
+    alfa, beta = registry.get('alfa'), registry.get('beta')
+    alfa.handler.add_employees([employee(i) for i in range(3)])
+    beta.handler.add_employees([employee(i) for i in range(5)])
+    beta_snapshot = beta.snapshot()
+
+    # alfa foi usada por último: abrir gama despeja beta
+    assert registry.get('alfa') is alfa
+    gama = registry.get('gama')
+    assert registry.loaded() == ['alfa', 'gama']
+    assert registry.get('alfa') is alfa
+
+    # Gravação em uma empresa não muda o snapshot das outras
+    assert len(alfa.snapshot().df) == 3 and gama.snapshot().df.empty
+    assert gama.handler.add_employee(employee(9))
+    assert len(gama.snapshot().df) == 1
+    assert len(alfa.snapshot().df) == 3
+    assert len(beta_snapshot.df) == 5
+
+    # Reaberta, beta é carregada de novo do próprio arquivo
+    reopened = registry.get('beta')
+    assert reopened is not beta and len(reopened.snapshot().df) == 5
+    assert registry.loaded() == ['alfa', 'beta']
@@ -0,0 +1,34 @@
+from datetime import date
+
+import pandas as pd
+
+from utils.date_index import DateIndex
+
+
+def test_range_includes_whole_end_day_and_skips_nat():
+    df = pd.DataFrame({
+        'nome': ['a', 'b', 'c', 'd', 'e'],
+        'data_admissao': ['2024-03-10 00:00', None, '2024-01-31 18:30', 'invalida', '2024-02-01 09:00'],
+    })
+    index = DateIndex.from_frame(df)
+
+    # Linhas sem data (vazia ou inválida) ficam fora do índice
+    assert len(index) == 3
+    assert index.min() == pd.Timestamp('2024-01-31 18:30')
+    assert index.max() == pd.Timestamp('2024-03-10')
+    assert index.select(df, '2024-03-10', '2024-03-10')['nome'].tolist() == ['a']
+
+    # Início e fim inclusivos por dia, mesmo com horário na data
+    assert list(index.select(df, date(2024, 1, 31), date(2024, 2, 1))['nome']) == ['c', 'e']
+    assert list(index.select(df, '2024-02-01', '2024-03-09')['nome']) == ['e']
+    assert list(index.select(df, end='2024-01-30')['nome']) == []
+    assert list(index.select(df)['nome']) == ['c', 'e', 'a']
+    # Período invertido não devolve nada
+    assert index.select(df, '2024-03-10', '2024-01-01').empty
+    assert list(index.since(df, '2024-02-01')['nome']) == ['e', 'a']
+
+
+def test_empty_index():
+    index = DateIndex.from_frame(pd.DataFrame())
+    assert len(index) == 0 and index.min() is None and index.max() is None
+    assert len(index.range_positions('2024-01-01', '2024-12-31')) == 0
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from utils.dedupe import find_duplicates
+
+
+def test_large_blocks_are_capped_not_skipped():
+    # 300 "Maria" em Vendas: bloco acima de max_block pelo primeiro nome
+    existing = pd.DataFrame({
+        'nome': [f'Maria {chr(97 + i % 26)}{chr(97 + i // 26)}lves Souza{chr(97 + i % 7)}' for i in range(300)],
+        'departamento': 'Vendas',
+    })
+    new = pd.DataFrame({
+        'nome': ['Maria Bclves Souzab', 'Pedro Santos', 'Pedro Santoss'],
+        'departamento': ['Vendas', 'RH', 'RH'],
+    }, index=[10, 11, 12])
+
+    duplicates = find_duplicates(new, existing, max_block=50, window=5)
+
+    # O parecido dentro do bloco grande é achado pelos vizinhos em ordem alfabética
+    match = duplicates.set_index('linha').loc[10]
+    assert match['origem'] == 'cadastro' and match['similaridade'] >= 0.9
+    assert duplicates.set_index('linha').loc[12, 'semelhante_a'] == 'Pedro Santos'
+    assert 'maria (vendas)' in duplicates.attrs['blocos_limitados']
+    assert not any('pedro' in block for block in duplicates.attrs['blocos_limitados'])
+
+
+def test_capped_comparisons_match_full_comparison_on_small_blocks():
+    new = pd.DataFrame({'nome': ['Ana Lima', 'Ana Lima', 'Bruno Costa', 'Bruno Kosta'], 'departamento': 'TI'})
+    full = find_duplicates(new, max_block=500)
+    capped = find_duplicates(new, max_block=1, window=3)
+    pd.testing.assert_frame_equal(full, capped)
+    assert full['linha'].tolist() == [1, 3]
@@ -0,0 +1,24 @@
+from utils.email_allocator import EmailAllocator
+
+
+def test_collision_order():
+    allocator = EmailAllocator(taken=['Joao.Silva@empresa.com', 'joao.silva3@empresa.com'])
+    emails = allocator.allocate_many([
+        'João Pedro da Silva',
+        'Joao Paulo Marques Silva',
+        'João Pedro Silva',
+        'JOÃO SILVA',
+        'João Silva',
+    ])
+    assert emails == [
+        # Nome do meio: a inicial, sem as partículas
+        'joao.p.silva@empresa.com',
+        # Inicial já usada: todas as iniciais do meio
+        'joao.pm.silva@empresa.com',
+        # Iniciais já usadas: sufixo numérico sobre nome.sobrenome, pulando os ocupados
+        'joao.silva2@empresa.com',
+        'joao.silva4@empresa.com',
+        'joao.silva5@empresa.com',
+    ]
+    assert allocator.is_taken('JOAO.SILVA5@empresa.com')
+    assert EmailAllocator().allocate('  ') == 'funcionario@empresa.com'
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from utils.headcount import HeadcountIndex
+
+
+def test_headcount_with_exits_and_rehires():
+    df = pd.DataFrame({
+        'email': ['a', 'b', 'c'],
+        'departamento': ['X', 'X', 'Y'],
+        'salario': [100.0, 200.0, 300.0],
+        'data_admissao': ['2024-01-01', '2024-02-01', '2024-03-01'],
+        'status': ['Ativo', 'Inativo', 'Ativo'],
+        'data_desligamento': ['', '2024-06-01', ''],
+    })
+    history = pd.DataFrame({
+        'email': ['c', 'c'],
+        'data': ['2024-04-01', '2024-05-01'],
+        'status_anterior': ['Ativo', 'Inativo'],
+        'status_novo': ['Inativo', 'Ativo'],
+    })
+    index = HeadcountIndex.from_frame(df, history)
+
+    assert index.total_at('2023-12-31') == (0, 0.0)
+    assert index.total_at('2024-03-15') == (3, 600.0)
+    assert index.total_at('2024-04-15') == (2, 300.0)
+    assert index.total_at('2024-06-01') == (2, 400.0)
+
+    by_department = index.headcount_at('2024-03-15')
+    assert by_department.loc['X', 'Headcount'] == 2
+    assert by_department.loc['Y', 'Folha'] == 300.0
+
+    series = index.series('2024-01-01', '2024-07-01')
+    assert series['Headcount'].tolist() == [1, 2, 3, 2, 3, 2, 2]
@@ -0,0 +1,58 @@
+import time
+
+import pandas as pd
+
+from utils.data_handler import DataHandler
+from utils.import_jobs import ImportJobManager, DONE, FAILED
+
+
+def _wait(manager, job_id):
+    for _ in range(200):
+        if not manager.is_active(job_id):
+            return manager.get(job_id)
+        time.sleep(0.05)
+    raise AssertionError("job não terminou")
+
+
+def test_resume_after_crash_between_write_and_confirmation(tmp_path):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    manager = ImportJobManager(lambda name: handler, jobs_dir=str(tmp_path / 'jobs'))
+    records = pd.DataFrame({
+        'linha': range(2, 12),
+        'nome': ['Ana Lima'] * 5 + [f'Pessoa {i}' for i in range(5)],
+        'departamento': 'Vendas', 'cargo': 'Analista', 'salario': 3000.0,
+        'data_admissao': '2024-01-15', 'status': 'Ativo', 'telefone': '', 'observacoes': '',
+    })
+
+    # Queda do processo logo depois de gravar o segundo bloco, antes de confirmá-lo
+    original = handler.add_employees
+    calls = []
+
+    def crash_after_write(employees):
+        result = original(employees)
+        calls.append(len(employees))
+        if len(calls) == 2:
+            raise RuntimeError("queda simulada")
+        return result
+
+    handler.add_employees = crash_after_write
+    job_id = manager.submit('principal', records, chunk_size=4)
+    job = _wait(manager, job_id)
+    assert job['status'] == FAILED and job['processados'] == 4
+    assert job['falha'] == 'queda simulada' and job['erros'] == []
+    assert len(handler.load_data()) == 8
+
+    handler.add_employees = original
+    assert manager.resume(job_id)
+    job = _wait(manager, job_id)
+
+    df = handler.load_data()
+    assert job['status'] == DONE
+    # A falha da primeira execução não fica no job concluído
+    assert (job['importados'], job['erros'], job['falha']) == (10, [], None)
+    # Nenhuma linha entrou duas vezes com outro email
+    assert len(df) == 10 and df['email'].is_unique
+    assert sorted(df['email'][df['nome'] == 'Ana Lima']) == [
+        'ana.lima2@empresa.com', 'ana.lima3@empresa.com', 'ana.lima4@empresa.com',
+        'ana.lima5@empresa.com', 'ana.lima@empresa.com',
+    ]
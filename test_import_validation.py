@@ -0,0 +1,73 @@
+import io
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook
+
+from utils.batch_import import expand_uploads, merge_import_results, parse_import_files
+from utils.importer import normalize_import_rows, normalize_xlsx_rows
+
+
+def test_invalid_rows_are_reported_and_skipped():
+    df = pd.DataFrame({
+        'nome': ['Ana Souza', '', 'Bruno Lima', 'Carla Dias'],
+        'cargo': ['Analista', 'Gerente', 'Vendedor', 'Assistente'],
+        'departamento': ['Tecnologia', 'Vendas', 'Vendas', 'Financeiro'],
+        'salario': ['R$ 3.500,00', '4000', 'abc', '1500.50'],
+        'data_admissao': ['15/01/2024', '2024-02-10', '2023-13-01', '31/02/2024'],
+        'status': ['ativo', 'Ativo', 'Férias', 'Demitido'],
+    })
+    records, errors = normalize_import_rows(df)
+
+    assert records['linha'].tolist() == [2]
+    assert records['salario'].tolist() == [3500.0]
+    assert records['data_admissao'].tolist() == ['2024-01-15']
+    assert records['status'].tolist() == ['Ativo']
+
+    reasons = set(zip(errors['linha'], errors['coluna']))
+    assert reasons == {(3, 'nome'), (4, 'salario'), (4, 'data_admissao'), (5, 'data_admissao'), (5, 'status')}
+
+
+def test_batch_import_merges_files_and_flags_cross_file_duplicates():
+    header = "nome;cargo;salario;departamento;data_admissao\n"
+    site_a = (header + "João Silva;Analista;3000;Obra;15/01/2024\nMaria Souza;Analista;3100;Obra;15/01/2024\n").encode('utf-8')
+    site_b = (header + "Joao Silva;Analista;3000;Obra;15/01/2024\nPedro Alves;Soldador;abc;Obra;15/01/2024\n").encode('utf-8')
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        zip_file.writestr('unidades/site_b.csv', site_b)
+        zip_file.writestr('__MACOSX/unidades/._site_b.csv', b'')
+
+    files = expand_uploads([('site_a.csv', site_a), ('lote.zip', archive.getvalue()), ('notas.txt', b'')])
+    assert [name for name, _ in files] == ['site_a.csv', 'lote.zip/unidades/site_b.csv']
+
+    records, errors, duplicates = merge_import_results(parse_import_files(files, max_workers=2))
+    assert records[['arquivo', 'linha']].values.tolist() == [
+        ['site_a.csv', 2], ['site_a.csv', 3], ['lote.zip/unidades/site_b.csv', 2]
+    ]
+    assert errors[['arquivo', 'linha', 'coluna']].values.tolist() == [['lote.zip/unidades/site_b.csv', 3, 'salario']]
+    assert duplicates[['registro', 'arquivo', 'linha', 'semelhante_a']].values.tolist() == [
+        [2, 'lote.zip/unidades/site_b.csv', 2, 'João Silva']
+    ]
+
+
+def test_xlsx_rows_are_streamed_in_chunks():
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([])
+    sheet.append(['nome', 'cargo', ' salario ', 'departamento', 'data admissao', 'status'])
+    sheet.append(['Ana Souza', 'Analista', 3500.5, 'Tecnologia', datetime(2024, 1, 15), 'ativo'])
+    sheet.append([None] * 6)
+    sheet.append(['Bruno Lima', 'Vendedor', 'R$ 1.500,00', 'Vendas', '15/02/2024', None])
+    sheet.append(['Carla Dias', 'Gerente', 'abc', 'Vendas', '2024-13-01', 'Ativo'])
+    sheet.append(['Davi Reis', 'Assistente', 1.5, 'Vendas', datetime(2024, 3, 1), 'Férias'])
+    output = io.BytesIO()
+    workbook.save(output)
+
+    records, errors, rows = normalize_xlsx_rows(io.BytesIO(output.getvalue()), chunk_size=2)
+    assert rows == 4
+    # linha = número da linha na planilha
+    assert records['linha'].tolist() == [3, 5, 7]
+    assert records['salario'].tolist() == [3500.5, 1500.0, 1.5]
+    assert records['data_admissao'].tolist() == ['2024-01-15', '2024-02-15', '2024-03-01']
+    assert errors[['linha', 'coluna']].values.tolist() == [[6, 'data_admissao'], [6, 'salario']]
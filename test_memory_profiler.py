@@ -0,0 +1,41 @@
+import tracemalloc
+
+import pandas as pd
+
+from utils.memory_profiler import MemoryProfiler, frame_memory
+
+
+def test_nested_blocks_are_measured_separately():
+    profiler = MemoryProfiler(enabled=True, snapshots=False)
+    kept = []
+    try:
+        with profiler.track('página') as page:
+            with profiler.track('carga') as load:
+                df = load.frame(pd.DataFrame({'nome': [f'Funcionário {i}' for i in range(20000)]}))
+                kept.append(df)
+            # Alocação temporária só do bloco externo
+            temporary = bytearray(8 * 1024 * 1024)
+            del temporary
+            page.frame(df)
+        report = profiler.report().set_index('operação')
+    finally:
+        profiler.disable()
+
+    assert set(report.index) == {'página', 'carga'}
+    assert (report['execuções'] == 1).all()
+    # O pico do bloco externo inclui o do interno e a alocação temporária
+    assert report.loc['página', 'pico'] >= max(report.loc['carga', 'pico'], 8)
+    assert report.loc['carga', 'pico'] < 8
+    assert report.loc['carga', 'retido'] > 0
+    assert report.loc['carga', 'DataFrames'] == round(frame_memory(kept[0]) / (1024 * 1024), 2)
+
+
+def test_disabled_profiler_is_a_no_op():
+    assert not tracemalloc.is_tracing()
+    profiler = MemoryProfiler()
+    df = pd.DataFrame({'salario': [1.0, 2.0]})
+    with profiler.track('página') as measurement:
+        assert measurement.frame(df) is df
+    assert not tracemalloc.is_tracing()
+    assert profiler.report().empty
+    assert profiler.top_allocations('página').empty
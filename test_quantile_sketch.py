@@ -0,0 +1,45 @@
+import numpy as np
+
+from utils.data_handler import DataHandler
+from utils.quantile_sketch import DDSketch, DepartmentSketches
+from utils.sql_handler import SQLDataHandler
+
+
+def test_sketch_relative_error_and_merge():
+    salaries = np.random.default_rng(0).lognormal(8.5, 0.6, 50000)
+    qs = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+    sketch = DDSketch(0.01).add(salaries)
+    exact = np.quantile(salaries, qs, method='lower')
+    assert (np.abs(sketch.quantiles(qs) - exact) / exact).max() <= 0.01
+
+    merged = DDSketch(0.01).add(salaries[:20000]).merge(DDSketch(0.01).add(salaries[20000:]))
+    assert np.allclose(merged.quantiles(qs), sketch.quantiles(qs))
+    assert np.allclose(DDSketch.from_dict(sketch.to_dict()).quantiles(qs), sketch.quantiles(qs))
+
+
+def _assert_same_sketches(handler):
+    expected = DepartmentSketches.from_frame(handler.load_data(), handler.sketch_accuracy)
+    sketches = handler.load_salary_sketches()
+    assert sketches.departments() == expected.departments()
+    for dept in expected.departments():
+        got, want = sketches.sketches[dept], expected.sketches[dept]
+        assert (got.bins, got.count, got.min, got.max) == (want.bins, want.count, want.min, want.max)
+        assert abs(got.total - want.total) < 1e-6
+
+
+def test_sketches_are_updated_incrementally(tmp_path, employee):
+    for handler in (DataHandler(str(tmp_path / 'funcionarios.csv')), SQLDataHandler('sqlite://')):
+        handler.add_employees([employee(i) for i in range(6)])
+        _assert_same_sketches(handler)
+        # Salário do meio: o sketch do departamento é ajustado sem refazer
+        assert handler.update_employee('funcionario2@empresa.com', {'salario': 3500.0})
+        _assert_same_sketches(handler)
+        # Maior salário saindo do departamento: o departamento é refeito
+        assert handler.update_employee('funcionario5@empresa.com', {'departamento': 'Tecnologia'})
+        _assert_same_sketches(handler)
+        assert handler.add_employee(employee(7, departamento='Financeiro'))
+        assert handler.delete_employee('funcionario7@empresa.com')
+        assert handler.delete_employee('funcionario0@empresa.com')
+        _assert_same_sketches(handler)
+        assert 'Financeiro' not in handler.load_salary_sketches().departments()
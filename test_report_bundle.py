@@ -0,0 +1,51 @@
+import io
+import zipfile
+
+import pandas as pd
+
+from utils.data_handler import DataHandler
+from utils.cube import SalaryCube
+from utils.report_bundle import build_status_by_department, create_report_bundle
+from utils.visualizations import create_status_analysis
+
+
+def test_report_bundle_contents(tmp_path, employee):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    handler.add_employees([employee(i, status=['Ativo', 'Férias'][i % 3 == 0]) for i in range(12)])
+    df = handler.load_data()
+
+    bundle = zipfile.ZipFile(io.BytesIO(create_report_bundle(df, handler)))
+    names = bundle.namelist()
+    workbooks = {name.rsplit('_', 1)[0]: name for name in names if name.endswith('.xlsx')}
+    assert set(workbooks) == {'relatorio_completo', 'funcionarios', 'relatorio_salarios'}
+    assert any(name.startswith('graficos/status_') for name in names)
+
+    sheets = pd.read_excel(io.BytesIO(bundle.read(workbooks['relatorio_completo'])), sheet_name=None)
+    assert list(sheets) == ['Relatório de Salários', 'Departamentos', 'Resumo Salarial', 'Status por Departamento']
+    status = sheets['Status por Departamento'].set_index('departamento')
+    assert status.to_numpy().sum() == len(df)
+    assert status.loc['Vendas', 'Férias'] == ((df['departamento'] == 'Vendas') & (df['status'] == 'Férias')).sum()
+
+    roster = pd.read_excel(io.BytesIO(bundle.read(workbooks['funcionarios'])))
+    assert len(roster) == len(df)
+
+
+def test_status_analysis_from_cube_matches_frame(tmp_path, employee):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    handler.add_employees([employee(i, status=['Ativo', 'Férias', 'Inativo'][i % 3]) for i in range(12)])
+    df = handler.load_data()
+    cube = SalaryCube.from_frame(df)
+
+    by_frame, by_cube = create_status_analysis(df), create_status_analysis(df, cube)
+    bars = [
+        {trace.name: (list(trace.x), [int(value) for value in trace.y]) for trace in analysis['status_by_dept'].data}
+        for analysis in (by_frame, by_cube)
+    ]
+    assert bars[0] == bars[1]
+    pie_frame, pie_cube = by_frame['status_pie'].data[0], by_cube['status_pie'].data[0]
+    assert dict(zip(pie_cube.labels, pie_cube.values)) == dict(zip(pie_frame.labels, pie_frame.values))
+
+    table = build_status_by_department(df, cube)
+    expected = build_status_by_department(df)
+    assert table.to_numpy().tolist() == expected.to_numpy().tolist()
+    assert list(table.index) == list(expected.index) and list(table.columns) == list(expected.columns)
@@ -0,0 +1,33 @@
+import time
+
+from utils.data_handler import DataHandler
+from utils.datasets import DatasetRegistry
+from utils.report_scheduler import ReportScheduler
+
+
+def test_scheduler_debounces_and_never_serves_stale_reports(tmp_path, employee):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    handler.add_employees([employee(i) for i in range(4)])
+    registry = DatasetRegistry(handler_factory=lambda name: handler)
+    dataset = registry.get()
+    scheduler = ReportScheduler(registry, reports_dir=str(tmp_path / 'relatorios'), debounce=30)
+    reports = scheduler.reports(dataset.name)
+
+    # Nunca gerado: a página calcula ao vivo e a geração é pedida
+    assert scheduler.load(dataset) is None
+    now = time.time()
+    scheduler.run_pending(now)
+    manifest, tables = scheduler.load(dataset)
+    assert manifest['linhas'] == 4
+    assert tables['departamentos']['Funcionários'].sum() == 4
+
+    # Depois de uma gravação o manifesto antigo não é servido
+    assert handler.add_employee(employee(4))
+    assert scheduler.load(dataset) is None
+    # Dentro do debounce não regera; depois dele, sim
+    scheduler.run_pending(now)
+    assert reports.manifest()['linhas'] == 4
+    assert not scheduler.is_due(dataset.name, handler.data_version(), reports.manifest(), now + 10)
+    scheduler.run_pending(now + 31)
+    manifest, _ = scheduler.load(dataset)
+    assert manifest['linhas'] == 5
@@ -0,0 +1,154 @@
+import pandas as pd
+
+from utils.data_handler import DataHandler
+from utils.sql_handler import SQLDataHandler
+from utils.cube import SalaryCube
+
+
+def test_sql_aggregations_match_pandas(tmp_path):
+    df = pd.read_csv('data/funcionarios.csv')
+    # Um salário vazio: as contagens por departamento devem ignorá-lo nos dois backends
+    df.loc[0, 'salario'] = None
+    csv_handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    assert csv_handler.save_data(df)
+    sql_handler = SQLDataHandler('sqlite://')
+    assert sql_handler.save_data(df)
+
+    sql_costs = sql_handler.department_costs()
+    csv_costs = csv_handler.department_costs(df)
+    assert list(sql_costs.index) == list(csv_costs.index)
+    assert (sql_costs['Funcionários'] == csv_costs['Funcionários']).all()
+    assert ((sql_costs['Custo Total'] - csv_costs['Custo Total']).abs() < 0.05).all()
+
+    sql_stats = sql_handler.salary_stats_by_department('2024-01-01', '2024-12-31')
+    csv_stats = csv_handler.salary_stats_by_department('2024-01-01', '2024-12-31', df=df)
+    assert ((sql_stats - csv_stats.loc[sql_stats.index]).abs() < 0.01).all().all()
+
+    assert sql_handler.monthly_hires().equals(csv_handler.monthly_hires(df))
+    assert sql_handler.status_by_department().equals(csv_handler.status_by_department(df))
+    assert sql_handler.get_statistics()['total_employees'] == len(df)
+
+    cube = SalaryCube(sql_handler.cube_cells())
+    assert cube.pivot('departamento', 'status').astype(int).equals(
+        csv_handler.status_by_department(df).rename_axis(columns='status').astype(int)
+    )
+    assert len(cube.cells) == len(SalaryCube.from_frame(df).cells)
+
+
+def test_sql_crud():
+    handler = SQLDataHandler('sqlite://')
+    employee = {
+        'nome': 'Ana Silva', 'email': 'ana.silva@empresa.com', 'telefone': '',
+        'departamento': 'Tecnologia', 'cargo': 'Analista', 'salario': 4500.0,
+        'data_admissao': '2024-01-15', 'status': 'Ativo', 'observacoes': ''
+    }
+    assert handler.add_employee(employee)
+    assert not handler.add_employee(employee)
+    assert handler.get_totals()['total_employees'] == 1
+    assert handler.get_totals()['total_salary'] == 4500.0
+    assert handler.update_employee('ana.silva@empresa.com', {'salario': 5000.0})
+    assert handler.load_data().loc[0, 'salario'] == 5000.0
+    employee_id = int(handler.load_data().loc[0, 'id'])
+    assert handler.get_employee(employee_id)['email'] == 'ana.silva@empresa.com'
+    assert handler.search_employees('silva')['id'].tolist() == [employee_id]
+    assert handler.delete_employee('ana.silva@empresa.com')
+    assert handler.load_data().empty
+
+
+def test_csv_ids_are_stable(tmp_path):
+    handler = DataHandler(str(tmp_path / 'funcionarios.csv'))
+    base = {'telefone': '', 'departamento': 'Vendas', 'cargo': 'Vendedor', 'salario': 3000.0,
+            'data_admissao': '2024-01-15', 'status': 'Ativo', 'observacoes': ''}
+    for nome in ['Ana Souza', 'Bruno Lima', 'Carla Dias']:
+        assert handler.add_employee(dict(base, nome=nome, email=f"{nome.split()[0].lower()}@empresa.com"))
+    assert handler.delete_employee('ana@empresa.com')
+    assert handler.load_data()['id'].tolist() == [2, 3]
+    assert handler.get_employee(3)['nome'] == 'Carla Dias'
+    assert handler.get_employee(1) is None
+    assert handler.search_employees('BRUNO')['id'].tolist() == [2]
+
+
+def test_sql_data_version_is_shared(tmp_path):
+    url = f"sqlite:///{tmp_path / 'headcount.db'}"
+    writer, reader = SQLDataHandler(url), SQLDataHandler(url)
+    employee = {'nome': 'Ana Silva', 'email': 'ana@empresa.com', 'departamento': 'Vendas', 'salario': 3000.0,
+                'data_admissao': '2024-01-15', 'status': 'Ativo'}
+    version = reader.data_version()
+    assert writer.add_employee(employee)
+    # A gravação de outra instância (ou processo) muda a versão vista pelas demais
+    assert reader.data_version() != version
+    assert reader.data_version() == writer.data_version()
+    assert reader.get_totals()['total_employees'] == 1
+    assert reader.get_totals()['last_write'] is not None
+    version = reader.data_version()
+    assert not writer.delete_employee('ninguem@empresa.com')
+    assert reader.data_version() == version
+
+
+def test_sql_bulk_insert_beyond_parameter_limit(monkeypatch):
+    import utils.sql_handler as sql_module
+    monkeypatch.setattr(sql_module, 'IN_BATCH_SIZE', 7)
+    handler = SQLDataHandler('sqlite://')
+    employees = [{'nome': f'F{i}', 'email': f'f{i}@empresa.com', 'departamento': 'Vendas', 'salario': 3000.0,
+                  'data_admissao': '2024-01-15', 'status': 'Ativo'} for i in range(40)]
+    assert handler.add_employees(employees[:10]) == (10, [])
+    added, rejected = handler.add_employees(employees)
+    assert (added, len(rejected)) == (30, 10)
+    assert [change.id for change in handler.changes.entries][-30:] == list(range(11, 41))
+
+
+def test_sql_totals_are_maintained_on_write(tmp_path):
+    url = f"sqlite:///{tmp_path / 'headcount.db'}"
+    handler = SQLDataHandler(url)
+    df = pd.read_csv('data/funcionarios.csv')
+    assert handler.save_data(df.head(30))
+
+    def employee(i, departamento='Jurídico'):
+        return {'nome': f'Novo {i}', 'email': f'novo{i}@empresa.com', 'departamento': departamento,
+                'salario': 1000.25 * i, 'data_admissao': '2024-01-15', 'status': 'Ativo'}
+
+    assert handler.add_employee(employee(1))
+    assert handler.add_employees([employee(2), employee(3, 'Logística')]) == (2, [])
+    assert handler.update_employee('novo1@empresa.com', {'departamento': 'Logística', 'salario': 500.0})
+    assert handler.delete_employee('novo2@empresa.com')
+    assert handler.delete_employee(df['email'].iloc[0])
+
+    statistics = handler.get_statistics()
+    totals = handler.get_totals()
+    assert totals['total_employees'] == statistics['total_employees'] == 31
+    assert abs(totals['total_salary'] - statistics['total_salary']) < 0.01
+    assert totals['departments'] == statistics['departments']
+    # Outra instância (ou o processo reiniciado) lê os mesmos totais, sem recontar
+    assert SQLDataHandler(url).get_totals() == totals
+
+
+def test_ids_are_not_reused_after_deleting_the_highest(tmp_path, employee):
+    for handler in (DataHandler(str(tmp_path / 'funcionarios.csv')), SQLDataHandler('sqlite://')):
+        handler.add_employees([employee(i) for i in range(3)])
+        highest = int(handler.load_data()['id'].max())
+        assert handler.delete_employee('funcionario2@empresa.com')
+        assert handler.add_employee(employee(3))
+        assert handler.add_employees([employee(4)]) == (1, [])
+        ids = handler.load_data().set_index('email')['id']
+        assert ids['funcionario3@empresa.com'] == highest + 1
+        assert ids['funcionario4@empresa.com'] == highest + 2
+
+
+def test_sql_feed_is_written_in_the_data_transaction(monkeypatch, employee):
+    handler = SQLDataHandler('sqlite://')
+    assert handler.add_employee(employee(0))
+    events, cursor = handler.read_changes(0)
+    assert [(event['seq'], event['op']) for event in events] == [(1, 'insert')]
+
+    # Falha ao gravar o feed: a inclusão é desfeita junto
+    def fail(changes, conn=None):
+        raise RuntimeError("feed indisponível")
+    monkeypatch.setattr(handler.changes.feed, 'append', fail)
+    assert not handler.add_employee(employee(1))
+    assert handler.load_data()['email'].tolist() == ['funcionario0@empresa.com']
+    monkeypatch.undo()
+
+    assert handler.delete_employee('funcionario0@empresa.com')
+    events, _ = handler.read_changes(cursor)
+    assert [event['op'] for event in events] == ['delete']
+    assert handler.changes_since(1)[1][0].op == 'delete'
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from utils.datasets import DatasetRegistry, list_datasets
+from utils.report_bundle import build_salary_report
+from utils.changes import to_json_lines
+
+# Tamanho de página padrão e máximo do cadastro
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Colunas expostas no cadastro
+ROSTER_COLUMNS = ['id', 'nome', 'email', 'telefone', 'departamento', 'cargo',
+                  'salario', 'data_admissao', 'status', 'observacoes', 'data_desligamento']
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _records(df):
+    """DataFrame em lista de dicionários JSON (NaN vira null)"""
+    return json.loads(df.to_json(orient='records', force_ascii=False, date_format='iso'))
+
+
+def _int_param(query, name, default):
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        raise ApiError(400, f"parâmetro '{name}' inválido")
+
+
+def roster_page(df, query):
+    """Uma página do cadastro, com filtros opcionais por departamento e status"""
+    for column in ('departamento', 'status'):
+        if column in query:
+            df = df[df[column] == query[column][0]]
+
+    page = max(_int_param(query, 'pagina', 1), 1)
+    per_page = min(max(_int_param(query, 'por_pagina', DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    start = (page - 1) * per_page
+    columns = [column for column in ROSTER_COLUMNS if column in df.columns]
+    return {
+        'pagina': page,
+        'por_pagina': per_page,
+        'total': int(len(df)),
+        'paginas': int(-(-len(df) // per_page)),
+        'funcionarios': _records(df.iloc[start:start + per_page][columns]),
+    }
+
+
+def department_stats(dataset):
+    """Custo, salário médio e funcionários por departamento"""
+    costs = dataset.department_costs().reset_index()
+    costs.columns = ['departamento', 'custo_total', 'salario_medio', 'funcionarios']
+    return {'departamentos': _records(costs)}
+
+
+def salary_report(df):
+    """Relatório de salários por departamento (mesma tabela da exportação)"""
+    if df.empty:
+        return {'departamentos': []}
+    report = build_salary_report(df)
+    report.columns = ['funcionarios', 'salario_medio', 'folha', 'salario_minimo', 'salario_maximo']
+    return {'departamentos': _records(report.reset_index())}
+
+
+def change_feed(handler, query):
+    """Eventos do feed de alterações após o cursor (limite por página como o cadastro)"""
+    cursor = max(_int_param(query, 'cursor', 0), 0)
+    limit = min(max(_int_param(query, 'limite', MAX_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    events, next_cursor = handler.read_changes(cursor, limit)
+    return {'cursor': next_cursor, 'alteracoes': events, 'mais': len(events) == limit}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Rotas somente leitura:
+
+    GET /api/empresas
+    GET /api/<empresa>/funcionarios?pagina=1&por_pagina=50[&departamento=..][&status=..]
+    GET /api/<empresa>/departamentos
+    GET /api/<empresa>/relatorio-salarial
+    GET /api/<empresa>/alteracoes?cursor=0&limite=1000[&formato=jsonl]
+
+    Cada resposta leva um ETag derivado da versão dos dados e da URL; um
+    If-None-Match igual responde 304 sem carregar nem serializar nada.
+    """
+
+    registry = None
+    dataset_names = staticmethod(list_datasets)
+    server_version = "HeadcountAPI/1.0"
+
+    def log_message(self, format, *args):
+        # Sem log por requisição (ferramentas fazem polling frequente)
+        pass
+
+    def _send_json(self, status, payload, etag=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json_lines(self, text, etag=None):
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _etag(self, version):
+        digest = hashlib.sha1(repr((version, self.path)).encode('utf-8')).hexdigest()[:20]
+        return f'W/"{digest}"'
+
+    def _not_modified(self, etag):
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+    def do_GET(self):
+        try:
+            url = urlparse(self.path)
+            parts = [unquote(part) for part in url.path.strip('/').split('/')]
+            query = parse_qs(url.query)
+
+            if parts == ['api', 'empresas']:
+                return self._send_json(200, {'empresas': self.dataset_names()})
+            if len(parts) != 3 or parts[0] != 'api':
+                raise ApiError(404, "rota não encontrada")
+
+            name, resource = parts[1], parts[2]
+            if name not in self.dataset_names():
+                raise ApiError(404, f"empresa '{name}' não encontrada")
+            if resource not in ('funcionarios', 'departamentos', 'relatorio-salarial', 'alteracoes'):
+                raise ApiError(404, "rota não encontrada")
+
+            dataset = self.registry.get(name)
+            etag = self._etag(dataset.handler.data_version())
+            if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+                return self._not_modified(etag)
+
+            if resource == 'alteracoes':
+                # Lido direto do feed, sem carregar o cadastro
+                payload = change_feed(dataset.handler, query)
+                if query.get('formato', [''])[0] == 'jsonl':
+                    return self._send_json_lines(to_json_lines(payload['alteracoes']), etag)
+                return self._send_json(200, payload, etag)
+
+            snapshot = dataset.snapshot()
+            if resource == 'funcionarios':
+                payload = roster_page(snapshot.df, query)
+            elif resource == 'departamentos':
+                payload = department_stats(dataset)
+            else:
+                payload = snapshot.analytics('api_salary_report', lambda: salary_report(snapshot.df))
+            # ETag da versão efetivamente servida
+            self._send_json(200, payload, self._etag(snapshot.version))
+        except ApiError as e:
+            self._send_json(e.status, {'erro': str(e)})
+        except Exception as e:
+            print(f"Erro na API: {e}")
+            self._send_json(500, {'erro': 'erro interno'})
+
+    do_HEAD = do_GET
+
+    def _read_only(self):
+        self._send_json(405, {'erro': 'API somente leitura'})
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = _read_only
+
+
+def create_server(registry, host="127.0.0.1", port=8502, dataset_names=list_datasets):
+    """Cria o servidor HTTP (use port=0 para uma porta livre qualquer)"""
+    handler = type('BoundApiRequestHandler', (ApiRequestHandler,), {
+        'registry': registry,
+        'dataset_names': staticmethod(dataset_names),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_server(registry, host="127.0.0.1", port=8502, dataset_names=list_datasets):
+    """Inicia o servidor em uma thread de fundo e o retorna"""
+    server = create_server(registry, host, port, dataset_names)
+    threading.Thread(target=server.serve_forever, name="headcount-api", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(os.environ.get("HEADCOUNT_API_PORT", "8502"))
+    server = create_server(DatasetRegistry(), os.environ.get("HEADCOUNT_API_HOST", "127.0.0.1"), port)
+    print(f"API somente leitura em http://{server.server_address[0]}:{port}/api/empresas")
+    server.serve_forever()
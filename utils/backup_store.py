@@ -0,0 +1,247 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Constante para diferenciar linhas idênticas repetidas (hash + ocorrência)
+_OCCURRENCE_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _row_keys(df):
+    """Gera uma chave de 64 bits por linha, estável entre leituras do CSV"""
+    if df.empty:
+        return np.array([], dtype=np.uint64)
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy(dtype=np.uint64)
+    return hashes + occurrence * _OCCURRENCE_MIX
+
+
+def _read_csv_text(data):
+    """Lê CSV mantendo todos os campos como texto (ida e volta sem perdas)"""
+    return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+
+
+class BackupStore:
+    """Backups incrementais comprimidos e endereçados por conteúdo
+
+    Cada backup completo guarda o arquivo de dados comprimido (gzip) e as
+    chaves das linhas; os backups incrementais guardam só as linhas novas ou
+    alteradas e as chaves removidas desde o último completo. Os objetos são
+    nomeados pelo SHA-256 do conteúdo, então dados repetidos não são gravados
+    duas vezes, e um backup de dados inalterados não grava nada.
+    """
+
+    def __init__(self, directory, max_deltas=10, full_ratio=0.5):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.manifest_file = os.path.join(directory, 'manifest.json')
+        self.max_deltas = max_deltas
+        self.full_ratio = full_ratio
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Armazenamento de objetos e manifesto
+    # ------------------------------------------------------------------
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, f"{digest}.gz")
+
+    def _put_object(self, data):
+        """Grava bytes comprimidos e retorna o hash do conteúdo"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            temp_path = f"{path}.tmp"
+            with gzip.open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return digest
+
+    def _get_object(self, digest):
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return f.read()
+
+    def _put_keys(self, keys):
+        buffer = io.BytesIO()
+        np.save(buffer, keys)
+        return self._put_object(buffer.getvalue())
+
+    def _get_keys(self, digest):
+        return np.load(io.BytesIO(self._get_object(digest)))
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_file):
+            return []
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, entries):
+        temp_path = f"{self.manifest_file}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_path, self.manifest_file)
+
+    # ------------------------------------------------------------------
+    # Operações públicas
+    # ------------------------------------------------------------------
+    def create(self, data_file):
+        """Cria um backup do arquivo de dados e retorna a entrada do manifesto"""
+        entries = self._load_manifest()
+        last = entries[-1] if entries else None
+
+        stat = os.stat(data_file)
+        file_stamp = [stat.st_mtime_ns, stat.st_size]
+
+        # Arquivo não mudou desde o último backup: custo só de um stat
+        if last and last.get('file_stamp') == file_stamp:
+            return last
+
+        with open(data_file, 'rb') as f:
+            data = f.read()
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        if last and last['content_hash'] == content_hash:
+            last['file_stamp'] = file_stamp
+            self._save_manifest(entries)
+            return last
+
+        current = _read_csv_text(data)
+        keys = _row_keys(current)
+
+        base = self._latest_full(entries)
+        entry = None
+        if base is not None and base['columns'] == list(current.columns):
+            entry = self._make_delta(base, entries, current, keys)
+
+        if entry is None:
+            entry = {
+                'type': 'full',
+                'object': self._put_object(data),
+                'keys': self._put_keys(keys),
+            }
+
+        now = datetime.now()
+        entry.update({
+            'id': now.strftime('%Y%m%d_%H%M%S_%f'),
+            'created_at': now.isoformat(timespec='seconds'),
+            'content_hash': content_hash,
+            'file_stamp': file_stamp,
+            'columns': list(current.columns),
+            'rows': len(current),
+        })
+        entries.append(entry)
+        self._save_manifest(entries)
+        return entry
+
+    def _latest_full(self, entries):
+        for entry in reversed(entries):
+            if entry['type'] == 'full':
+                return entry
+        return None
+
+    def _make_delta(self, base, entries, current, keys):
+        """Monta um backup incremental, ou None se um completo for melhor"""
+        deltas_since_base = sum(1 for e in entries if e.get('base') == base['id'])
+        if deltas_since_base >= self.max_deltas:
+            return None
+
+        base_keys = self._get_keys(base['keys'])
+        added = ~np.isin(keys, base_keys)
+        removed = base_keys[~np.isin(base_keys, keys)]
+
+        changed = int(added.sum()) + len(removed)
+        if changed > self.full_ratio * max(len(base_keys), 1):
+            return None
+
+        added_csv = current[added].to_csv(index=False).encode('utf-8')
+        return {
+            'type': 'delta',
+            'base': base['id'],
+            'object': self._put_object(added_csv),
+            'removed': self._put_keys(removed),
+            'added_rows': int(added.sum()),
+            'removed_rows': len(removed),
+        }
+
+    def list_backups(self):
+        """Lista os backups, do mais recente para o mais antigo"""
+        return list(reversed(self._load_manifest()))
+
+    def materialize(self, backup_id):
+        """Reconstrói o CSV completo de um backup"""
+        entries = {e['id']: e for e in self._load_manifest()}
+        entry = entries.get(backup_id)
+        if entry is None:
+            return None
+
+        if entry['type'] == 'full':
+            return self._get_object(entry['object'])
+
+        base = entries[entry['base']]
+        base_df = _read_csv_text(self._get_object(base['object']))
+        removed = self._get_keys(entry['removed'])
+        keep = ~np.isin(self._get_keys(base['keys']), removed)
+        added = _read_csv_text(self._get_object(entry['object']))
+
+        restored = pd.concat([base_df[keep], added], ignore_index=True)
+        return restored.to_csv(index=False).encode('utf-8')
+
+    def prune(self, keep_full=5, max_age_days=None):
+        """Aplica a política de retenção e remove objetos não referenciados
+
+        Mantém os keep_full backups completos mais recentes (e seus
+        incrementais); com max_age_days, remove também os mais antigos que
+        isso, preservando sempre o último completo.
+        """
+        entries = self._load_manifest()
+        fulls = [e for e in entries if e['type'] == 'full']
+        kept_fulls = fulls[-keep_full:] if keep_full > 0 else fulls[-1:]
+
+        if max_age_days is not None:
+            limit = datetime.now() - timedelta(days=max_age_days)
+            recent = [e for e in kept_fulls if datetime.fromisoformat(e['created_at']) >= limit]
+            kept_fulls = recent or kept_fulls[-1:]
+
+        kept_ids = {e['id'] for e in kept_fulls}
+        latest = entries[-1] if entries else None
+
+        def keep(entry):
+            if entry['id'] in kept_ids:
+                return True
+            if entry.get('base') not in kept_ids:
+                return False
+            if max_age_days is None or entry is latest:
+                return True
+            return datetime.fromisoformat(entry['created_at']) >= limit
+
+        remaining = [e for e in entries if keep(e)]
+
+        referenced = set()
+        for entry in remaining:
+            for field in ('object', 'keys', 'removed'):
+                if field in entry:
+                    referenced.add(entry[field])
+
+        removed_objects = 0
+        for name in os.listdir(self.objects_dir):
+            digest = name.split('.')[0]
+            if digest not in referenced:
+                os.remove(os.path.join(self.objects_dir, name))
+                removed_objects += 1
+
+        self._save_manifest(remaining)
+        return {
+            'removed_backups': len(entries) - len(remaining),
+            'removed_objects': removed_objects,
+        }
+
+    def disk_usage(self):
+        """Tamanho total ocupado pelos objetos em bytes"""
+        return sum(
+            os.path.getsize(os.path.join(self.objects_dir, name))
+            for name in os.listdir(self.objects_dir)
+        )
@@ -0,0 +1,123 @@
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from utils.dedupe import find_duplicates
+from utils.import_validation import ERROR_COLUMNS
+from utils.importer import normalize_columns, normalize_import_rows, normalize_xlsx_rows, read_csv_flexible
+
+# Extensões aceitas na importação em lote (zip é expandido nos arquivos de dentro)
+BATCH_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def expand_uploads(uploads):
+    """Lista (nome, bytes) de CSVs e planilhas a partir dos arquivos enviados, abrindo os zips"""
+    files = []
+    for name, data in uploads:
+        if name.lower().endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    member_name = member.filename
+                    if member.is_dir() or member_name.startswith('__MACOSX/') or not member_name.lower().endswith(BATCH_EXTENSIONS):
+                        continue
+                    files.append((f"{name}/{member_name}", archive.read(member)))
+        elif name.lower().endswith(BATCH_EXTENSIONS):
+            files.append((name, data))
+    return files
+
+
+def _file_error(name, reason):
+    return pd.DataFrame([{'arquivo': name, 'linha': 1, 'coluna': '', 'motivo': reason, 'valor': ''}])
+
+
+def parse_import_file(name, data):
+    """Lê, valida e normaliza um arquivo (executado em um processo do pool)
+
+    Retorna (nome, registros válidos, tabela de erros, linhas lidas); os
+    registros e os erros têm a coluna 'arquivo' para identificar a origem
+    depois da junção.
+    """
+    try:
+        if name.lower().endswith('.xlsx'):
+            records, errors, rows = normalize_xlsx_rows(io.BytesIO(data))
+        else:
+            df, _ = read_csv_flexible(io.BytesIO(data))
+            if df is None or len(df.columns) == 0:
+                return name, pd.DataFrame(), _file_error(name, 'formato de CSV não reconhecido'), 0
+            records, errors = normalize_import_rows(normalize_columns(df))
+            rows = len(df)
+    except Exception as e:
+        return name, pd.DataFrame(), _file_error(name, f'erro ao ler arquivo: {e}'), 0
+    records.insert(0, 'arquivo', name)
+    errors.insert(0, 'arquivo', name)
+    return name, records, errors, rows
+
+
+def parse_import_files(files, max_workers=None):
+    """Processa os arquivos em paralelo, um por processo (na ordem recebida)
+
+    Com um único arquivo (ou se o pool não puder ser criado) o
+    processamento é feito no próprio processo.
+    """
+    if len(files) > 1:
+        max_workers = min(len(files), max_workers or os.cpu_count() or 1)
+        # spawn: o servidor tem threads em execução, então não usamos fork
+        context = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+                return list(executor.map(parse_import_file, *zip(*files)))
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Erro no pool de importação, processando em sequência: {e}")
+    return [parse_import_file(name, data) for name, data in files]
+
+
+def batch_summary(results):
+    """Uma linha por arquivo: linhas lidas, válidas e com erro"""
+    return pd.DataFrame([
+        {'arquivo': name, 'linhas': rows, 'válidas': len(records),
+         'com erro': errors['linha'].nunique() if not errors.empty else 0}
+        for name, records, errors, rows in results
+    ], columns=['arquivo', 'linhas', 'válidas', 'com erro'])
+
+
+def combine_import_results(results):
+    """Junta os registros e os erros dos arquivos processados
+
+    Os registros têm índice sequencial e as colunas 'arquivo' e 'linha' de
+    origem.
+    """
+    frames = [records for _, records, _, _ in results if not records.empty]
+    records = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['arquivo', 'linha', 'nome', 'departamento'])
+    error_frames = [errors for _, _, errors, _ in results if not errors.empty]
+    errors = (
+        pd.concat(error_frames, ignore_index=True) if error_frames
+        else pd.DataFrame(columns=['arquivo'] + ERROR_COLUMNS)
+    )
+    return records, errors
+
+
+def locate_duplicates(records, duplicates):
+    """Troca o índice do registro pela origem (arquivo e linha) na tabela de duplicados
+
+    O índice do registro fica na coluna 'registro'.
+    """
+    positions = duplicates['linha'].to_numpy(dtype=int)
+    located = duplicates.rename(columns={'linha': 'registro'})
+    located.insert(1, 'arquivo', records['arquivo'].to_numpy()[positions])
+    located.insert(2, 'linha', records['linha'].to_numpy()[positions])
+    return located
+
+
+def merge_import_results(results, existing_df=None):
+    """Junta os arquivos processados e aponta duplicados entre arquivos e com o cadastro
+
+    Retorna (registros, erros, duplicados), como combine_import_results e
+    locate_duplicates.
+    """
+    records, errors = combine_import_results(results)
+    return records, errors, locate_duplicates(records, find_duplicates(records, existing_df))
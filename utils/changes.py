@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+from collections import deque, namedtuple
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.file_lock import file_lock
+
+# Tipos de alteração
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+# Gravação do cadastro inteiro (save_data, restauração): exige recarga completa
+RESET = 'reset'
+
+Change = namedtuple('Change', ['seq', 'op', 'id', 'row'])
+
+
+def _json_value(value):
+    """Valor de um registro em tipo JSON (NaN vira null)"""
+    if isinstance(value, (np.generic,)):
+        value = value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
+
+
+def change_event(seq, op, employee_id, row, moment=None):
+    """Evento do feed de alterações (um objeto por linha JSON)"""
+    return {
+        'seq': seq,
+        'op': op,
+        'id': employee_id,
+        'momento': moment or datetime.now().isoformat(timespec='seconds'),
+        'registro': {key: _json_value(value) for key, value in row.items()} if row is not None else None,
+    }
+
+
+def to_json_lines(events):
+    """Eventos em JSON Lines"""
+    return ''.join(json.dumps(event, ensure_ascii=False) + '\n' for event in events)
+
+
+class ChangeFeed:
+    """Feed persistido de alterações (JSON Lines, só acrescenta)
+
+    Cada linha é um evento com seq, op (insert, update, delete ou reset), id
+    do funcionário, momento e o registro gravado. Como seq cresce ao longo
+    do arquivo, a leitura a partir de um cursor acha o ponto de partida por
+    busca binária nas posições do arquivo e lê só os eventos seguintes.
+    Um evento reset indica que o cadastro inteiro foi substituído
+    (save_data ou restauração de backup) e que o consumidor deve
+    sincronizar do zero a partir de um backup completo.
+
+    Vários DataHandlers (e processos) podem gravar no mesmo feed: os seq são
+    atribuídos a partir do fim do arquivo, com uma trava de arquivo
+    (<feed>.lock) em volta da leitura e da gravação.
+
+    Os eventos são acrescentados logo depois da gravação do CSV, ainda com a
+    trava de gravação do cadastro; se o feed recusar os eventos, o
+    DataHandler tenta registrar um reset. Uma queda do processo entre as
+    duas gravações deixa o feed sem os eventos daquela gravação (no SQL o
+    feed é gravado na mesma transação dos dados e isso não acontece).
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def last_sequence(self):
+        """Maior seq gravado (0 se o feed estiver vazio)"""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'rb') as feed:
+            feed.seek(0, os.SEEK_END)
+            end = feed.tell()
+            position = max(end - 4096, 0)
+            while True:
+                feed.seek(position)
+                lines = feed.read(end - position).splitlines()
+                complete = [line for line in lines[1 if position else 0:] if line.strip()]
+                if complete or position == 0:
+                    return json.loads(complete[-1])['seq'] if complete else 0
+                position = max(position - 4096, 0)
+
+    def append(self, changes):
+        """Grava alterações (op, id, registro) numeradas após o último seq do feed; retorna os seq"""
+        moment = datetime.now().isoformat(timespec='seconds')
+        with file_lock(self.path):
+            first_seq = self.last_sequence() + 1
+            events = [
+                change_event(first_seq + offset, op, employee_id, row, moment)
+                for offset, (op, employee_id, row) in enumerate(changes)
+            ]
+            with open(self.path, 'a', encoding='utf-8') as feed:
+                feed.write(to_json_lines(events))
+                feed.flush()
+                os.fsync(feed.fileno())
+        return [event['seq'] for event in events]
+
+    def _seq_at(self, feed, position):
+        """seq da primeira linha completa a partir de position (None no fim do arquivo)"""
+        feed.seek(position)
+        if position:
+            feed.readline()
+        line = feed.readline()
+        return json.loads(line)['seq'] if line.strip() else None
+
+    def read(self, cursor=0, limit=1000):
+        """Até limit eventos com seq > cursor e o próximo cursor"""
+        if not os.path.exists(self.path):
+            return [], cursor
+        with open(self.path, 'rb') as feed:
+            feed.seek(0, os.SEEK_END)
+            low, high = 0, feed.tell()
+            # Maior posição cuja linha seguinte ainda tem seq <= cursor
+            while high - low > 4096:
+                middle = (low + high) // 2
+                seq = self._seq_at(feed, middle)
+                if seq is not None and seq <= cursor:
+                    low = middle
+                else:
+                    high = middle
+            feed.seek(low)
+            if low:
+                feed.readline()
+            events = []
+            for line in feed:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event['seq'] <= cursor:
+                    continue
+                events.append(event)
+                if len(events) >= limit:
+                    break
+        return events, events[-1]['seq'] if events else cursor
+
+
+class ChangeBuffer:
+    """Alterações recentes do cadastro numeradas por uma sequência crescente
+
+    Cada gravação feita pelo DataHandler acrescenta suas alterações (inclusão,
+    atualização ou exclusão de um funcionário, com o registro já no formato
+    lido do armazenamento). Quem guardou o número da última alteração vista
+    pede só as seguintes; se elas já saíram do buffer, se houve uma gravação
+    completa ou se os dados mudaram por fora, a resposta é None e o chamador
+    recarrega tudo.
+    """
+
+    def __init__(self, feed=None, max_changes=10000):
+        self.feed = feed
+        self.entries = deque(maxlen=max_changes)
+        self.sequence = feed.last_sequence() if feed is not None else 0
+        self.version = None
+        self._lock = threading.Lock()
+
+    def record(self, changes, version, seqs=None):
+        """Acrescenta alterações (op, id, registro) e a versão dos dados resultante
+
+        Com um feed persistido, as alterações são gravadas nele antes e a
+        numeração segue a do feed; seqs informa os números de alterações que
+        já foram gravadas no feed (na transação dos dados, no SQL). Se o feed
+        pulou números (outro handler gravou nele), as alterações guardadas
+        são descartadas: quem está antes do salto recarrega tudo. Alterações
+        que chegam fora de ordem também descartam o buffer até a próxima
+        gravação.
+        """
+        with self._lock:
+            changes = list(changes)
+            if seqs is None:
+                if self.feed is not None and changes:
+                    seqs = self.feed.append(changes)
+                else:
+                    seqs = range(self.sequence + 1, self.sequence + 1 + len(changes))
+            seqs = list(seqs)
+            if seqs and seqs[0] <= self.sequence:
+                self.entries.clear()
+                self.version = None
+                return self.sequence
+            if seqs and seqs[0] != self.sequence + 1:
+                self.entries.clear()
+            for seq, (op, employee_id, row) in zip(seqs, changes):
+                self.entries.append(Change(seq, op, employee_id, row))
+                self.sequence = seq
+            self.version = version
+            return self.sequence
+
+    def reset(self, version, seqs=None):
+        """Marca uma gravação completa do cadastro"""
+        return self.record([(RESET, None, None)], version, seqs)
+
+    def since(self, sequence, version):
+        """(sequência atual, alterações após sequence) ou None se não der para aplicar só o delta"""
+        with self._lock:
+            if sequence is None or self.version is None or version != self.version:
+                return None
+            if sequence == self.sequence:
+                return self.sequence, []
+            if sequence > self.sequence or not self.entries or self.entries[0].seq > sequence + 1:
+                return None
+            changes = [change for change in self.entries if change.seq > sequence]
+            if any(change.op == RESET for change in changes):
+                return None
+            return self.sequence, changes
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Dia usado para datas de admissão ausentes ou inválidas
+MISSING_DAY = np.iinfo(np.int64).min
+
+
+def salary_array(values):
+    """Salários como float64 (inválidos viram NaN)"""
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def day_array(values):
+    """Datas como dias desde 1970-01-01 em int64 (inválidas viram MISSING_DAY)"""
+    values = pd.Series(values)
+    # ISO (formato gravado pelo sistema) primeiro; demais formatos só nas que falharem
+    dates = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    if dates.isna().any():
+        dates = dates.fillna(pd.to_datetime(values.where(dates.isna()), errors='coerce', format='mixed'))
+    days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    days[dates.isna().to_numpy()] = MISSING_DAY
+    return days
+
+
+def to_day(moment):
+    return int(np.datetime64(pd.Timestamp(moment).normalize(), 'D').astype(np.int64))
+
+
+class NumericColumns:
+    """Colunas salario e data_admissao (em dias) como arrays NumPy
+
+    Os arrays podem ser mapeados do disco (np.load com mmap_mode='r'): só as
+    páginas lidas ocupam memória e não há custo de parse do CSV.
+    """
+
+    def __init__(self, salario, admissao):
+        self.salario = salario
+        self.admissao = admissao
+
+    @classmethod
+    def from_frame(cls, df):
+        if df.empty:
+            return cls(np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64))
+        return cls(salary_array(df['salario']), day_array(df['data_admissao']))
+
+    def __len__(self):
+        return len(self.salario)
+
+    def total_payroll(self):
+        return float(np.nansum(self.salario))
+
+    def mean_salary(self):
+        return float(np.nanmean(self.salario)) if len(self) else 0.0
+
+    def hired_since(self, moment):
+        """Quantidade de admissões a partir da data informada"""
+        return int(np.count_nonzero(self.admissao >= to_day(moment)))
+
+    def period(self, start_date=None, end_date=None):
+        """Colunas dos admitidos no período (datas inclusivas)"""
+        mask = self.admissao != MISSING_DAY
+        if start_date is not None:
+            mask &= self.admissao >= to_day(start_date)
+        if end_date is not None:
+            mask &= self.admissao <= to_day(end_date)
+        return NumericColumns(self.salario[mask], self.admissao[mask])
+
+
+class ColumnStore:
+    """Arquivos .npy com as colunas numéricas, ao lado do arquivo de dados
+
+    Cada gravação do cadastro regrava as colunas junto com a marca (mtime,
+    tamanho) do CSV. Na leitura, se a marca não confere (arquivo alterado por
+    fora do sistema ou restaurado), as colunas são refeitas lendo só essas
+    duas colunas do CSV.
+    """
+
+    def __init__(self, directory, prefix="funcionarios"):
+        self.directory = directory
+        self.salary_file = os.path.join(directory, f"{prefix}_salario.npy")
+        self.days_file = os.path.join(directory, f"{prefix}_admissao.npy")
+        self.meta_file = os.path.join(directory, f"{prefix}_colunas.json")
+
+    def _replace(self, path, array):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory or '.', suffix='.npy')
+        with os.fdopen(fd, 'wb') as output:
+            np.save(output, array)
+        os.replace(temp_path, path)
+
+    def write(self, columns, stamp):
+        """Grava as colunas e a marca do arquivo de dados correspondente"""
+        self._replace(self.salary_file, np.ascontiguousarray(columns.salario, dtype=np.float64))
+        self._replace(self.days_file, np.ascontiguousarray(columns.admissao, dtype=np.int64))
+        fd, temp_path = tempfile.mkstemp(dir=self.directory or '.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as meta:
+            json.dump({'stamp': list(stamp), 'rows': len(columns)}, meta)
+        os.replace(temp_path, self.meta_file)
+
+    def read(self, stamp):
+        """Colunas mapeadas em memória, ou None se estiverem desatualizadas"""
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as meta:
+                info = json.load(meta)
+            if info['stamp'] != list(stamp):
+                return None
+            if info['rows'] == 0:
+                # Arquivos vazios não podem ser mapeados
+                return NumericColumns.from_frame(pd.DataFrame())
+            return NumericColumns(
+                np.load(self.salary_file, mmap_mode='r'),
+                np.load(self.days_file, mmap_mode='r'),
+            )
+        except (OSError, ValueError, KeyError):
+            return None
@@ -0,0 +1,87 @@
+import pandas as pd
+
+# Dimensões do cubo e medidas de cada célula
+DIMENSIONS = ['departamento', 'cargo', 'status', 'mes']
+MEASURES = ['Funcionários', 'Folha', 'Mínimo', 'Máximo']
+
+# Mês usado para datas de admissão ausentes ou inválidas
+NO_MONTH = 'sem data'
+
+# Como cada medida é reagregada ao subir de nível
+_ROLLUP = {'Funcionários': 'sum', 'Folha': 'sum', 'Mínimo': 'min', 'Máximo': 'max'}
+
+
+def cube_cells(df):
+    """Células do cubo a partir do cadastro (uma linha por combinação existente)"""
+    if df.empty:
+        return pd.DataFrame(columns=DIMENSIONS + MEASURES)
+    months = pd.to_datetime(df['data_admissao'], errors='coerce').dt.strftime('%Y-%m').fillna(NO_MONTH)
+    frame = pd.DataFrame({
+        'departamento': df['departamento'].astype(str).to_numpy(),
+        'cargo': df['cargo'].fillna('').astype(str).to_numpy(),
+        'status': df['status'].fillna('').astype(str).to_numpy(),
+        'mes': months.to_numpy(),
+        'salario': pd.to_numeric(df['salario'], errors='coerce').to_numpy(),
+    })
+    cells = frame.groupby(DIMENSIONS, sort=True)['salario'].agg(['size', 'sum', 'min', 'max']).reset_index()
+    cells.columns = DIMENSIONS + MEASURES
+    return cells
+
+
+class SalaryCube:
+    """Cubo agregado departamento × cargo × status × mês de admissão
+
+    Cada célula guarda quantidade, folha, menor e maior salário. Cortes e
+    tabelas dinâmicas somam as células (o mínimo e o máximo são reagregados
+    com min/max), sem voltar às linhas do cadastro.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(cube_cells(df))
+
+    def members(self, dimension):
+        """Valores existentes de uma dimensão"""
+        return sorted(self.cells[dimension].unique())
+
+    def slice(self, start_month=None, end_month=None, **filters):
+        """Sub-cubo filtrado por dimensões (valor ou lista) e faixa de meses AAAA-MM"""
+        mask = pd.Series(True, index=self.cells.index)
+        for dimension, value in filters.items():
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"dimensão desconhecida: {dimension}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self.cells[dimension].isin(values)
+        if start_month is not None or end_month is not None:
+            dated = self.cells['mes'] != NO_MONTH
+            if start_month is not None:
+                dated &= self.cells['mes'] >= start_month
+            if end_month is not None:
+                dated &= self.cells['mes'] <= end_month
+            mask &= dated
+        return SalaryCube(self.cells[mask])
+
+    def rollup(self, by=()):
+        """Agrega as células pelas dimensões informadas (vazio = total geral)"""
+        by = list(by)
+        for dimension in by:
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"dimensão desconhecida: {dimension}")
+        if not by:
+            totals = self.cells[MEASURES].agg(_ROLLUP)
+            result = pd.DataFrame([totals], index=['Total'])
+        else:
+            result = self.cells.groupby(by, sort=True)[MEASURES].agg(_ROLLUP)
+        result['Funcionários'] = result['Funcionários'].astype(int)
+        result['Salário Médio'] = (result['Folha'] / result['Funcionários'].where(result['Funcionários'] > 0)).round(2)
+        return result.round(2)
+
+    def pivot(self, rows, columns, measure='Funcionários'):
+        """Tabela dinâmica rows × columns de uma medida"""
+        if measure not in MEASURES + ['Salário Médio']:
+            raise ValueError(f"medida desconhecida: {measure}")
+        table = self.rollup([rows, columns])[measure].unstack(columns)
+        return table.fillna(0) if measure in ('Funcionários', 'Folha') else table
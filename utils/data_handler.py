@@ -2,22 +2,132 @@ import pandas as pd
 import os
 from datetime import datetime
 import io
+import tempfile
+import json
+import numpy as np
+from utils.backup_store import BackupStore
+from utils.column_store import ColumnStore, NumericColumns
+from utils.quantile_sketch import DepartmentSketches, DEFAULT_ACCURACY
+from utils.cube import cube_cells
+from utils.employee_index import EmployeeIndex, SEARCH_COLUMNS
+from utils.changes import ChangeBuffer, ChangeFeed, INSERT, UPDATE, DELETE, to_json_lines
+from utils.file_lock import file_lock
+
+# Colunas do cadastro de funcionários (id é o identificador estável de cada um)
+COLUMNS = ['id', 'nome', 'email', 'telefone', 'departamento', 'cargo', 
+           'salario', 'data_admissao', 'status', 'observacoes', 'data_desligamento']
+
+# Colunas de texto que podem vir vazias (evita que virem float ao ler o CSV)
+TEXT_COLUMNS = {'telefone': str, 'observacoes': str, 'data_desligamento': str}
+
+# Colunas do histórico de mudanças de status
+HISTORY_COLUMNS = ['email', 'data', 'status_anterior', 'status_novo']
+
+
+def compute_totals(df):
+    """Totais do cadastro: funcionários, folha e funcionários por departamento"""
+    if df.empty:
+        return {'total_employees': 0, 'total_salary': 0.0, 'department_counts': {}}
+    counts = df['departamento'].astype(str).value_counts()
+    return {
+        'total_employees': int(len(df)),
+        'total_salary': float(pd.to_numeric(df['salario'], errors='coerce').fillna(0).sum()),
+        'department_counts': {dept: int(count) for dept, count in counts.items()},
+    }
+
+
+def merge_totals(first, second):
+    """Soma os totais de duas partes do cadastro"""
+    counts = dict(first['department_counts'])
+    for dept, count in second['department_counts'].items():
+        counts[dept] = counts.get(dept, 0) + count
+    return {
+        'total_employees': first['total_employees'] + second['total_employees'],
+        'total_salary': first['total_salary'] + second['total_salary'],
+        'department_counts': counts,
+    }
+
+
+def assign_ids(df, highest=0):
+    """Garante a coluna id: arquivos antigos recebem 1..n na ordem das linhas
+    e linhas sem id (editadas por fora) recebem os próximos números livres,
+    acima de highest (maior ID já usado)"""
+    if 'id' not in df.columns:
+        df.insert(0, 'id', np.arange(1, len(df) + 1, dtype='int64'))
+        return df
+    ids = pd.to_numeric(df['id'], errors='coerce')
+    missing = ids.isna()
+    if missing.any():
+        start = max(int(ids.max()) if ids.notna().any() else 0, highest) + 1
+        ids = ids.copy()
+        ids[missing] = np.arange(start, start + int(missing.sum()))
+    return df.assign(id=ids.astype('int64'))
+
+
+def salary_pairs(df):
+    """Pares (departamento, salário) das linhas de um DataFrame do cadastro"""
+    if df is None or df.empty:
+        return []
+    return list(zip(df['departamento'].astype(str), pd.to_numeric(df['salario'], errors='coerce')))
+
+
+def _repeated_keys(keys, seen):
+    """Marca as chaves repetidas no bloco ou já presentes em seen (ordenado)
+
+    Retorna (máscara das repetidas, seen atualizado com as chaves do bloco).
+    """
+    duplicated = pd.Series(keys).duplicated().to_numpy(copy=True)
+    if len(seen) > 0:
+        pos = np.searchsorted(seen, keys).clip(max=len(seen) - 1)
+        duplicated |= seen[pos] == keys
+    return duplicated, np.sort(np.concatenate([seen, keys]))
+
+
+def highest_id(df):
+    """Maior ID do DataFrame (0 se vazio)"""
+    if df.empty or 'id' not in df.columns:
+        return 0
+    ids = pd.to_numeric(df['id'], errors='coerce')
+    return int(ids.max()) if ids.notna().any() else 0
+
+
+def next_id(df, highest=0):
+    """Próximo ID livre do cadastro, acima de highest (maior ID já usado)
+
+    Sem highest, o ID de um funcionário excluído com o maior número voltaria
+    a ser dado ao próximo cadastrado.
+    """
+    return max(highest_id(df), highest) + 1
 
 class DataHandler:
-    def __init__(self):
-        self.data_file = "data/funcionarios.csv"
+    # Agregações são feitas em pandas sobre o DataFrame já carregado
+    pushdown_aggregations = False
+    
+    # Erro relativo máximo dos percentis salariais (sketches por departamento)
+    sketch_accuracy = float(os.environ.get("HEADCOUNT_SKETCH_ACCURACY", DEFAULT_ACCURACY))
+    
+    def __init__(self, data_file="data/funcionarios.csv"):
+        self.data_file = data_file
         self.ensure_data_directory()
         self.ensure_data_file()
+        self.history_file = os.path.join(os.path.dirname(self.data_file), "historico_status.csv")
+        self.backup_store = BackupStore(os.path.join(os.path.dirname(self.data_file), "backups"))
+        self.totals_file = os.path.join(os.path.dirname(self.data_file), "totais_funcionarios.json")
+        self._totals = None
+        self.column_store = ColumnStore(os.path.dirname(self.data_file))
+        self.sketches_file = os.path.join(os.path.dirname(self.data_file), "quantis_salariais.json")
+        self._employee_index = None
+        self.changes_file = os.path.join(os.path.dirname(self.data_file), "alteracoes.jsonl")
+        self.changes = ChangeBuffer(ChangeFeed(self.changes_file))
     
     def ensure_data_directory(self):
         """Garante que o diretório data existe"""
-        os.makedirs("data", exist_ok=True)
+        os.makedirs(os.path.dirname(self.data_file) or ".", exist_ok=True)
     
     def ensure_data_file(self):
         """Garante que o arquivo CSV existe com as colunas corretas"""
         if not os.path.exists(self.data_file):
-            columns = ['nome', 'email', 'telefone', 'departamento', 'cargo', 
-                      'salario', 'data_admissao', 'status', 'observacoes']
+            columns = COLUMNS
             df = pd.DataFrame(columns=columns)
             df.to_csv(self.data_file, index=False)
     
@@ -25,84 +135,409 @@ class DataHandler:
         """Carrega os dados do arquivo CSV"""
         try:
             if os.path.exists(self.data_file):
-                df = pd.read_csv(self.data_file)
+                df = pd.read_csv(self.data_file, dtype=TEXT_COLUMNS)
                 if df.empty:
-                    columns = ['nome', 'email', 'telefone', 'departamento', 'cargo', 
-                              'salario', 'data_admissao', 'status', 'observacoes']
+                    columns = COLUMNS
                     return pd.DataFrame(columns=columns)
-                return df
+                return assign_ids(df, self._highest_id())
             else:
-                columns = ['nome', 'email', 'telefone', 'departamento', 'cargo', 
-                          'salario', 'data_admissao', 'status', 'observacoes']
+                columns = COLUMNS
                 return pd.DataFrame(columns=columns)
         except Exception as e:
             print(f"Erro ao carregar dados: {e}")
-            columns = ['nome', 'email', 'telefone', 'departamento', 'cargo', 
-                      'salario', 'data_admissao', 'status', 'observacoes']
+            columns = COLUMNS
             return pd.DataFrame(columns=columns)
     
+    def data_version(self):
+        """Identificador barato da versão dos dados (muda a cada gravação)"""
+        try:
+            stat = os.stat(self.data_file)
+            history_stamp = os.stat(self.history_file).st_mtime_ns if os.path.exists(self.history_file) else 0
+            return (stat.st_mtime_ns, stat.st_size, history_stamp)
+        except OSError:
+            return None
+    
     def save_data(self, df):
-        """Salva os dados no arquivo CSV"""
+        """Salva os dados no arquivo CSV (substitui o cadastro inteiro)"""
+        with self._write_lock():
+            if not self._store(df):
+                return False
+            self.changes.reset(self.data_version())
+            return True
+    
+    def _write_lock(self):
+        """Trava de gravação do arquivo de dados (<csv>.lock)
+        
+        Toda gravação (carrega → altera → grava o CSV e os auxiliares →
+        registra no feed) acontece com a trava: importações em segundo plano
+        e edições pela interface, em qualquer thread ou processo, não
+        sobrescrevem as alterações umas das outras.
+        """
+        return file_lock(self.data_file)
+    
+    def _store(self, df, removed=None, added=None):
+        """Grava o CSV e os arquivos auxiliares (totais, colunas, percentis)
+        
+        Com as linhas que saíram (removed) e entraram (added), os percentis
+        são atualizados só nos departamentos afetados em vez de refeitos.
+        """
         try:
+            sketches = None
+            if (removed is not None or added is not None) and os.path.exists(self.data_file):
+                sketches = self._read_sketches()
             df.to_csv(self.data_file, index=False)
+            self._write_totals(compute_totals(df), highest_id(df))
+            self.column_store.write(NumericColumns.from_frame(df), self._data_stamp())
+            if sketches is None:
+                sketches = DepartmentSketches.from_frame(df, self.sketch_accuracy)
+            else:
+                departments = df['departamento'].astype(str)
+                sketches.update(
+                    salary_pairs(removed), salary_pairs(added),
+                    lambda dept: pd.to_numeric(df.loc[departments == dept, 'salario'], errors='coerce')
+                )
+            self._write_sketches(sketches)
             return True
         except Exception as e:
             print(f"Erro ao salvar dados: {e}")
             return False
     
+    def change_sequence(self):
+        """Número da última alteração gravada por este processo (sempre crescente)"""
+        return self.changes.sequence
+    
+    def changes_since(self, sequence):
+        """Alterações após sequence como (sequência atual, lista de Change)
+        
+        Retorna None quando só o delta não basta (dados alterados por fora,
+        gravação completa ou alterações que já saíram do buffer).
+        """
+        return self.changes.since(sequence, self.data_version())
+    
+    def read_changes(self, cursor=0, limit=1000):
+        """Eventos do feed de alterações após o cursor e o próximo cursor
+        
+        Retorna ([], cursor) em caso de erro.
+        """
+        try:
+            return self.changes.feed.read(cursor, limit)
+        except Exception as e:
+            print(f"Erro ao ler alterações: {e}")
+            return [], cursor
+    
+    def export_changes(self, cursor=0, limit=None):
+        """Alterações após o cursor em JSON Lines (None em caso de erro)"""
+        try:
+            events = []
+            while limit is None or len(events) < limit:
+                batch, next_cursor = self.changes.feed.read(cursor, 1000 if limit is None else min(1000, limit - len(events)))
+                if not batch:
+                    break
+                events.extend(batch)
+                cursor = next_cursor
+            return to_json_lines(events)
+        except Exception as e:
+            print(f"Erro ao exportar alterações: {e}")
+            return None
+    
+    def _as_loaded(self, rows):
+        """Registros no mesmo formato de load_data (ida e volta pelo CSV)"""
+        rows = pd.read_csv(io.StringIO(rows.to_csv(index=False)), dtype=TEXT_COLUMNS)
+        return rows.to_dict('records')
+    
+    def _record_rows(self, op, rows):
+        """Registra inclusões ou atualizações das linhas gravadas"""
+        self._record_changes([(op, int(row['id']), row) for row in self._as_loaded(rows)])
+    
+    def _record_changes(self, changes):
+        """Registra no feed alterações já gravadas no CSV
+        
+        Se o feed recusar os eventos, tenta registrar um reset, para que os
+        consumidores recarreguem tudo em vez de perder a gravação.
+        """
+        try:
+            self.changes.record(changes, self.data_version())
+        except Exception as e:
+            print(f"Erro ao registrar alterações: {e}")
+            self.changes.reset(self.data_version())
+    
+    def _data_stamp(self):
+        stat = os.stat(self.data_file)
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def _highest_id(self):
+        """Maior ID já usado, guardado nos totais (não diminui quando o maior é excluído)"""
+        if not os.path.exists(self.totals_file):
+            return 0
+        with open(self.totals_file, 'r', encoding='utf-8') as totals_file:
+            return int(json.load(totals_file).get('max_id', 0))
+    
+    def _write_totals(self, totals, max_id=0):
+        """Grava os totais junto com a marca (mtime, tamanho) do arquivo de dados
+        
+        max_id é o maior ID dos dados gravados; o arquivo guarda o maior já
+        usado, que nunca volta.
+        """
+        stamp = self._data_stamp()
+        last_write = datetime.fromtimestamp(stamp[0] / 1e9).isoformat(timespec='seconds')
+        totals = dict(totals, last_write=last_write, stamp=stamp, max_id=max(self._highest_id(), max_id))
+        self._write_sidecar(self.totals_file, totals)
+        self._totals = totals
+    
+    def _write_sidecar(self, path, data):
+        """Grava um JSON auxiliar ao lado do arquivo de dados de forma atômica"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as sidecar:
+            json.dump(data, sidecar, ensure_ascii=False)
+        os.replace(temp_path, path)
+    
+    def _write_sketches(self, sketches):
+        self._write_sidecar(self.sketches_file, dict(sketches.to_dict(), stamp=self._data_stamp()))
+    
+    def _read_sketches(self):
+        """Sketches gravados, se ainda valem para o arquivo de dados e a precisão atual"""
+        if not os.path.exists(self.sketches_file):
+            return None
+        with open(self.sketches_file, 'r', encoding='utf-8') as sidecar:
+            data = json.load(sidecar)
+        if data.get('stamp') == self._data_stamp() and data.get('accuracy') == self.sketch_accuracy:
+            return DepartmentSketches.from_dict(data)
+        return None
+    
+    def load_salary_sketches(self):
+        """Sketches de percentis salariais por departamento, mantidos a cada gravação
+        
+        Refeitos a partir das colunas departamento e salario se o arquivo de
+        dados mudou por fora do sistema ou se a precisão configurada mudou.
+        """
+        try:
+            sketches = self._read_sketches()
+            if sketches is not None:
+                return sketches
+            df = pd.read_csv(self.data_file, usecols=['departamento', 'salario'])
+            sketches = DepartmentSketches.from_frame(df, self.sketch_accuracy)
+            self._write_sketches(sketches)
+            return sketches
+        except Exception as e:
+            print(f"Erro ao carregar percentis salariais: {e}")
+            return DepartmentSketches.from_frame(self.load_data(), self.sketch_accuracy)
+    
+    def get_totals(self):
+        """Totais mantidos a cada gravação, sem ler o cadastro
+        
+        Retorna total de funcionários, folha, número de departamentos e a data
+        da última gravação. Se o arquivo de dados foi alterado por fora do
+        sistema (marca diferente), os totais são recalculados uma vez.
+        """
+        try:
+            stamp = self._data_stamp()
+            if self._totals is None and os.path.exists(self.totals_file):
+                with open(self.totals_file, 'r', encoding='utf-8') as totals_file:
+                    self._totals = json.load(totals_file)
+            if self._totals is None or self._totals.get('stamp') != stamp:
+                df = self.load_data()
+                self._write_totals(compute_totals(df), highest_id(df))
+            totals = self._totals
+            return {
+                'total_employees': totals['total_employees'],
+                'total_salary': totals['total_salary'],
+                'departments': len(totals['department_counts']),
+                'last_write': totals['last_write'],
+            }
+        except Exception as e:
+            print(f"Erro ao ler totais: {e}")
+            return {'total_employees': 0, 'total_salary': 0.0, 'departments': 0, 'last_write': None}
+    
+    def load_numeric_columns(self):
+        """Salário e admissão (em dias) mapeados do disco, sem ler o CSV inteiro
+        
+        Se as colunas estiverem desatualizadas, são refeitas a partir só das
+        colunas salario e data_admissao do CSV.
+        """
+        try:
+            stamp = self._data_stamp()
+            columns = self.column_store.read(stamp)
+            if columns is None:
+                df = pd.read_csv(self.data_file, usecols=['salario', 'data_admissao'])
+                columns = NumericColumns.from_frame(df)
+                self.column_store.write(columns, stamp)
+            return columns
+        except Exception as e:
+            print(f"Erro ao carregar colunas numéricas: {e}")
+            return NumericColumns.from_frame(self.load_data())
+    
     def add_employee(self, employee_data):
         """Adiciona um novo funcionário"""
         try:
-            df = self.load_data()
+            with self._write_lock():
+                df = self.load_data()
             
-            # Verificar se o email já existe
-            if not df.empty and employee_data['email'] in df['email'].values:
-                return False
+                # Verificar se o email já existe
+                if not df.empty and employee_data['email'] in df['email'].values:
+                    return False
             
-            # Adicionar novo funcionário
-            new_employee = pd.DataFrame([employee_data])
-            df = pd.concat([df, new_employee], ignore_index=True)
+                # Adicionar novo funcionário com o próximo ID livre
+                new_employee = pd.DataFrame([dict(employee_data, id=next_id(df, self._highest_id()))])
+                df = pd.concat([df, new_employee], ignore_index=True)
             
-            return self.save_data(df)
+                if not self._store(df, added=df.tail(1)):
+                    return False
+                self._record_rows(INSERT, df.tail(1))
+                return True
         except Exception as e:
             print(f"Erro ao adicionar funcionário: {e}")
             return False
-    
+
+    def add_employees(self, employees):
+        """Adiciona vários funcionários em uma única gravação
+
+        Retorna (quantidade adicionada, emails recusados por já existirem).
+        Em caso de erro retorna (0, None).
+        """
+        try:
+            with self._write_lock():
+                df = self.load_data()
+                existing = set(df['email'].astype(str)) if not df.empty else set()
+
+                accepted, rejected = [], []
+                for employee in employees:
+                    if employee['email'] in existing:
+                        rejected.append(employee['email'])
+                        continue
+                    existing.add(employee['email'])
+                    accepted.append(employee)
+
+                if not accepted:
+                    return 0, rejected
+
+                first_id = next_id(df, self._highest_id())
+                accepted = [dict(employee, id=first_id + offset) for offset, employee in enumerate(accepted)]
+                df = pd.concat([df, pd.DataFrame(accepted)], ignore_index=True)
+                if not self._store(df, added=df.tail(len(accepted))):
+                    return 0, None
+                self._record_rows(INSERT, df.tail(len(accepted)))
+                return len(accepted), rejected
+        except Exception as e:
+            print(f"Erro ao adicionar funcionários: {e}")
+            return 0, None
+
     def update_employee(self, email, updated_data):
         """Atualiza um funcionário existente"""
         try:
-            df = self.load_data()
+            with self._write_lock():
+                df = self.load_data()
             
-            if df.empty:
-                return False
+                if df.empty:
+                    return False
             
-            # Encontrar o índice do funcionário
-            employee_index = df[df['email'] == email].index
+                # Encontrar o índice do funcionário
+                employee_index = df[df['email'] == email].index
             
-            if len(employee_index) == 0:
-                return False
+                if len(employee_index) == 0:
+                    return False
+            
+                # Registrar mudança de status (histórico para headcount por data)
+                row = employee_index[0]
+                old_status = df.loc[row, 'status']
+                new_status = updated_data.get('status', old_status)
+                updated_data = dict(updated_data)
+                # O ID não muda
+                updated_data.pop('id', None)
+            
+                if new_status != old_status:
+                    today = datetime.now().strftime('%Y-%m-%d')
+                    exit_date = updated_data.get('data_desligamento')
+                    if new_status == 'Inativo' and (exit_date is None or pd.isna(exit_date) or exit_date == ''):
+                        updated_data['data_desligamento'] = today
+                    elif old_status == 'Inativo':
+                        updated_data['data_desligamento'] = ''
+            
+                # Atualizar os dados (salário sempre float: a coluna pode ter sido lida como inteiro)
+                previous = df.loc[[row]]
+                if 'salario' in updated_data:
+                    df['salario'] = pd.to_numeric(df['salario'], errors='coerce').astype(float)
+                for key, value in updated_data.items():
+                    df.loc[row, key] = value
             
-            # Atualizar os dados
-            for key, value in updated_data.items():
-                df.loc[employee_index[0], key] = value
+                if not self._store(df, removed=previous, added=df.loc[[row]]):
+                    return False
             
-            return self.save_data(df)
+                new_email = updated_data.get('email', email)
+                if new_email != email:
+                    self._rename_history(email, new_email)
+                if new_status != old_status:
+                    self._record_status_change(new_email, old_status, new_status, today)
+                self._record_rows(UPDATE, df.loc[[row]])
+                return True
         except Exception as e:
             print(f"Erro ao atualizar funcionário: {e}")
             return False
     
+    def employee_index(self):
+        """Índice por ID e nome/email, refeito só quando os dados mudam"""
+        version = self.data_version()
+        if self._employee_index is None or version is None or self._employee_index[0] != version:
+            self._employee_index = (version, EmployeeIndex.from_frame(self.load_data()))
+        return self._employee_index[1]
+    
+    def get_employee(self, employee_id, index=None):
+        """Funcionário pelo ID (dicionário) ou None, sem percorrer o cadastro"""
+        try:
+            index = self.employee_index() if index is None else index
+            return index.get(employee_id)
+        except Exception as e:
+            print(f"Erro ao buscar funcionário: {e}")
+            return None
+    
+    def search_employees(self, query, limit=20, index=None):
+        """Até limit funcionários cujo nome ou email contém o texto (id, nome, email, ...)"""
+        try:
+            index = self.employee_index() if index is None else index
+            return index.search(query, limit)
+        except Exception as e:
+            print(f"Erro ao buscar funcionários: {e}")
+            return pd.DataFrame(columns=SEARCH_COLUMNS)
+    
+    def _record_status_change(self, email, old_status, new_status, change_date):
+        """Acrescenta uma mudança de status ao histórico"""
+        event = pd.DataFrame([[email, change_date, old_status, new_status]], columns=HISTORY_COLUMNS)
+        event.to_csv(self.history_file, mode='a', index=False, header=not os.path.exists(self.history_file))
+    
+    def _rename_history(self, old_email, new_email):
+        """Mantém o histórico ligado ao funcionário quando o email muda"""
+        history = self.load_status_history()
+        if not history.empty and (history['email'] == old_email).any():
+            history.loc[history['email'] == old_email, 'email'] = new_email
+            history.to_csv(self.history_file, index=False)
+    
+    def load_status_history(self):
+        """Carrega o histórico de mudanças de status"""
+        try:
+            if os.path.exists(self.history_file):
+                return pd.read_csv(self.history_file, dtype=str)
+        except Exception as e:
+            print(f"Erro ao carregar histórico: {e}")
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    
     def delete_employee(self, email):
         """Exclui um funcionário"""
         try:
-            df = self.load_data()
+            with self._write_lock():
+                df = self.load_data()
             
-            if df.empty:
-                return False
+                if df.empty:
+                    return False
             
-            # Remover o funcionário
-            df = df[df['email'] != email]
+                # Remover o funcionário
+                removed = df['email'] == email
+                deleted = df[removed]
+                deleted_ids = deleted['id'].tolist()
+                df = df[~removed]
             
-            return self.save_data(df)
+                if not self._store(df, removed=deleted):
+                    return False
+                self._record_changes([(DELETE, int(employee_id), None) for employee_id in deleted_ids])
+                return True
         except Exception as e:
             print(f"Erro ao excluir funcionário: {e}")
             return False
@@ -124,7 +559,7 @@ class DataHandler:
                     for idx, col in enumerate(df.columns):
                         if not df.empty:
                             max_length = max(
-                                df[col].astype(str).apply(len).max(),
+                                df[col].astype(str).str.len().fillna(0).max(),
                                 len(col)
                             )
                             worksheet.column_dimensions[chr(65 + idx)].width = min(max_length + 2, 50)
@@ -174,26 +609,195 @@ class DataHandler:
             print(f"Erro ao criar backup: {e}")
             return None
     
-    def restore_backup(self, uploaded_file):
-        """Restaura dados de um arquivo de backup"""
+    def create_incremental_backup(self):
+        """Cria um backup incremental comprimido no armazenamento local"""
         try:
-            # Ler o arquivo carregado
-            df = pd.read_csv(uploaded_file)
-            
-            # Verificar se possui as colunas necessárias
-            required_columns = [
-                'nome', 'email', 'telefone', 'departamento', 'cargo', 
-                'salario', 'data_admissao', 'status', 'observacoes'
-            ]
+            return self.backup_store.create(self.data_file)
+        except Exception as e:
+            print(f"Erro ao criar backup incremental: {e}")
+            return None
+    
+    def list_backups(self):
+        """Lista os backups armazenados, do mais recente para o mais antigo"""
+        try:
+            return self.backup_store.list_backups()
+        except Exception as e:
+            print(f"Erro ao listar backups: {e}")
+            return []
+    
+    def get_backup(self, backup_id):
+        """Retorna o CSV completo de um backup armazenado"""
+        try:
+            return self.backup_store.materialize(backup_id)
+        except Exception as e:
+            print(f"Erro ao ler backup: {e}")
+            return None
+    
+    def prune_backups(self, keep_full=5, max_age_days=None):
+        """Remove backups antigos conforme a política de retenção"""
+        try:
+            return self.backup_store.prune(keep_full=keep_full, max_age_days=max_age_days)
+        except Exception as e:
+            print(f"Erro ao limpar backups: {e}")
+            return None
+    
+    def restore_backup(self, uploaded_file, chunksize=50000):
+        """Restaura dados de um arquivo de backup
+
+        O arquivo é lido em blocos, validado bloco a bloco (tipos e emails
+        únicos) e gravado em um arquivo temporário no mesmo diretório, que só
+        substitui o arquivo de dados ao final, de forma atômica. Em caso de
+        erro o arquivo de dados original permanece intacto.
+        """
+        self.last_restore_error = None
+        temp_path = None
+        try:
+            directory = os.path.dirname(self.data_file) or '.'
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.restore_', suffix='.csv')
             
-            if not all(col in df.columns for col in required_columns):
-                return False
+            totals = compute_totals(pd.DataFrame(columns=COLUMNS))
+            max_id = 0
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as output:
+                header = True
+                for chunk in self._read_restore_chunks(uploaded_file, chunksize):
+                    chunk.to_csv(output, index=False, header=header)
+                    totals = merge_totals(totals, compute_totals(chunk))
+                    max_id = max(max_id, highest_id(chunk))
+                    header = False
             
-            # Salvar os dados restaurados
-            return self.save_data(df)
+            # Troca atômica do arquivo de dados
+            with self._write_lock():
+                os.replace(temp_path, self.data_file)
+                temp_path = None
+                self._write_totals(totals, max_id)
+                self.changes.reset(self.data_version())
+            return True
         except Exception as e:
+            self.last_restore_error = str(e)
             print(f"Erro ao restaurar backup: {e}")
             return False
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def _read_restore_chunks(self, uploaded_file, chunksize):
+        """Lê o backup em blocos validados, levantando erro no primeiro problema"""
+        required_columns = [
+            'nome', 'email', 'telefone', 'departamento', 'cargo', 
+            'salario', 'data_admissao', 'status', 'observacoes'
+        ]
+        
+        # IDs e hashes dos emails já vistos (8 bytes por registro cada, ordenados)
+        seen_ids = np.array([], dtype=np.uint64)
+        seen_emails = np.array([], dtype=np.uint64)
+        first_row = 0
+        
+        # Campos lidos como texto para serem gravados sem alteração
+        reader = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False, chunksize=chunksize)
+        
+        for chunk in reader:
+            if first_row == 0:
+                missing = [col for col in required_columns if col not in chunk.columns]
+                if missing:
+                    raise ValueError(f"colunas faltando: {', '.join(missing)}")
+            
+            self._validate_restore_chunk(chunk, first_row)
+            
+            # Backups sem a coluna id recebem IDs na ordem das linhas
+            if 'id' not in chunk.columns:
+                chunk.insert(0, 'id', [str(n) for n in range(first_row + 1, first_row + len(chunk) + 1)])
+            
+            # IDs e emails únicos dentro do bloco e em relação aos anteriores
+            ids = pd.to_numeric(chunk['id']).to_numpy(dtype=np.float64).view(np.uint64)
+            duplicated, seen_ids = _repeated_keys(ids, seen_ids)
+            if duplicated.any():
+                row = first_row + int(np.argmax(duplicated)) + 2
+                raise ValueError(f"linha {row}: id duplicado")
+            
+            emails = chunk['email'].str.strip().str.lower()
+            email_hashes = pd.util.hash_pandas_object(emails, index=False).to_numpy()
+            duplicated, seen_emails = _repeated_keys(email_hashes, seen_emails)
+            if duplicated.any():
+                row = first_row + int(np.argmax(duplicated)) + 2
+                raise ValueError(f"linha {row}: email duplicado")
+            
+            yield chunk
+            first_row += len(chunk)
+        
+        if first_row == 0:
+            raise ValueError("arquivo sem registros")
+    
+    def _validate_restore_chunk(self, chunk, first_row):
+        """Valida tipos de um bloco do backup, levantando erro na primeira falha"""
+        # Datas ISO (formato gravado pelo sistema) primeiro; demais formatos só nas que falharem
+        dates = pd.to_datetime(chunk['data_admissao'], errors='coerce', format='ISO8601')
+        if dates.isna().any():
+            dates = dates.fillna(pd.to_datetime(chunk['data_admissao'].where(dates.isna()), errors='coerce', format='mixed'))
+        
+        checks = {
+            'id': pd.to_numeric(chunk['id'], errors='coerce').isna() if 'id' in chunk.columns else pd.Series(False, index=chunk.index),
+            'nome': chunk['nome'].str.strip() == '',
+            'email': ~chunk['email'].str.contains('@', regex=False),
+            'salario': pd.to_numeric(chunk['salario'], errors='coerce').isna(),
+            'data_admissao': dates.isna(),
+        }
+        
+        for column, invalid in checks.items():
+            if invalid.any():
+                row = first_row + int(np.argmax(invalid.to_numpy())) + 2
+                raise ValueError(f"linha {row}: valor inválido em '{column}'")
+    
+    def department_costs(self, df=None):
+        """Custo total, salário médio e número de funcionários por departamento"""
+        df = self.load_data() if df is None else df
+        if df.empty:
+            return pd.DataFrame(columns=['Custo Total', 'Salário Médio', 'Funcionários'])
+        
+        dept_costs = df.groupby('departamento').agg({
+            'salario': ['sum', 'mean', 'count']
+        }).round(2)
+        dept_costs.columns = ['Custo Total', 'Salário Médio', 'Funcionários']
+        return dept_costs.sort_values('Custo Total', ascending=False)
+    
+    def salary_stats_by_department(self, start_date=None, end_date=None, df=None):
+        """Média, mediana, mínimo e máximo salarial por departamento no período"""
+        df = self.load_data() if df is None else df
+        if not df.empty and (start_date is not None or end_date is not None):
+            dates = pd.to_datetime(df['data_admissao'])
+            mask = pd.Series(True, index=df.index)
+            if start_date is not None:
+                mask &= dates >= pd.Timestamp(start_date)
+            if end_date is not None:
+                mask &= dates < pd.Timestamp(end_date) + pd.Timedelta(days=1)
+            df = df[mask]
+        
+        if df.empty:
+            return pd.DataFrame(columns=['Média', 'Mediana', 'Mínimo', 'Máximo'])
+        
+        salary_stats = df.groupby('departamento')['salario'].agg(['mean', 'median', 'min', 'max']).round(2)
+        salary_stats.columns = ['Média', 'Mediana', 'Mínimo', 'Máximo']
+        return salary_stats
+    
+    def monthly_hires(self, df=None):
+        """Número de contratações por mês (índice no formato AAAA-MM)"""
+        df = self.load_data() if df is None else df
+        if df.empty:
+            return pd.Series(dtype='int64', name='contratacoes')
+        
+        months = pd.to_datetime(df['data_admissao']).dt.strftime('%Y-%m')
+        return months.value_counts().sort_index().rename('contratacoes')
+    
+    def status_by_department(self, df=None):
+        """Quantidade de funcionários por departamento e status"""
+        df = self.load_data() if df is None else df
+        if df.empty:
+            return pd.DataFrame()
+        return df.groupby(['departamento', 'status']).size().unstack(fill_value=0)
+    
+    def cube_cells(self, df=None):
+        """Células do cubo departamento × cargo × status × mês de admissão"""
+        df = self.load_data() if df is None else df
+        return cube_cells(df)
     
     def get_statistics(self):
         """Retorna estatísticas básicas dos dados"""
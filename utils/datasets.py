@@ -0,0 +1,345 @@
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.data_handler import DataHandler
+from utils.date_index import DateIndex
+from utils.headcount import HeadcountIndex
+from utils.cube import SalaryCube
+from utils.employee_index import EmployeeIndex
+from utils.scenarios import PayrollScenarios
+
+DEFAULT_DATASET = "principal"
+DATASETS_DIR = os.path.join("data", "empresas")
+
+# Sufixos das tabelas auxiliares de cada empresa no SQL (<tabela>_historico,
+# <tabela>_alteracoes, <tabela>_estado): nenhuma empresa pode terminar neles
+RESERVED_SUFFIXES = ('historico', 'alteracoes', 'estado')
+
+
+def slugify(name):
+    """Converte o nome da empresa em um identificador seguro para arquivos"""
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+
+def valid_slug(slug):
+    """Se o identificador pode ser usado por uma nova empresa"""
+    if not slug or slug == DEFAULT_DATASET:
+        return False
+    return not any(slug == suffix or slug.endswith(f"_{suffix}") for suffix in RESERVED_SUFFIXES)
+
+
+def dataset_path(name):
+    """Caminho do arquivo de dados de uma empresa"""
+    if name == DEFAULT_DATASET:
+        return os.path.join("data", "funcionarios.csv")
+    return os.path.join(DATASETS_DIR, slugify(name), "funcionarios.csv")
+
+
+def list_datasets():
+    """Lista as empresas cadastradas (a principal sempre primeiro)"""
+    names = [DEFAULT_DATASET]
+    database_url = os.environ.get("DATABASE_URL")
+    if database_url:
+        from sqlalchemy import inspect
+        from utils.sql_handler import get_engine
+        tables = inspect(get_engine(database_url)).get_table_names()
+        return names + sorted(
+            t[len("funcionarios_"):] for t in tables
+            if t.startswith("funcionarios_") and valid_slug(t[len("funcionarios_"):])
+        )
+    if os.path.isdir(DATASETS_DIR):
+        names += sorted(
+            entry for entry in os.listdir(DATASETS_DIR)
+            if os.path.isfile(os.path.join(DATASETS_DIR, entry, "funcionarios.csv"))
+        )
+    return names
+
+
+def apply_changes(df, changes):
+    """Aplica alterações (inclusão, atualização, exclusão) a um DataFrame do cadastro
+
+    Vale a última alteração de cada ID; linhas atualizadas ficam na mesma
+    posição e novas vão para o final. Retorna (novo DataFrame, linhas que
+    saíram, linhas que entraram) ou None se o cadastro tiver IDs repetidos.
+    """
+    final = {}
+    for change in changes:
+        final[change.id] = change.row
+    ids = pd.Index(df['id'])
+    if not ids.is_unique:
+        return None
+
+    rows = pd.DataFrame([row for row in final.values() if row is not None], columns=df.columns)
+    changed = ids.isin(list(final))
+    removed = df[changed]
+    if not len(rows):
+        return df[~changed].reset_index(drop=True), removed, rows
+
+    # Posição final: a original para IDs existentes, depois do fim para os novos
+    positions = ids.get_indexer(rows['id'])
+    new = positions < 0
+    positions[new] = len(df) + np.arange(int(new.sum()))
+    order = np.concatenate([np.flatnonzero(~changed), positions])
+    combined = pd.concat([df[~changed], rows], ignore_index=True)
+    return combined.iloc[np.argsort(order, kind='stable')].reset_index(drop=True), removed, rows
+
+
+def adjust_department_costs(costs, removed, added):
+    """Atualiza custo, média e funcionários por departamento só com as linhas alteradas"""
+    def sums(frame):
+        salaries = pd.to_numeric(frame['salario'], errors='coerce').groupby(frame['departamento'])
+        return salaries.sum(), salaries.count()
+
+    removed_sum, removed_count = sums(removed)
+    added_sum, added_count = sums(added)
+    total = costs['Custo Total'].add(added_sum, fill_value=0).sub(removed_sum, fill_value=0)
+    count = costs['Funcionários'].add(added_count, fill_value=0).sub(removed_count, fill_value=0)
+    keep = count > 0
+    result = pd.DataFrame({
+        'Custo Total': total[keep],
+        'Salário Médio': total[keep] / count[keep],
+        'Funcionários': count[keep].astype(int),
+    }).round(2)
+    result.index.name = costs.index.name
+    return result.sort_values('Custo Total', ascending=False)
+
+
+def default_handler_factory(name):
+    """Cria o DataHandler de uma empresa (CSV ou tabela SQL)"""
+    database_url = os.environ.get("DATABASE_URL")
+    if database_url:
+        from utils.sql_handler import SQLDataHandler
+        table_name = "funcionarios" if name == DEFAULT_DATASET else f"funcionarios_{slugify(name)}"
+        return SQLDataHandler(database_url, table_name=table_name)
+    return DataHandler(dataset_path(name))
+
+
+class DatasetSnapshot:
+    """Dados carregados de uma versão de um conjunto, com índices e análises
+
+    O DataFrame é único por processo e somente leitura por convenção: as
+    páginas trabalham com fatias, projeções ou assign(), nunca alterando df
+    no lugar e sem cópias defensivas.
+    """
+
+    # Limite de análises guardadas por versão (ex.: períodos personalizados)
+    max_analytics = 32
+
+    def __init__(self, version, df, sequence=None):
+        self.version = version
+        self.sequence = sequence
+        self.df = df
+        self.date_index = DateIndex.from_frame(df)
+        self._analytics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def dated(self):
+        """Visão com data_admissao em datetime (demais colunas compartilhadas)"""
+        return self.analytics(
+            'dated',
+            lambda: self.df.assign(data_admissao=pd.to_datetime(self.df['data_admissao'])) if not self.df.empty else self.df
+        )
+
+    def with_changes(self, version, sequence, changes):
+        """Novo snapshot com as alterações aplicadas (None se for preciso recarregar)
+
+        Os custos por departamento já calculados são ajustados só com as
+        linhas que mudaram; as demais análises são refeitas sob demanda.
+        """
+        applied = apply_changes(self.df, changes)
+        if applied is None:
+            return None
+        df, removed, added = applied
+        snapshot = DatasetSnapshot(version, df, sequence)
+        with self._lock:
+            costs = self._analytics.get('department_costs')
+        if costs is not None:
+            snapshot._analytics['department_costs'] = adjust_department_costs(costs, removed, added)
+        return snapshot
+
+    def analytics(self, key, compute):
+        """Retorna uma análise calculada uma única vez por versão dos dados"""
+        with self._lock:
+            if key in self._analytics:
+                self._analytics.move_to_end(key)
+                return self._analytics[key]
+
+        value = compute()
+
+        with self._lock:
+            self._analytics[key] = value
+            while len(self._analytics) > self.max_analytics:
+                self._analytics.popitem(last=False)
+        return value
+
+
+class Dataset:
+    """Um conjunto de dados (empresa) com seu armazenamento e cache"""
+
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Retorna o snapshot atual, atualizado pelas alterações desde a última sequência vista
+
+        Só recarrega tudo na primeira leitura, quando os dados mudaram por
+        fora do DataHandler ou quando as alterações pendentes não estão mais
+        disponíveis.
+        """
+        version = self.handler.data_version()
+        with self._lock:
+            current = self._snapshot
+            if current is not None and version is not None and current.version == version:
+                return current
+
+            if current is not None and version is not None:
+                delta = self.handler.changes_since(current.sequence)
+                if delta is not None:
+                    sequence, changes = delta
+                    updated = current.with_changes(version, sequence, changes)
+                    if updated is not None:
+                        self._snapshot = updated
+                        return updated
+
+            # Sequência lida antes dos dados: alterações gravadas no meio são reaplicadas depois
+            sequence = self.handler.change_sequence()
+            self._snapshot = DatasetSnapshot(version, self.handler.load_data(), sequence)
+            return self._snapshot
+
+    def invalidate(self):
+        """Descarta o snapshot (próximo acesso recarrega os dados)"""
+        with self._lock:
+            self._snapshot = None
+
+    def department_costs(self):
+        snapshot = self.snapshot()
+        frame = None if self.handler.pushdown_aggregations else snapshot.df
+        return snapshot.analytics('department_costs', lambda: self.handler.department_costs(df=frame))
+
+    def monthly_hires(self):
+        snapshot = self.snapshot()
+        frame = None if self.handler.pushdown_aggregations else snapshot.df
+        return snapshot.analytics('monthly_hires', lambda: self.handler.monthly_hires(df=frame))
+
+    def numeric_columns(self):
+        """Salário e admissão como arrays (mapeados do disco no backend CSV)"""
+        snapshot = self.snapshot()
+        return snapshot.analytics('numeric_columns', self.handler.load_numeric_columns)
+
+    def salary_sketches(self):
+        """Sketches de percentis salariais por departamento"""
+        snapshot = self.snapshot()
+        return snapshot.analytics('salary_sketches', self.handler.load_salary_sketches)
+
+    def salary_cube(self):
+        """Cubo agregado departamento × cargo × status × mês, um por versão"""
+        snapshot = self.snapshot()
+        frame = None if self.handler.pushdown_aggregations else snapshot.df
+        return snapshot.analytics('salary_cube', lambda: SalaryCube(self.handler.cube_cells(df=frame)))
+
+    def payroll_scenarios(self):
+        """Simulador de cenários de folha montado sobre as células do cubo"""
+        snapshot = self.snapshot()
+        return snapshot.analytics('payroll_scenarios', lambda: PayrollScenarios(self.salary_cube().cells))
+
+    def evaluate_scenarios(self, scenarios):
+        """Custo por departamento de cada cenário (ver PayrollScenarios.evaluate)"""
+        return self.payroll_scenarios().evaluate(scenarios)
+
+    def employee_index(self):
+        """Índice do snapshot por ID e nome/email"""
+        snapshot = self.snapshot()
+        return snapshot.analytics('employee_index', lambda: EmployeeIndex.from_frame(snapshot.df))
+
+    def employee(self, employee_id):
+        """Funcionário pelo ID (dicionário) ou None"""
+        index = None if self.handler.pushdown_aggregations else self.employee_index()
+        return self.handler.get_employee(employee_id, index=index)
+
+    def search_employees(self, query, limit=20):
+        """Candidatos da busca por nome ou email (só os primeiros limit)"""
+        index = None if self.handler.pushdown_aggregations else self.employee_index()
+        return self.handler.search_employees(query, limit, index=index)
+
+    def headcount_index(self):
+        """Índice de intervalos para headcount e folha por data"""
+        snapshot = self.snapshot()
+        return snapshot.analytics(
+            'headcount_index',
+            lambda: HeadcountIndex.from_frame(snapshot.df, self.handler.load_status_history())
+        )
+
+    def salary_stats(self, start_date=None, end_date=None):
+        snapshot = self.snapshot()
+        frame = None if self.handler.pushdown_aggregations else snapshot.df
+        return snapshot.analytics(
+            ('salary_stats', start_date, end_date),
+            lambda: self.handler.salary_stats_by_department(start_date, end_date, df=frame)
+        )
+
+
+class DatasetRegistry:
+    """Registro de conjuntos de dados carregados com despejo LRU
+
+    Cada empresa tem seu próprio armazenamento, índice de datas e análises em
+    cache. No máximo max_loaded conjuntos ficam em memória; ao abrir mais um,
+    o usado há mais tempo é descartado.
+    """
+
+    def __init__(self, max_loaded=4, handler_factory=default_handler_factory):
+        self.max_loaded = max_loaded
+        self.handler_factory = handler_factory
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name=DEFAULT_DATASET):
+        """Retorna o conjunto de dados, carregando-o se necessário"""
+        with self._lock:
+            dataset = self._datasets.get(name)
+            if dataset is not None:
+                self._datasets.move_to_end(name)
+                return dataset
+
+            dataset = Dataset(name, self.handler_factory(name))
+            self._datasets[name] = dataset
+            while len(self._datasets) > self.max_loaded:
+                self._datasets.popitem(last=False)
+            return dataset
+
+    def create(self, name):
+        """Cria uma nova empresa vazia e retorna seu nome normalizado (None se inválido)"""
+        slug = slugify(name)
+        if not valid_slug(slug):
+            return None
+        self.get(slug)
+        return slug
+
+    def loaded(self):
+        """Nomes dos conjuntos em memória, do menos ao mais recente"""
+        with self._lock:
+            return list(self._datasets.keys())
+
+    def loaded_datasets(self):
+        """Pares (nome, conjunto) em memória, sem alterar a ordem do LRU"""
+        with self._lock:
+            return list(self._datasets.items())
+
+    def invalidate(self, name=None):
+        """Descarta o cache de uma empresa (ou de todas)"""
+        with self._lock:
+            if name is None:
+                datasets = list(self._datasets.values())
+            else:
+                datasets = [self._datasets[name]] if name in self._datasets else []
+        for dataset in datasets:
+            dataset.invalidate()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    """Índice ordenado da data de admissão para consultas por período
+
+    Guarda as datas convertidas para datetime64 em ordem crescente junto com a
+    posição original de cada linha. Um filtro por intervalo vira duas buscas
+    binárias (searchsorted) e um fatiamento, sem converter linha a linha.
+    """
+
+    def __init__(self, dates):
+        values = pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy(dtype='datetime64[ns]')
+        valid = ~np.isnat(values)
+        positions = np.flatnonzero(valid)
+        order = np.argsort(values[valid], kind='stable')
+
+        self.sorted_dates = values[valid][order]
+        self.positions = positions[order]
+        self.size = len(values)
+
+    @classmethod
+    def from_frame(cls, df, column='data_admissao'):
+        """Cria o índice a partir de uma coluna do DataFrame"""
+        if df.empty or column not in df.columns:
+            return cls([])
+        return cls(df[column])
+
+    def __len__(self):
+        return len(self.sorted_dates)
+
+    def min(self):
+        """Menor data indexada (ou None se vazio)"""
+        if len(self.sorted_dates) == 0:
+            return None
+        return pd.Timestamp(self.sorted_dates[0])
+
+    def max(self):
+        """Maior data indexada (ou None se vazio)"""
+        if len(self.sorted_dates) == 0:
+            return None
+        return pd.Timestamp(self.sorted_dates[-1])
+
+    def range_positions(self, start=None, end=None):
+        """Posições das linhas com data entre start e end (inclusive, por dia)"""
+        lo = 0
+        hi = len(self.sorted_dates)
+
+        if start is not None:
+            start = np.datetime64(pd.Timestamp(start).normalize(), 'ns')
+            lo = np.searchsorted(self.sorted_dates, start, side='left')
+
+        if end is not None:
+            # Inclui o dia inteiro da data final
+            end = np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1), 'ns')
+            hi = np.searchsorted(self.sorted_dates, end, side='left')
+
+        return self.positions[lo:max(lo, hi)]
+
+    def select(self, df, start=None, end=None):
+        """Retorna as linhas de df no período, em ordem de data de admissão"""
+        return df.iloc[self.range_positions(start, end)]
+
+    def since(self, df, moment):
+        """Retorna as linhas de df com data de admissão a partir de moment"""
+        lo = np.searchsorted(self.sorted_dates, np.datetime64(pd.Timestamp(moment), 'ns'), side='left')
+        return df.iloc[self.positions[lo:]]
@@ -0,0 +1,174 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+# Partículas ignoradas nas chaves de bloqueio
+NAME_PARTICLES = {'da', 'de', 'do', 'das', 'dos', 'e'}
+
+
+def normalize_name(name):
+    """Remove acentos, pontuação e espaços extras; tudo em minúsculas"""
+    if name is None or (not isinstance(name, str) and pd.isna(name)):
+        return ''
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    text = re.sub(r'[^a-z\s]', ' ', text.lower())
+    return ' '.join(text.split())
+
+
+def _tokens(normalized):
+    return [token for token in normalized.split() if token not in NAME_PARTICLES]
+
+
+def _blocking_keys(frame):
+    """Uma linha por (registro, chave): departamento + primeiro/último nome"""
+    rows = []
+    for position, (name, dept) in enumerate(zip(frame['_nome_norm'], frame['_dept_norm'])):
+        tokens = _tokens(name)
+        if not tokens:
+            continue
+        rows.append((position, f"{dept}|f:{tokens[0]}"))
+        rows.append((position, f"{dept}|l:{tokens[-1]}"))
+        # Nome idêntico depois da normalização, em qualquer departamento
+        rows.append((position, f"*|n:{name}"))
+    return pd.DataFrame(rows, columns=['pos', 'key']).drop_duplicates()
+
+
+def _prepare(df):
+    frame = pd.DataFrame({
+        'nome': df['nome'].astype(str).to_numpy(),
+        'departamento': df['departamento'].astype(str).to_numpy() if 'departamento' in df.columns else '',
+    })
+    frame['_nome_norm'] = frame['nome'].map(normalize_name)
+    frame['_dept_norm'] = frame['departamento'].map(normalize_name)
+    return frame
+
+
+def _similarity(a, b):
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b)
+    if matcher.real_quick_ratio() < 0.8 or matcher.quick_ratio() < 0.8:
+        return 0.0
+    return matcher.ratio()
+
+
+def _block_label(key):
+    """Descrição legível de uma chave de bloqueio"""
+    dept, name = key.split('|', 1)
+    return f"{name[2:]} ({'todos os departamentos' if dept == '*' else dept or 'sem departamento'})"
+
+
+def _candidate_pairs(new_keys, other_keys, max_block, window):
+    """Pares (pos_new, pos_other) que compartilham uma chave de bloqueio
+
+    Sem other_keys, compara os registros novos entre si. Blocos com até
+    max_block registros têm todos os pares comparados; nos maiores, cada
+    registro só é comparado com os window vizinhos seguintes na ordem
+    alfabética do nome (vizinhança ordenada), limitando as comparações a
+    window por registro. Retorna (pares, chaves dos blocos limitados).
+    """
+    internal = other_keys is None
+    members = new_keys.assign(lado=0)
+    if not internal:
+        members = pd.concat([members, other_keys.assign(lado=1)], ignore_index=True)
+    sizes = members['key'].map(members['key'].value_counts())
+    large = members[sizes > max_block]
+    small = members[sizes <= max_block]
+
+    # Blocos pequenos: todos os pares
+    left = small[small['lado'] == 0]
+    right = left if internal else small[small['lado'] == 1]
+    pairs = left.merge(right, on='key', suffixes=('_new', '_other'))
+    if internal:
+        pairs = pairs[pairs['pos_other'] < pairs['pos_new']]
+    frames = [pairs[['pos_new', 'pos_other']]]
+
+    # Blocos grandes: vizinhos na ordem do nome
+    if not large.empty:
+        large = large.sort_values(['key', 'nome', 'lado', 'pos'], kind='stable')
+        keys, sides = large['key'].to_numpy(), large['lado'].to_numpy()
+        positions = large['pos'].to_numpy()
+        for offset in range(1, min(window, len(large) - 1) + 1):
+            first, second = slice(None, -offset), slice(offset, None)
+            same = keys[first] == keys[second]
+            if internal:
+                a, b = positions[first][same], positions[second][same]
+                frames.append(pd.DataFrame({'pos_new': np.maximum(a, b), 'pos_other': np.minimum(a, b)}))
+            else:
+                same &= sides[first] != sides[second]
+                new_first = sides[first][same] == 0
+                a, b = positions[first][same], positions[second][same]
+                frames.append(pd.DataFrame({'pos_new': np.where(new_first, a, b), 'pos_other': np.where(new_first, b, a)}))
+
+    # Só interessam os blocos com algum registro novo
+    limited = list(large.loc[large['lado'] == 0, 'key'].unique())
+    return pd.concat(frames, ignore_index=True).drop_duplicates(), limited
+
+
+def find_duplicates(new_df, existing_df=None, threshold=0.9, max_block=100, window=20):
+    """Aponta prováveis duplicados de uma importação
+
+    Compara os registros novos com o cadastro existente e entre si. Para não
+    comparar todos com todos, só são comparados pares que compartilham uma
+    chave de bloqueio (departamento + primeiro ou último nome normalizado, ou
+    o nome completo normalizado); em blocos maiores que max_block cada
+    registro é comparado só com os window nomes mais próximos em ordem
+    alfabética. Retorna uma tabela com a linha do arquivo, o nome, o
+    registro semelhante e a similaridade (0 a 1); a descrição dos blocos
+    limitados fica em attrs['blocos_limitados'].
+    """
+    columns = ['linha', 'nome', 'departamento', 'semelhante_a', 'origem', 'similaridade']
+    empty = pd.DataFrame(columns=columns)
+    empty.attrs['blocos_limitados'] = []
+    if new_df is None or new_df.empty:
+        return empty
+
+    new = _prepare(new_df)
+    new_keys = _blocking_keys(new)
+    new_keys['nome'] = new['_nome_norm'].to_numpy()[new_keys['pos'].to_numpy(dtype=int)]
+
+    candidates = []
+    limited = []
+
+    # Novos x cadastro existente
+    if existing_df is not None and not existing_df.empty:
+        existing = _prepare(existing_df)
+        existing_keys = _blocking_keys(existing)
+        existing_keys['nome'] = existing['_nome_norm'].to_numpy()[existing_keys['pos'].to_numpy(dtype=int)]
+        pairs, blocks = _candidate_pairs(new_keys, existing_keys, max_block, window)
+        candidates.append((pairs, existing, 'cadastro'))
+        limited += blocks
+
+    # Novos x novos (duplicados dentro do próprio arquivo)
+    pairs, blocks = _candidate_pairs(new_keys, None, max_block, window)
+    candidates.append((pairs, new, 'arquivo'))
+    limited += blocks
+
+    results = []
+    for pairs, other, origin in candidates:
+        for pos_new, pos_other in pairs.itertuples(index=False):
+            score = _similarity(new['_nome_norm'].iat[pos_new], other['_nome_norm'].iat[pos_other])
+            if score >= threshold:
+                results.append((
+                    new_df.index[pos_new],
+                    new['nome'].iat[pos_new],
+                    new['departamento'].iat[pos_new],
+                    other['nome'].iat[pos_other],
+                    origin,
+                    round(score, 3),
+                ))
+
+    limited = sorted({_block_label(key) for key in limited})
+    if not results:
+        empty.attrs['blocos_limitados'] = limited
+        return empty
+
+    duplicates = pd.DataFrame(results, columns=columns)
+    # Uma linha por registro novo: o candidato mais parecido
+    duplicates = duplicates.sort_values('similaridade', ascending=False).drop_duplicates('linha')
+    duplicates = duplicates.sort_values('linha').reset_index(drop=True)
+    duplicates.attrs['blocos_limitados'] = limited
+    return duplicates
@@ -0,0 +1,63 @@
+from utils.dedupe import normalize_name, NAME_PARTICLES
+
+
+class EmailAllocator:
+    """Gera emails únicos no formato nome.sobrenome@dominio
+
+    Mantém em memória o conjunto de endereços já usados. Em caso de colisão
+    tenta, nesta ordem: iniciais dos nomes do meio (joao.p.silva), depois
+    sufixos numéricos (joao.silva2, joao.silva3, ...). O próximo sufixo de
+    cada base é guardado, então gerar milhares de emails é O(n).
+    """
+
+    def __init__(self, taken=(), domain="empresa.com"):
+        self.domain = domain
+        self.taken = {str(email).strip().lower() for email in taken if isinstance(email, str) and email.strip()}
+        self._next_suffix = {}
+
+    def _candidates(self, nome):
+        tokens = normalize_name(nome).split()
+        if not tokens:
+            return 'funcionario', []
+        if len(tokens) == 1:
+            return tokens[0], []
+
+        first, last = tokens[0], tokens[-1]
+        base = f"{first}.{last}"
+        middle = [token[0] for token in tokens[1:-1] if token not in NAME_PARTICLES]
+        alternatives = []
+        if middle:
+            alternatives.append(f"{first}.{middle[0]}.{last}")
+            if len(middle) > 1:
+                alternatives.append(f"{first}.{''.join(middle)}.{last}")
+        return base, alternatives
+
+    def reserve(self, email):
+        """Marca um email como usado"""
+        self.taken.add(str(email).strip().lower())
+
+    def is_taken(self, email):
+        return str(email).strip().lower() in self.taken
+
+    def allocate(self, nome):
+        """Retorna um email livre para o nome e o reserva"""
+        base, alternatives = self._candidates(nome)
+
+        for local in [base] + alternatives:
+            email = f"{local}@{self.domain}"
+            if email not in self.taken:
+                self.taken.add(email)
+                return email
+
+        suffix = self._next_suffix.get(base, 2)
+        while f"{base}{suffix}@{self.domain}" in self.taken:
+            suffix += 1
+        self._next_suffix[base] = suffix + 1
+
+        email = f"{base}{suffix}@{self.domain}"
+        self.taken.add(email)
+        return email
+
+    def allocate_many(self, nomes):
+        """Gera emails únicos para uma lista de nomes, na ordem dada"""
+        return [self.allocate(nome) for nome in nomes]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Colunas devolvidas na busca de funcionários
+SEARCH_COLUMNS = ['id', 'nome', 'email', 'departamento', 'cargo']
+
+
+def search_key(values):
+    """Texto em minúsculas e sem acentos, para busca tolerante"""
+    return (
+        values.astype('string').fillna('')
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        .str.lower()
+    )
+
+
+class EmployeeIndex:
+    """Índice do cadastro pelo ID do funcionário e por nome/email
+
+    A busca por ID usa uma tabela hash (pd.Index) com a posição de cada
+    linha. A busca por texto percorre uma coluna normalizada montada na
+    primeira consulta e devolve só os primeiros candidatos.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        ids = df['id'].astype('int64') if not df.empty else pd.Series([], dtype='int64')
+        # IDs repetidos (arquivo editado por fora) ficam com a primeira linha
+        first = ~ids.duplicated().to_numpy()
+        self.ids = pd.Index(ids.to_numpy()[first])
+        self.rows = np.flatnonzero(first)
+        self._keys = None
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, employee_id):
+        """Registro do funcionário como dicionário (None se não existir)"""
+        try:
+            position = self.ids.get_loc(int(employee_id))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return self.df.iloc[int(self.rows[position])].to_dict()
+
+    def search(self, query, limit=20):
+        """Até limit funcionários cujo nome ou email contém o texto buscado"""
+        columns = [column for column in SEARCH_COLUMNS if column in self.df.columns]
+        query = search_key(pd.Series([query or ''])).iloc[0].strip()
+        if not query:
+            return self.df[columns].head(limit)
+        if self._keys is None:
+            self._keys = search_key(self.df['nome']) + ' ' + search_key(self.df['email'])
+        matches = self._keys.str.contains(query, regex=False).to_numpy(dtype=bool, na_value=False).nonzero()[0]
+        return self.df.iloc[matches[:limit]][columns]
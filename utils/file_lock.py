@@ -0,0 +1,42 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: só a trava entre threads do processo
+    fcntl = None
+
+# Uma trava de thread por arquivo (todos os objetos do processo que gravam nele)
+_locks = {}
+_locks_guard = threading.Lock()
+# Travas de arquivo já obtidas pela thread (a trava é reentrante)
+_held = threading.local()
+
+
+def _thread_lock(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.RLock())
+
+
+@contextmanager
+def file_lock(path):
+    """Trava exclusiva de um arquivo entre threads e, com fcntl, entre processos
+
+    A trava de processo é feita em <arquivo>.lock. É reentrante na mesma
+    thread: um bloco travado pode chamar outro que trava o mesmo arquivo.
+    """
+    path = os.path.abspath(path)
+    with _thread_lock(path):
+        held = _held.__dict__.setdefault('paths', set())
+        if fcntl is None or path in held:
+            yield
+            return
+        with open(path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            held.add(path)
+            try:
+                yield
+            finally:
+                held.discard(path)
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
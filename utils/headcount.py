@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Fim de intervalo para quem continua na empresa
+_OPEN_END = np.iinfo(np.int64).max
+
+
+def _to_days(values):
+    """Converte datas em dias desde 1970-01-01 (NaT vira None no resultado)"""
+    dates = pd.to_datetime(pd.Series(values), errors='coerce', format='mixed')
+    days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return days, dates.isna().to_numpy()
+
+
+def _day(moment):
+    return int(np.datetime64(pd.Timestamp(moment).normalize(), 'D').astype(np.int64))
+
+
+def build_intervals(df, history=None):
+    """Monta os intervalos de vínculo (admissão → saída) de cada funcionário
+
+    Sem histórico, cada funcionário tem um intervalo da admissão até a data de
+    desligamento (ou aberto). Com o histórico de status, uma mudança para
+    'Inativo' encerra o intervalo e a volta para outro status abre um novo.
+    Inativos sem data de saída conhecida ficam fora da contagem.
+    """
+    columns = ['email', 'departamento', 'salario', 'inicio', 'fim']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    start, start_missing = _to_days(df['data_admissao'])
+    if 'data_desligamento' in df.columns:
+        end, end_missing = _to_days(df['data_desligamento'])
+    else:
+        end, end_missing = np.zeros(len(df), dtype=np.int64), np.ones(len(df), dtype=bool)
+
+    inactive = (df['status'] == 'Inativo').to_numpy() if 'status' in df.columns else np.zeros(len(df), dtype=bool)
+    end = np.where(end_missing, np.where(inactive, start, _OPEN_END), end)
+
+    intervals = pd.DataFrame({
+        'email': df['email'].to_numpy() if 'email' in df.columns else np.arange(len(df)),
+        'departamento': df['departamento'].to_numpy(),
+        'salario': pd.to_numeric(df['salario'], errors='coerce').fillna(0).to_numpy(dtype=float),
+        'inicio': start,
+        'fim': end,
+    })[~start_missing]
+
+    if history is None or history.empty:
+        return intervals[intervals['fim'] > intervals['inicio']].reset_index(drop=True)
+
+    # Funcionários com histórico: reconstrói os intervalos a partir dos eventos
+    events = history.copy()
+    events['dia'], invalid = _to_days(events['data'])
+    events = events[~invalid].sort_values('dia', kind='stable')
+    with_events = set(events['email'])
+
+    rebuilt = []
+    base = intervals.set_index('email', drop=False)
+    for email, group in events.groupby('email', sort=False):
+        if email not in base.index:
+            continue
+        employee = base.loc[[email]].iloc[0]
+        opened = employee['inicio']
+        active = True
+        for day, status in zip(group['dia'], group['status_novo']):
+            if status == 'Inativo' and active:
+                rebuilt.append((email, employee['departamento'], employee['salario'], opened, max(day, opened)))
+                active = False
+            elif status != 'Inativo' and not active:
+                opened = day
+                active = True
+        if active:
+            rebuilt.append((email, employee['departamento'], employee['salario'], opened, _OPEN_END))
+
+    intervals = pd.concat([
+        intervals[~intervals['email'].isin(with_events)],
+        pd.DataFrame(rebuilt, columns=columns),
+    ], ignore_index=True)
+    return intervals[intervals['fim'] > intervals['inicio']].reset_index(drop=True)
+
+
+class _EventIndex:
+    """Entradas e saídas ordenadas com somas acumuladas de salário"""
+
+    def __init__(self, starts, ends, salaries):
+        start_order = np.argsort(starts, kind='stable')
+        end_order = np.argsort(ends, kind='stable')
+        self.starts = starts[start_order]
+        self.ends = ends[end_order]
+        self.start_payroll = np.concatenate([[0.0], np.cumsum(salaries[start_order])])
+        self.end_payroll = np.concatenate([[0.0], np.cumsum(salaries[end_order])])
+
+    def at(self, days):
+        """Headcount e folha em cada dia (vetorizado, O(log n) por dia)"""
+        entered = np.searchsorted(self.starts, days, side='right')
+        left = np.searchsorted(self.ends, days, side='right')
+        headcount = entered - left
+        payroll = self.start_payroll[entered] - self.end_payroll[left]
+        return headcount, payroll
+
+
+class HeadcountIndex:
+    """Índice de intervalos para headcount e folha em qualquer data
+
+    Uma pessoa conta no dia X se inicio <= X < fim. Com entradas e saídas
+    ordenadas, o headcount em X é (entradas até X) - (saídas até X), e a folha
+    sai das somas acumuladas de salário; cada consulta custa duas buscas
+    binárias, para o total e para cada departamento. A folha usa o salário
+    atual de cada pessoa.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self._total = self._build(intervals)
+        self._departments = {
+            dept: self._build(group)
+            for dept, group in intervals.groupby('departamento')
+        }
+
+    @classmethod
+    def from_frame(cls, df, history=None):
+        return cls(build_intervals(df, history))
+
+    @staticmethod
+    def _build(intervals):
+        return _EventIndex(
+            intervals['inicio'].to_numpy(dtype=np.int64),
+            intervals['fim'].to_numpy(dtype=np.int64),
+            intervals['salario'].to_numpy(dtype=float),
+        )
+
+    def departments(self):
+        return sorted(self._departments)
+
+    def headcount_at(self, moment):
+        """Headcount e folha por departamento na data informada"""
+        day = np.array([_day(moment)])
+        rows = []
+        for dept in self.departments():
+            headcount, payroll = self._departments[dept].at(day)
+            if headcount[0] > 0:
+                rows.append((dept, int(headcount[0]), round(float(payroll[0]), 2)))
+        result = pd.DataFrame(rows, columns=['departamento', 'Headcount', 'Folha'])
+        return result.set_index('departamento').sort_values('Headcount', ascending=False)
+
+    def total_at(self, moment):
+        """Headcount e folha da empresa inteira na data informada"""
+        headcount, payroll = self._total.at(np.array([_day(moment)]))
+        return int(headcount[0]), round(float(payroll[0]), 2)
+
+    def series(self, start, end, freq='MS', department=None):
+        """Série de headcount e folha entre start e end (uma linha por período)"""
+        dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq=freq)
+        index = self._total if department is None else self._departments.get(department)
+        if index is None or len(dates) == 0:
+            return pd.DataFrame(columns=['Headcount', 'Folha'], index=pd.DatetimeIndex([], name='data'))
+
+        days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+        headcount, payroll = index.at(days)
+        return pd.DataFrame(
+            {'Headcount': headcount, 'Folha': payroll.round(2)},
+            index=pd.DatetimeIndex(dates, name='data'),
+        )
+
+    def first_day(self):
+        """Primeira data de admissão indexada"""
+        if len(self._total.starts) == 0:
+            return None
+        return pd.Timestamp(np.datetime64(int(self._total.starts[0]), 'D'))
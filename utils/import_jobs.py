@@ -0,0 +1,247 @@
+import json
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from utils.email_allocator import EmailAllocator
+
+# Situações de um job de importação
+PENDING = 'pendente'
+RUNNING = 'executando'
+DONE = 'concluido'
+CANCELLED = 'cancelado'
+FAILED = 'erro'
+INTERRUPTED = 'interrompido'
+
+# Situações em que o job pode ser retomado
+RESUMABLE = {CANCELLED, FAILED, INTERRUPTED}
+
+# Máximo de mensagens de erro guardadas por job
+MAX_ERRORS = 200
+
+# Maior bloco por gravação (limita a transação e a memória de cada bloco)
+MAX_CHUNK_SIZE = 5000
+
+
+class ImportJobManager:
+    """Executa importações em segundo plano, em blocos confirmados
+
+    Cada job guarda no diretório de jobs os registros a importar (CSV) e o
+    estado (JSON), atualizado a cada bloco gravado. A interface só consulta o
+    estado, então a página continua respondendo durante a importação e pode
+    acompanhar o progresso mesmo após recarregar. Um job cancelado,
+    interrompido (reinício do servidor) ou com erro pode ser retomado a partir
+    do último bloco confirmado. O motivo de uma falha fica em 'falha' (limpo
+    ao retomar); 'erros' lista só as linhas recusadas.
+    """
+
+    def __init__(self, handler_resolver, jobs_dir=os.path.join("data", "jobs"), max_workers=2, chunk_size=500):
+        self.handler_resolver = handler_resolver
+        self.jobs_dir = jobs_dir
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="import-job")
+        self._lock = threading.Lock()
+        self._dataset_locks = {}
+        self._cancel_events = {}
+        self._jobs = {}
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._load_jobs()
+
+    # ------------------------------------------------------------------
+    # Persistência do estado
+    # ------------------------------------------------------------------
+    def _state_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _payload_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.csv")
+
+    def _load_jobs(self):
+        """Carrega os jobs salvos; os que estavam rodando ficam interrompidos"""
+        for entry in os.listdir(self.jobs_dir):
+            if not entry.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, entry), 'r', encoding='utf-8') as state_file:
+                    job = json.load(state_file)
+            except (OSError, ValueError) as e:
+                print(f"Erro ao carregar job {entry}: {e}")
+                continue
+            if job['status'] in (PENDING, RUNNING):
+                job['status'] = INTERRUPTED
+            self._jobs[job['id']] = job
+            self._save_state(job)
+
+    def _save_state(self, job):
+        """Grava o estado do job de forma atômica"""
+        fd, temp_path = tempfile.mkstemp(dir=self.jobs_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as state_file:
+            json.dump(job, state_file, ensure_ascii=False)
+        os.replace(temp_path, self._state_path(job['id']))
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes)
+            job['atualizado_em'] = datetime.now().isoformat(timespec='seconds')
+            self._save_state(job)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def submit(self, dataset, records, chunk_size=None):
+        """Agenda a importação dos registros normalizados; retorna o ID do job
+
+        chunk_size define quantos registros vão em cada gravação (padrão do
+        gerenciador), limitado a MAX_CHUNK_SIZE.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        records.to_csv(self._payload_path(job_id), index=False)
+        now = datetime.now().isoformat(timespec='seconds')
+        job = {
+            'id': job_id,
+            'dataset': dataset,
+            'status': PENDING,
+            'total': len(records),
+            'bloco': min(chunk_size or self.chunk_size, MAX_CHUNK_SIZE),
+            'processados': 0,
+            'importados': 0,
+            'erros': [],
+            'falha': None,
+            'criado_em': now,
+            'atualizado_em': now,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save_state(job)
+        self._start(job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Cópia do estado atual do job (None se não existir)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job, erros=list(job['erros'])) if job else None
+
+    def list_jobs(self, dataset=None, limit=10):
+        """Jobs mais recentes primeiro"""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values() if dataset is None or job['dataset'] == dataset]
+        jobs.sort(key=lambda job: job['criado_em'], reverse=True)
+        return jobs[:limit]
+
+    def cancel(self, job_id):
+        """Pede o cancelamento; o job para depois do bloco em andamento"""
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    def resume(self, job_id):
+        """Retoma um job a partir do último bloco confirmado"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] not in RESUMABLE:
+                return False
+        if not os.path.exists(self._payload_path(job_id)):
+            self._update(job_id, status=FAILED, falha="Arquivo do job não encontrado")
+            return False
+        # A falha da execução anterior não vale para a retomada
+        self._update(job_id, status=PENDING, falha=None)
+        self._start(job_id)
+        return True
+
+    def is_active(self, job_id):
+        job = self.get(job_id)
+        return job is not None and job['status'] in (PENDING, RUNNING)
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+    def _start(self, job_id):
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id)
+
+    def _dataset_lock(self, dataset):
+        with self._lock:
+            return self._dataset_locks.setdefault(dataset, threading.Lock())
+
+    def _allocate_emails(self, job_id, handler, records):
+        """Gera os emails de todos os registros antes de qualquer gravação
+
+        Os emails ficam gravados no arquivo do job: ao retomar, um bloco que
+        já tinha entrado no cadastro tem os mesmos emails e é recusado como
+        repetido, em vez de entrar de novo com outros endereços.
+        """
+        existing = handler.load_data()
+        allocator = EmailAllocator(existing['email'] if not existing.empty else [])
+        records = records.assign(email=allocator.allocate_many(records['nome']))
+        fd, temp_path = tempfile.mkstemp(dir=self.jobs_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as payload_file:
+            records.to_csv(payload_file, index=False)
+        os.replace(temp_path, self._payload_path(job_id))
+        return records
+
+    def _run(self, job_id):
+        job = self.get(job_id)
+        cancel_event = self._cancel_events[job_id]
+        # Um job por empresa de cada vez (a ordem dos blocos não se mistura);
+        # contra as edições pela interface vale a trava de gravação do handler
+        with self._dataset_lock(job['dataset']):
+            try:
+                self._update(job_id, status=RUNNING)
+                handler = self.handler_resolver(job['dataset'])
+                records = pd.read_csv(self._payload_path(job_id), dtype={'telefone': str, 'observacoes': str, 'email': str}, keep_default_na=False)
+                if 'email' not in records.columns:
+                    records = self._allocate_emails(job_id, handler, records)
+
+                position = job['processados']
+                imported = job['importados']
+                errors = list(job['erros'])
+                while position < len(records):
+                    if cancel_event.is_set():
+                        self._update(job_id, status=CANCELLED)
+                        return
+
+                    chunk = records.iloc[position:position + job.get('bloco', self.chunk_size)]
+                    employees, lines = [], {}
+                    for row in chunk.to_dict('records'):
+                        linha = row.pop('linha', None)
+                        arquivo = row.pop('arquivo', None)
+                        lines[row['email']] = (f"{arquivo}, linha {linha}" if arquivo else f"Linha {linha}", row['nome'])
+                        employees.append(row)
+
+                    # Bloco em gravação: se o job parar antes da confirmação, a
+                    # retomada sabe que este bloco pode já estar no cadastro
+                    self._update(job_id, gravando=position)
+                    added, rejected = handler.add_employees(employees)
+                    if rejected is None:
+                        raise RuntimeError(f"falha ao gravar o bloco iniciado na posição {position}")
+                    if job.get('gravando') == position:
+                        # Bloco interrompido depois da gravação: os emails já
+                        # existentes são os do próprio job, gravados antes
+                        added += len(rejected)
+                        rejected = []
+                    for email in rejected:
+                        if len(errors) < MAX_ERRORS:
+                            origem, nome = lines[email]
+                            errors.append(f"{origem}: {nome} (email já existe)")
+
+                    position += len(chunk)
+                    imported += added
+                    # Bloco confirmado: a retomada começa daqui
+                    self._update(job_id, processados=position, importados=imported, erros=errors)
+
+                self._update(job_id, status=DONE)
+                os.remove(self._payload_path(job_id))
+            except Exception as e:
+                print(f"Erro no job de importação {job_id}: {e}")
+                self._update(job_id, status=FAILED, falha=str(e))
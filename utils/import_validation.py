@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Esquema declarativo das colunas aceitas na importação
+#   type: text | money | date | choice
+#   required: a coluna precisa existir e o valor não pode ficar vazio
+IMPORT_SCHEMA = {
+    'nome': {'type': 'text', 'required': True, 'max_length': 255},
+    'cargo': {'type': 'text', 'required': True, 'max_length': 120},
+    'departamento': {'type': 'text', 'required': True, 'max_length': 120},
+    'salario': {'type': 'money', 'required': True, 'min': 0.01, 'max': 1_000_000},
+    'data_admissao': {'type': 'date', 'required': True, 'formats': ['%d/%m/%Y', '%Y-%m-%d'],
+                      'min': '1900-01-01', 'max_days_ahead': 366},
+    'status': {'type': 'choice', 'required': False, 'choices': ['Ativo', 'Inativo', 'Férias'], 'default': 'Ativo'},
+    'telefone': {'type': 'text', 'required': False, 'max_length': 50},
+    'observacoes': {'type': 'text', 'required': False},
+}
+
+ERROR_COLUMNS = ['linha', 'coluna', 'motivo', 'valor']
+
+
+def parse_money(values):
+    """Converte valores como 'R$ 1.500,00', '1500.50' ou '1.500' em float (NaN se inválido)"""
+    text = values.astype('string').str.replace(r'R\$|\s', '', regex=True)
+    has_comma = text.str.contains(',', regex=False, na=False)
+    thousands_only = text.str.fullmatch(r'-?\d{1,3}(\.\d{3})+', na=False)
+    # Vírgula decimal (formato brasileiro) ou ponto só como separador de milhar
+    text = text.mask(has_comma | thousands_only, text.str.replace('.', '', regex=False))
+    text = text.str.replace(',', '.', regex=False)
+    return pd.to_numeric(text, errors='coerce').astype(float)
+
+
+def parse_dates(values, formats):
+    """Converte textos (já sem espaços nas pontas) tentando cada formato em ordem (NaT se nenhum servir)"""
+    text = values.astype('string')
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for date_format in formats:
+        missing = dates.isna()
+        if not missing.any():
+            break
+        dates = dates.fillna(pd.to_datetime(text.where(missing), format=date_format, errors='coerce'))
+    return dates
+
+
+def _error_frame(index, column, reason, values):
+    return pd.DataFrame({
+        'linha': np.asarray(index) + 2,
+        'coluna': column,
+        'motivo': reason,
+        'valor': values.astype('string').fillna('').to_numpy(),
+    })
+
+
+def validate_import(df, schema=IMPORT_SCHEMA):
+    """Valida o arquivo de importação coluna a coluna, em uma passada vetorizada
+
+    Retorna (valores convertidos, tabela de erros). Os valores convertidos
+    têm uma coluna por campo do esquema (salário em float, datas em
+    AAAA-MM-DD, status normalizado). A tabela de erros tem uma linha por
+    problema: linha do arquivo (cabeçalho = 1), coluna, motivo e o valor lido.
+    """
+    errors = []
+    parsed = pd.DataFrame(index=df.index)
+
+    for column, rules in schema.items():
+        if column not in df.columns:
+            if rules.get('required'):
+                errors.append(pd.DataFrame([{'linha': 1, 'coluna': column, 'motivo': 'coluna obrigatória ausente', 'valor': ''}]))
+            parsed[column] = rules.get('default', '')
+            continue
+
+        raw = df[column]
+        text = raw.astype('string').str.strip()
+        empty = text.isna() | (text == '')
+        if rules.get('required'):
+            if empty.any():
+                errors.append(_error_frame(df.index[empty], column, 'valor obrigatório vazio', raw[empty]))
+
+        kind = rules['type']
+        present = ~empty
+        if kind == 'text':
+            values = text.fillna('')
+            max_length = rules.get('max_length')
+            if max_length:
+                too_long = values.str.len() > max_length
+                if too_long.any():
+                    errors.append(_error_frame(df.index[too_long], column, f'mais de {max_length} caracteres', raw[too_long]))
+            parsed[column] = values.astype(object)
+
+        elif kind == 'money':
+            values = parse_money(text)
+            invalid = present & values.isna()
+            if invalid.any():
+                errors.append(_error_frame(df.index[invalid], column, 'valor numérico inválido', raw[invalid]))
+            out_of_range = values.notna() & ((values < rules.get('min', -np.inf)) | (values > rules.get('max', np.inf)))
+            if out_of_range.any():
+                reason = f"fora da faixa {rules.get('min')} a {rules.get('max')}"
+                errors.append(_error_frame(df.index[out_of_range], column, reason, raw[out_of_range]))
+            parsed[column] = values
+
+        elif kind == 'date':
+            formats = rules.get('formats', ['%Y-%m-%d'])
+            dates = parse_dates(text, formats)
+            invalid = present & dates.isna()
+            if invalid.any():
+                reason = 'data inválida (use ' + ' ou '.join(f.replace('%d', 'DD').replace('%m', 'MM').replace('%Y', 'AAAA') for f in formats) + ')'
+                errors.append(_error_frame(df.index[invalid], column, reason, raw[invalid]))
+            too_early = dates < pd.Timestamp(rules['min']) if 'min' in rules else pd.Series(False, index=df.index)
+            too_late = (
+                dates > pd.Timestamp(datetime.now() + timedelta(days=rules['max_days_ahead']))
+                if 'max_days_ahead' in rules else pd.Series(False, index=df.index)
+            )
+            if too_early.any():
+                errors.append(_error_frame(df.index[too_early], column, f"data anterior a {rules['min']}", raw[too_early]))
+            if too_late.any():
+                errors.append(_error_frame(df.index[too_late], column, 'data muito no futuro', raw[too_late]))
+            parsed[column] = dates.dt.strftime('%Y-%m-%d').astype(object)
+
+        elif kind == 'choice':
+            canonical = {choice.lower(): choice for choice in rules['choices']}
+            values = text.str.lower().map(canonical)
+            invalid = present & values.isna()
+            if invalid.any():
+                reason = 'valor não permitido (' + ', '.join(rules['choices']) + ')'
+                errors.append(_error_frame(df.index[invalid], column, reason, raw[invalid]))
+            parsed[column] = values.fillna(rules.get('default', '')).astype(object)
+
+    if errors:
+        error_table = pd.concat(errors, ignore_index=True).sort_values(['linha', 'coluna'], kind='stable')
+        error_table = error_table.reset_index(drop=True)
+    else:
+        error_table = pd.DataFrame(columns=ERROR_COLUMNS)
+    return parsed, error_table
@@ -0,0 +1,166 @@
+from datetime import date, datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from utils.import_validation import IMPORT_SCHEMA, validate_import
+
+# Colunas obrigatórias no arquivo de importação
+REQUIRED_IMPORT_COLUMNS = ['nome', 'cargo', 'salario', 'departamento', 'data_admissao']
+
+# Configurações tentadas ao ler CSVs exportados do Excel
+CSV_CONFIGS = [
+    {'sep': ';', 'encoding': 'utf-8'},
+    {'sep': ';', 'encoding': 'latin-1'},
+    {'sep': ';', 'encoding': 'cp1252'},
+    {'sep': ';', 'encoding': 'iso-8859-1'},
+    {'sep': ',', 'encoding': 'utf-8'},
+    {'sep': ',', 'encoding': 'latin-1'},
+]
+
+# Nomes alternativos de colunas
+COLUMN_MAPPING = {
+    'data admissao': 'data_admissao',
+    'data_admissao': 'data_admissao',
+    'salario': 'salario',
+    ' salario ': 'salario'
+}
+
+
+def read_csv_flexible(uploaded_file):
+    """Lê um CSV tentando separadores e encodings comuns
+
+    Retorna (DataFrame ou None, lista de mensagens das tentativas).
+    """
+    preview_df = None
+    error_messages = []
+
+    for config in CSV_CONFIGS:
+        try:
+            uploaded_file.seek(0)
+            preview_df = pd.read_csv(uploaded_file, sep=config['sep'], encoding=config['encoding'])
+            if len(preview_df.columns) > 0 and len(preview_df) > 0:
+                break
+            else:
+                error_messages.append(f"Config {config}: arquivo vazio ou sem colunas")
+        except Exception as e:
+            error_messages.append(f"Config {config}: {str(e)}")
+            continue
+
+    return preview_df, error_messages
+
+
+def _xlsx_value(value):
+    """Célula do Excel como o texto que viria em um CSV"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float):
+        # Duas casas: '1.5' não pode virar 1.500 (ponto de milhar) na conversão de salário
+        return str(int(value)) if value.is_integer() else f"{value:.2f}"
+    return value
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def read_xlsx_chunks(file, chunk_size=5000):
+    """Lê a planilha ativa de um .xlsx em blocos de linhas
+
+    Usa o modo somente leitura do openpyxl, que percorre o XML da planilha
+    linha a linha; só o bloco atual fica em memória. A primeira linha não
+    vazia é o cabeçalho. O índice de cada bloco é o número da linha no Excel
+    menos 2 (mesma convenção dos CSVs: linha = índice + 2).
+    """
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = enumerate(workbook.active.iter_rows(values_only=True), start=1)
+        header = None
+        for number, values in rows:
+            if not all(_blank(value) for value in values):
+                header = [str(value).strip() if not _blank(value) else f'Unnamed: {position}'
+                          for position, value in enumerate(values)]
+                break
+        if header is None:
+            return
+
+        chunk, index, emitted = [], [], False
+        for number, values in rows:
+            if all(_blank(value) for value in values):
+                continue
+            values = list(values[:len(header)]) + [None] * (len(header) - len(values))
+            chunk.append([_xlsx_value(value) for value in values])
+            index.append(number - 2)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=header, index=index, dtype=object)
+                chunk, index, emitted = [], [], True
+        if chunk or not emitted:
+            yield pd.DataFrame(chunk, columns=header, index=index, dtype=object)
+    finally:
+        workbook.close()
+
+
+def normalize_columns(df):
+    """Limpa os nomes das colunas e aplica os nomes alternativos"""
+    df = df.rename(columns=str.strip)
+    for old_name, new_name in COLUMN_MAPPING.items():
+        if old_name in df.columns:
+            df = df.rename(columns={old_name: new_name})
+    return df
+
+
+def missing_import_columns(df):
+    """Colunas obrigatórias ausentes no arquivo"""
+    return [col for col in REQUIRED_IMPORT_COLUMNS if col not in df.columns]
+
+
+def normalize_import_rows(df, schema=IMPORT_SCHEMA):
+    """Valida o arquivo e converte as linhas válidas no formato do cadastro (sem email)
+
+    Retorna (registros válidos, tabela de erros). A coluna 'linha' dos
+    registros guarda o número da linha no arquivo original; linhas com
+    qualquer erro ficam de fora em vez de entrar com salário 0 ou data inválida.
+    """
+    parsed, errors = validate_import(df, schema)
+    if (errors['linha'] == 1).any():
+        # Falta coluna obrigatória: nenhuma linha é aproveitável
+        valid = parsed.iloc[0:0]
+    else:
+        valid = parsed[~parsed.index.isin(errors['linha'].to_numpy() - 2)]
+    records = pd.DataFrame({
+        'linha': valid.index + 2,
+        'nome': valid['nome'],
+        'telefone': valid['telefone'],
+        'departamento': valid['departamento'],
+        'cargo': valid['cargo'],
+        'salario': valid['salario'],
+        'data_admissao': valid['data_admissao'],
+        'status': valid['status'],
+        'observacoes': valid['observacoes'],
+    })
+    return records.reset_index(drop=True), errors
+
+
+def normalize_xlsx_rows(file, chunk_size=5000, schema=IMPORT_SCHEMA):
+    """Valida e normaliza um .xlsx bloco a bloco (ver read_xlsx_chunks)
+
+    Retorna (registros válidos, tabela de erros, linhas lidas), no mesmo
+    formato de normalize_import_rows; a coluna 'linha' é a linha no Excel.
+    """
+    record_chunks, error_chunks, total = [], [], 0
+    for chunk in read_xlsx_chunks(file, chunk_size):
+        records, errors = normalize_import_rows(normalize_columns(chunk), schema)
+        record_chunks.append(records)
+        error_chunks.append(errors)
+        total += len(chunk)
+        if (errors['linha'] == 1).any():
+            # Cabeçalho sem coluna obrigatória: os demais blocos também seriam recusados
+            break
+    if not record_chunks:
+        records, errors = normalize_import_rows(pd.DataFrame(), schema)
+        return records, errors, 0
+    records = pd.concat(record_chunks, ignore_index=True)
+    errors = pd.concat(error_chunks, ignore_index=True)
+    return records, errors, total
@@ -0,0 +1,156 @@
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Colunas do relatório por operação (tamanhos em MB)
+REPORT_COLUMNS = ['operação', 'execuções', 'pico', 'pico máximo', 'retido', 'retido total', 'DataFrames', 'última execução']
+
+# Origens de alocação guardadas por operação
+TOP_ALLOCATIONS = 10
+
+_MB = 1024 * 1024
+
+
+def frame_memory(df):
+    """Bytes ocupados por um DataFrame, contando o conteúdo das strings"""
+    if df is None:
+        return 0
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class _Measurement:
+    """Medição de uma operação em andamento"""
+
+    def __init__(self, label, start, snapshot):
+        self.label = label
+        self.start = start
+        self.peak = start
+        self.snapshot = snapshot
+        self.frame_bytes = 0
+
+    def frame(self, df):
+        """Soma o tamanho de um DataFrame produzido pela operação"""
+        self.frame_bytes += frame_memory(df)
+        return df
+
+
+class _Disabled:
+    def frame(self, df):
+        return df
+
+
+_DISABLED = _Disabled()
+
+
+class MemoryProfiler:
+    """Perfil de memória por página e operação (opcional)
+
+    Ligado, usa o tracemalloc para medir, em cada bloco track(label), o pico
+    de memória alocada acima do início do bloco e o quanto ficou retido ao
+    final; compara snapshots de antes e depois para apontar as linhas de
+    código que mais retiveram memória, e soma memory_usage(deep=True) dos
+    DataFrames informados. Blocos aninhados (página → carga dos dados) são
+    medidos cada um; o pico do bloco externo inclui o dos internos. O
+    tracemalloc mede o processo inteiro: sessões simultâneas entram umas nas
+    medições das outras. Desligado, track() não faz nada além de um yield.
+    """
+
+    def __init__(self, enabled=False, snapshots=True):
+        self.snapshots = snapshots
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _update_peaks(self, stack):
+        peak = tracemalloc.get_traced_memory()[1]
+        for measurement in stack:
+            measurement.peak = max(measurement.peak, peak)
+
+    @contextmanager
+    def track(self, label):
+        """Mede o bloco; o objeto devolvido aceita .frame(df)"""
+        if not self.enabled or not tracemalloc.is_tracing():
+            yield _DISABLED
+            return
+
+        stack = self._stack()
+        # O pico é zerado a cada bloco: antes, os blocos externos guardam o que já viram
+        self._update_peaks(stack)
+        tracemalloc.reset_peak()
+        snapshot = tracemalloc.take_snapshot() if self.snapshots else None
+        measurement = _Measurement(label, tracemalloc.get_traced_memory()[0], snapshot)
+        stack.append(measurement)
+        try:
+            yield measurement
+        finally:
+            self._update_peaks(stack)
+            stack.pop()
+            if tracemalloc.is_tracing():
+                self._record(measurement, tracemalloc.get_traced_memory()[0])
+
+    def _record(self, measurement, current):
+        top = []
+        if measurement.snapshot is not None:
+            ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            differences = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(
+                measurement.snapshot.filter_traces(ignore), 'lineno'
+            )
+            top = [
+                {'origem': str(difference.traceback[0]), 'retido': difference.size_diff / _MB,
+                 'blocos': difference.count_diff}
+                for difference in differences[:TOP_ALLOCATIONS] if difference.size_diff > 0
+            ]
+        peak = (measurement.peak - measurement.start) / _MB
+        retained = (current - measurement.start) / _MB
+        with self._lock:
+            stats = self._stats.setdefault(measurement.label, {
+                'execuções': 0, 'pico máximo': 0.0, 'retido total': 0.0,
+            })
+            stats['execuções'] += 1
+            stats['pico'] = peak
+            stats['pico máximo'] = max(stats['pico máximo'], peak)
+            stats['retido'] = retained
+            stats['retido total'] += retained
+            stats['DataFrames'] = measurement.frame_bytes / _MB
+            stats['última execução'] = datetime.now().isoformat(timespec='seconds')
+            stats['alocações'] = top
+
+    def report(self):
+        """Uma linha por operação, do maior pico para o menor (tamanhos em MB)"""
+        with self._lock:
+            rows = [dict(stats, operação=label) for label, stats in self._stats.items()]
+        if not rows:
+            return pd.DataFrame(columns=REPORT_COLUMNS)
+        report = pd.DataFrame(rows)[REPORT_COLUMNS]
+        return report.sort_values('pico máximo', ascending=False).reset_index(drop=True).round(2)
+
+    def top_allocations(self, label):
+        """Linhas de código que mais retiveram memória na última execução da operação"""
+        with self._lock:
+            top = list(self._stats.get(label, {}).get('alocações', []))
+        return pd.DataFrame(top, columns=['origem', 'retido', 'blocos']).round(3)
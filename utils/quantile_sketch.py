@@ -0,0 +1,221 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Erro relativo padrão dos percentis (1%)
+DEFAULT_ACCURACY = 0.01
+
+
+class DDSketch:
+    """Sketch de quantis com erro relativo garantido (DDSketch)
+
+    Cada valor positivo cai no balde ceil(log_gamma(x)), com
+    gamma = (1 + a) / (1 - a); qualquer percentil devolvido fica a no máximo
+    a * valor do percentil exato. Dois sketches com a mesma precisão são
+    combinados somando os baldes, então o sketch da empresa é a soma dos
+    sketches dos departamentos. Valores <= 0 são contados à parte.
+    """
+
+    def __init__(self, accuracy=DEFAULT_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        """Acrescenta valores (NaN são ignorados)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        positive = values[values > 0]
+        self.zero_count += int(len(values) - len(positive))
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self.bins[key] = self.bins.get(key, 0) + count
+        self.count += int(len(values))
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+
+    def remove(self, values):
+        """Retira valores acrescentados antes (NaN são ignorados)
+
+        Mínimo e máximo não são recalculados: quem remove o menor ou o maior
+        valor deve refazer o sketch.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        positive = values[values > 0]
+        self.zero_count -= int(len(values) - len(positive))
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                remaining = self.bins.get(key, 0) - count
+                if remaining > 0:
+                    self.bins[key] = remaining
+                else:
+                    self.bins.pop(key, None)
+        self.count -= int(len(values))
+        self.total -= float(values.sum())
+        return self
+
+    def merge(self, other):
+        """Soma outro sketch a este (mesma precisão)"""
+        if other.accuracy != self.accuracy:
+            raise ValueError("sketches com precisões diferentes")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantiles(self, qs):
+        """Percentis aproximados (qs entre 0 e 1), limitados ao mínimo e máximo reais"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+
+        keys = np.array(sorted(self.bins), dtype=np.int64)
+        counts = np.array([self.bins[key] for key in keys.tolist()], dtype=np.int64)
+        cumulative = self.zero_count + np.cumsum(counts)
+
+        # Posição (0-based) do percentil e primeiro balde que a alcança
+        ranks = qs * (self.count - 1)
+        values = np.zeros(len(qs))
+        if len(keys):
+            positions = np.searchsorted(cumulative, ranks, side='right').clip(max=len(keys) - 1)
+            bucket_values = 2 * self.gamma ** keys[positions].astype(np.float64) / (self.gamma + 1)
+            values = np.where(ranks < self.zero_count, 0.0, bucket_values)
+        return values.clip(self.min, self.max)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self):
+        return {
+            'accuracy': self.accuracy,
+            'bins': {str(key): count for key, count in self.bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['accuracy'])
+        sketch.bins = {int(key): count for key, count in data['bins'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.total = data['total']
+        if data['count']:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+
+def _group_pairs(pairs):
+    """Salários por departamento a partir de pares (departamento, salário)"""
+    groups = {}
+    for dept, salary in pairs:
+        groups.setdefault(str(dept), []).append(np.nan if salary is None else salary)
+    return {dept: pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            for dept, values in groups.items()}
+
+
+class DepartmentSketches:
+    """Um DDSketch de salários por departamento"""
+
+    def __init__(self, sketches, accuracy=DEFAULT_ACCURACY):
+        self.sketches = sketches
+        self.accuracy = accuracy
+
+    @classmethod
+    def from_frame(cls, df, accuracy=DEFAULT_ACCURACY):
+        sketches = {}
+        if not df.empty:
+            salaries = pd.to_numeric(df['salario'], errors='coerce')
+            for dept, values in salaries.groupby(df['departamento'].astype(str)):
+                sketches[dept] = DDSketch(accuracy).add(values.to_numpy(dtype=np.float64, na_value=np.nan))
+        return cls(sketches, accuracy)
+
+    def update(self, removed=(), added=(), department_values=None):
+        """Tira e acrescenta pares (departamento, salário) só nos departamentos afetados
+
+        Um departamento que perde o menor ou o maior salário (ou todos) é
+        refeito com department_values(departamento), que devolve os salários
+        dele já depois da gravação; assim mínimo e máximo seguem exatos.
+        """
+        rebuild = set()
+        for dept, values in _group_pairs(removed).items():
+            sketch = self.sketches.get(dept)
+            values = values[~np.isnan(values)]
+            if sketch is None or len(values) >= sketch.count or (values <= sketch.min).any() or (values >= sketch.max).any():
+                rebuild.add(dept)
+            else:
+                sketch.remove(values)
+        for dept, values in _group_pairs(added).items():
+            if dept not in rebuild:
+                self.sketches.setdefault(dept, DDSketch(self.accuracy)).add(values)
+        for dept in rebuild:
+            values = np.asarray(department_values(dept), dtype=np.float64)
+            if len(values):
+                self.sketches[dept] = DDSketch(self.accuracy).add(values)
+            else:
+                self.sketches.pop(dept, None)
+        return self
+
+    def departments(self):
+        return sorted(self.sketches)
+
+    def overall(self):
+        """Sketch da empresa inteira (soma dos departamentos)"""
+        total = DDSketch(self.accuracy)
+        for sketch in self.sketches.values():
+            total.merge(sketch)
+        return total
+
+    def percentiles(self, qs=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        """Tabela de percentis por departamento (colunas P10, P25, ...)"""
+        columns = [f"P{round(q * 100):g}" for q in qs]
+        rows = {dept: self.sketches[dept].quantiles(qs) for dept in self.departments()}
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        return pd.DataFrame.from_dict(rows, orient='index', columns=columns).round(2).rename_axis('departamento')
+
+    def box_stats(self):
+        """Mínimo, quartis e máximo por departamento (para box plots)"""
+        rows = {}
+        for dept in self.departments():
+            sketch = self.sketches[dept]
+            q1, median, q3 = sketch.quantiles([0.25, 0.5, 0.75])
+            rows[dept] = (sketch.min, q1, median, q3, sketch.max, sketch.count)
+        return pd.DataFrame.from_dict(
+            rows, orient='index', columns=['Mínimo', 'Q1', 'Mediana', 'Q3', 'Máximo', 'Funcionários']
+        ).rename_axis('departamento')
+
+    def to_dict(self):
+        return {
+            'accuracy': self.accuracy,
+            'departments': {dept: sketch.to_dict() for dept, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketches = {dept: DDSketch.from_dict(item) for dept, item in data['departments'].items()}
+        return cls(sketches, data['accuracy'])
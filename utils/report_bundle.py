@@ -0,0 +1,175 @@
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from openpyxl.utils import get_column_letter
+
+from utils.visualizations import (
+    create_department_analysis,
+    create_salary_analysis,
+    create_growth_analysis,
+    create_status_analysis,
+)
+
+
+def build_salary_report(df):
+    """Monta a tabela do relatório de salários por departamento"""
+    return df.groupby('departamento').agg({
+        'nome': 'count',
+        'salario': ['mean', 'sum', 'min', 'max']
+    }).round(2)
+
+
+def build_department_analysis(df):
+    """Tabela completa por departamento: custo, média, mediana, faixa e % do custo total"""
+    dept_analysis = df.groupby('departamento').agg({
+        'salario': ['sum', 'mean', 'median', 'count', 'min', 'max']
+    }).round(2)
+    dept_analysis.columns = ['Custo Total', 'Média Salarial', 'Mediana', 'Funcionários', 'Menor Salário', 'Maior Salário']
+    dept_analysis = dept_analysis.sort_values('Custo Total', ascending=False)
+    total_custo = dept_analysis['Custo Total'].sum()
+    dept_analysis['% do Custo Total'] = (dept_analysis['Custo Total'] / total_custo * 100).round(1)
+    return dept_analysis
+
+
+def build_monthly_hires(df):
+    """Contratações por mês (df com data_admissao em datetime)"""
+    monthly_hires = df.groupby(df['data_admissao'].dt.to_period('M')).size().reset_index(name='Contratações')
+    monthly_hires['data_admissao'] = monthly_hires['data_admissao'].astype(str)
+    return monthly_hires
+
+
+def _salary_summary(analysis):
+    """Converte as estatísticas escalares da análise salarial em tabela"""
+    labels = {
+        'total_payroll': 'Folha Total',
+        'avg_salary': 'Salário Médio',
+        'median_salary': 'Mediana',
+        'salary_std': 'Desvio Padrão',
+        'q1': '1º Quartil',
+        'q3': '3º Quartil',
+    }
+    return pd.DataFrame({
+        'Indicador': list(labels.values()),
+        'Valor': [round(float(analysis[key]), 2) for key in labels]
+    })
+
+
+def _figures(analysis, prefix):
+    """Extrai os gráficos plotly de uma análise"""
+    if not analysis:
+        return {}
+    return {
+        f"{prefix}_{name}": value
+        for name, value in analysis.items()
+        if isinstance(value, go.Figure)
+    }
+
+
+def build_status_by_department(df, cube=None):
+    """Funcionários por departamento × status (das células do cubo, se informado)"""
+    if cube is not None:
+        return cube.pivot('departamento', 'status').astype(int)
+    if 'status' not in df.columns:
+        return None
+    return df.groupby(['departamento', 'status']).size().unstack(fill_value=0)
+
+
+def _workbook(tables):
+    """Planilha única com as tabelas já calculadas (None = aba omitida)"""
+    workbook = io.BytesIO()
+    with pd.ExcelWriter(workbook, engine='openpyxl', mode='w') as writer:
+        for sheet_name, (table, index) in tables.items():
+            if table is not None:
+                table.to_excel(writer, sheet_name=sheet_name, index=index)
+
+        for sheet in writer.sheets.values():
+            for idx in range(1, sheet.max_column + 1):
+                sheet.column_dimensions[get_column_letter(idx)].width = 20
+    return workbook.getvalue()
+
+
+def _render_figures(analysis, prefix):
+    """HTML interativo dos gráficos de uma análise"""
+    return {
+        f"graficos/{name}.html": figure.to_html(include_plotlyjs='cdn')
+        for name, figure in _figures(analysis, prefix).items()
+    }
+
+
+def _load_plotly_template():
+    """Carrega o template padrão do plotly antes do pool
+
+    O template é montado na primeira figura do processo e essa montagem não
+    é segura entre threads; uma figura descartável aqui evita que duas
+    análises a disputem.
+    """
+    px.scatter(x=[0], y=[0])
+
+
+def create_report_bundle(df, data_handler, max_workers=6, cube=None):
+    """Gera um pacote zip com todos os relatórios em paralelo
+
+    Em duas rodadas no pool de threads: primeiro as análises e tabelas,
+    independentes entre si; depois as planilhas e o HTML dos gráficos, que
+    reaproveitam o que a primeira rodada calculou (nada é recalculado fora
+    do pool). O cadastro completo vai só em funcionarios_AAAAMMDD.xlsx; a
+    planilha relatorio_completo traz as demais tabelas. Com o cubo
+    agregado (SalaryCube) das mesmas linhas de df, as tabelas e gráficos por
+    status saem das células do cubo.
+    """
+    try:
+        if df.empty:
+            return None
+
+        _load_plotly_template()
+        tasks = {
+            'departamentos': lambda: create_department_analysis(df),
+            'salarios': lambda: create_salary_analysis(df),
+            'crescimento': lambda: create_growth_analysis(df, data_handler.load_status_history()),
+            'status': lambda: create_status_analysis(df, cube),
+            'relatorio_salarios': lambda: build_salary_report(df),
+            'status_departamento': lambda: build_status_by_department(df, cube),
+        }
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {name: executor.submit(task) for name, task in tasks.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+            sheets = {
+                'Relatório de Salários': (results['relatorio_salarios'], True),
+                'Departamentos': (results['departamentos']['statistics'] if results['departamentos'] else None, True),
+                'Resumo Salarial': (_salary_summary(results['salarios']) if results['salarios'] else None, False),
+                'Status por Departamento': (results['status_departamento'], True),
+            }
+            files = {
+                'relatorio_completo': executor.submit(_workbook, sheets),
+                'funcionarios': executor.submit(data_handler.export_to_excel, df),
+                'relatorio_salarios': executor.submit(data_handler.export_salary_report, results['relatorio_salarios']),
+            }
+            figures = [
+                executor.submit(_render_figures, results[prefix], prefix)
+                for prefix in ['departamentos', 'salarios', 'crescimento', 'status']
+            ]
+            files = {name: future.result() for name, future in files.items()}
+            figures = [future.result() for future in figures]
+
+        # Pacote zip com planilhas e gráficos
+        output = io.BytesIO()
+        stamp = datetime.now().strftime('%Y%m%d')
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+            for name, data in files.items():
+                if data:
+                    bundle.writestr(f"{name}_{stamp}.xlsx", data)
+            for rendered in figures:
+                for name, html in rendered.items():
+                    bundle.writestr(name, html)
+
+        output.seek(0)
+        return output.getvalue()
+    except Exception as e:
+        print(f"Erro ao gerar pacote de relatórios: {e}")
+        return None
@@ -0,0 +1,221 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+from utils.datasets import slugify
+from utils.report_bundle import build_department_analysis, build_monthly_hires, build_salary_report
+
+# Tabelas materializadas: análise por departamento, estatísticas salariais,
+# contratações por mês e headcount/folha por mês
+TABLES = ['departamentos', 'estatisticas_salariais', 'contratacoes_mensais', 'headcount']
+
+# Planilhas Excel materializadas
+EXPORTS = ['excel_funcionarios', 'excel_salarios']
+
+
+def _write_atomic(path, data):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as output:
+        output.write(data)
+    os.replace(temp_path, path)
+
+
+class MaterializedReports:
+    """Relatórios de um conjunto de dados gravados em disco
+
+    Cobrem o período padrão da página de relatórios (da primeira admissão
+    até o dia da geração). O manifesto guarda a versão dos dados usada e o
+    momento da geração; é gravado por último, então um leitor nunca vê um
+    manifesto apontando para arquivos ainda não escritos.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_file = os.path.join(directory, 'relatorios.json')
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def _path(self, name, extension):
+        return os.path.join(self.directory, f"{name}.{extension}")
+
+    def manifest(self):
+        """Manifesto da última geração (None se nunca gerado)"""
+        if not os.path.exists(self.manifest_file):
+            return None
+        with open(self.manifest_file, 'r', encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+
+    def write(self, dataset):
+        """Calcula e grava todos os relatórios do período padrão"""
+        snapshot = dataset.snapshot()
+        first_hire = snapshot.date_index.min()
+        if snapshot.df.empty or first_hire is None:
+            return None
+        # Mesmo período padrão da página (data inicial = primeira admissão, final = hoje)
+        start, end = first_hire.date(), date.today()
+        df = snapshot.date_index.select(snapshot.dated(), start, end)
+        handler = dataset.handler
+
+        tables = {
+            'departamentos': build_department_analysis(df),
+            'estatisticas_salariais': dataset.salary_stats(start, end),
+            'contratacoes_mensais': build_monthly_hires(df).set_index('data_admissao'),
+            'headcount': dataset.headcount_index().series(start, end, freq='MS'),
+        }
+        exports = {
+            'excel_funcionarios': handler.export_to_excel(df),
+            'excel_salarios': handler.export_salary_report(build_salary_report(df)),
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        for name, table in tables.items():
+            _write_atomic(self._path(name, 'csv'), table.to_csv().encode('utf-8'))
+        for name, data in exports.items():
+            if data:
+                _write_atomic(self._path(name, 'xlsx'), data)
+
+        manifest = {
+            'versao': list(snapshot.version) if snapshot.version is not None else None,
+            'inicio': start.isoformat(),
+            'fim': end.isoformat(),
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'linhas': int(len(df)),
+        }
+        _write_atomic(self.manifest_file, json.dumps(manifest, ensure_ascii=False).encode('utf-8'))
+        return manifest
+
+    def read(self):
+        """(manifesto, tabelas) da última geração, lidos do disco uma vez por geração"""
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        with self._lock:
+            if self._cache is not None and self._cache[0] == manifest:
+                return self._cache
+        tables = {}
+        for name in TABLES:
+            table = pd.read_csv(self._path(name, 'csv'), index_col=0)
+            if name == 'headcount':
+                table.index = pd.DatetimeIndex(pd.to_datetime(table.index), name='data')
+            tables[name] = table
+        with self._lock:
+            self._cache = (manifest, tables)
+        return self._cache
+
+    def export(self, name):
+        """Bytes de uma planilha materializada (None se não existir)"""
+        path = self._path(name, 'xlsx')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as export_file:
+            return export_file.read()
+
+
+class ReportScheduler:
+    """Materializa os relatórios pesados em segundo plano
+
+    Uma thread verifica a cada poll segundos a versão dos dados de cada
+    conjunto carregado. Depois de uma gravação, espera debounce segundos sem
+    novas alterações e regera os relatórios (uma rajada de edições vira uma
+    única geração); além disso regera a cada interval segundos, para que o
+    período padrão acompanhe a data de hoje.
+    """
+
+    def __init__(self, registry, reports_dir=os.path.join("data", "relatorios"), interval=3600, debounce=30, poll=5):
+        self.registry = registry
+        self.reports_dir = reports_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.poll = poll
+        self._reports = {}
+        self._changes = {}
+        self._requested = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def reports(self, name):
+        """Relatórios materializados de um conjunto de dados"""
+        with self._lock:
+            if name not in self._reports:
+                self._reports[name] = MaterializedReports(os.path.join(self.reports_dir, slugify(name) or 'principal'))
+            return self._reports[name]
+
+    def load(self, dataset):
+        """(manifesto, tabelas) materializados da versão atual dos dados, ou None
+
+        Sem relatórios gravados, pede uma geração. Se os dados mudaram desde a
+        geração (ou o período padrão já não termina hoje), também retorna None:
+        a página calcula ao vivo até a thread regerar, após o debounce.
+        """
+        try:
+            result = self.reports(dataset.name).read()
+        except Exception as e:
+            print(f"Erro ao ler relatórios materializados: {e}")
+            result = None
+        if result is None:
+            self.request(dataset.name)
+            return None
+        manifest = result[0]
+        version = dataset.handler.data_version()
+        if manifest.get('versao') != (list(version) if version is not None else None):
+            return None
+        if manifest.get('fim') != date.today().isoformat():
+            return None
+        return result
+
+    def request(self, name):
+        """Agenda a geração imediata dos relatórios de um conjunto"""
+        with self._lock:
+            self._requested.add(name)
+        self._wake.set()
+
+    def is_due(self, name, version, manifest, now):
+        """Se os relatórios devem ser regerados agora"""
+        if manifest is None:
+            return True
+        with self._lock:
+            if name in self._requested:
+                return True
+            seen, changed_at = self._changes.get(name, (None, now))
+            if version != seen:
+                # Nova alteração: reinicia a espera do debounce
+                self._changes[name] = (version, now)
+                changed_at = now
+        materialized_version = manifest.get('versao')
+        current_version = list(version) if version is not None else None
+        if materialized_version != current_version and now - changed_at >= self.debounce:
+            return True
+        generated_at = datetime.fromisoformat(manifest['gerado_em']).timestamp()
+        return now - generated_at >= self.interval or manifest.get('fim') != date.today().isoformat()
+
+    def run_pending(self, now=None):
+        """Regera os relatórios vencidos de todos os conjuntos carregados"""
+        now = time.time() if now is None else now
+        for name, dataset in self.registry.loaded_datasets():
+            try:
+                reports = self.reports(name)
+                if self.is_due(name, dataset.handler.data_version(), reports.manifest(), now):
+                    with self._lock:
+                        self._requested.discard(name)
+                    reports.write(dataset)
+            except Exception as e:
+                print(f"Erro ao materializar relatórios de '{name}': {e}")
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.poll)
+            self._wake.clear()
+            self.run_pending()
+
+    def start(self):
+        """Inicia a thread de materialização (uma por processo)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="headcount-reports", daemon=True)
+            self._thread.start()
+        return self
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from utils.cube import cube_cells
+
+# Dimensões que um reajuste pode filtrar
+FILTERS = ['departamento', 'cargo', 'status']
+
+# Colunas do custo por departamento (mesmas do dashboard)
+COST_COLUMNS = ['Custo Total', 'Salário Médio', 'Funcionários']
+RESULT_COLUMNS = COST_COLUMNS + ['Custo Atual', 'Variação', 'Variação %']
+
+# Tabela de edição de cenários (uma regra por linha)
+TABLE_COLUMNS = ['cenario', 'tipo', 'departamento', 'cargo', 'status', 'percentual', 'valor', 'quantidade', 'salario']
+RAISE = 'reajuste'
+HIRE = 'contratação'
+
+
+def _members(value):
+    """Valores aceitos por um filtro (None = qualquer um)"""
+    if value is None or (not isinstance(value, (list, tuple, set)) and pd.isna(value)):
+        return None
+    values = [str(item).strip() for item in (value if isinstance(value, (list, tuple, set)) else [value])]
+    values = [item for item in values if item]
+    return values or None
+
+
+def _number(value, default=0.0):
+    return default if value is None or pd.isna(value) or value == '' else float(value)
+
+
+def scenarios_from_table(table):
+    """Cenários a partir da tabela de regras (colunas TABLE_COLUMNS)
+
+    Linhas do tipo reajuste viram regras na ordem da tabela; departamento,
+    cargo e status em branco valem para todos. Linhas do tipo contratação
+    acrescentam quantidade funcionários ao departamento com o salário
+    informado (em branco = média atual do departamento).
+    """
+    scenarios = {}
+    for position, row in enumerate(table.to_dict('records')):
+        name = str(row.get('cenario') or '').strip()
+        if not name:
+            continue
+        scenario = scenarios.setdefault(name, {'nome': name, 'reajustes': [], 'contratacoes': []})
+        kind = str(row.get('tipo') or RAISE).strip().lower()
+        if kind in (HIRE, 'contratacao'):
+            scenario['contratacoes'].append({
+                'departamento': row.get('departamento'),
+                'quantidade': _number(row.get('quantidade')),
+                'salario': None if _number(row.get('salario'), None) is None else _number(row.get('salario')),
+            })
+        elif kind == RAISE:
+            scenario['reajustes'].append({
+                **{dimension: row.get(dimension) for dimension in FILTERS},
+                'percentual': _number(row.get('percentual')),
+                'valor': _number(row.get('valor')),
+            })
+        else:
+            raise ValueError(f"linha {position + 1}: tipo desconhecido '{row.get('tipo')}' (use {RAISE} ou {HIRE})")
+    return list(scenarios.values())
+
+
+class PayrollScenarios:
+    """Simulação de folha por cenários (reajustes e contratações)
+
+    Parte das células do cubo (departamento × cargo × status), com a folha e
+    o número de funcionários de cada uma. Um cenário tem uma lista ordenada
+    de reajustes: cada grupo recebe o primeiro que o atende (percentual e/ou
+    valor fixo por funcionário), então "ENGENHARIA +8%" seguido de "+5%"
+    dá 5% a todos os outros. Todos os cenários de um lote são avaliados
+    juntos: a regra vencedora de cada (cenário, célula) sai de uma redução
+    em uma matriz regras × células, e a folha nova de uma única operação
+    NumPy sobre a matriz cenários × células.
+    """
+
+    def __init__(self, cells):
+        if cells.empty:
+            cells = pd.DataFrame({**{dimension: [] for dimension in FILTERS}, 'Funcionários': [], 'Folha': []})
+        groups = cells.groupby(FILTERS, sort=True)[['Funcionários', 'Folha']].sum().reset_index()
+        self.categories = {}
+        self.codes = {}
+        for dimension in FILTERS:
+            codes, categories = pd.factorize(groups[dimension].astype(str), sort=True)
+            self.codes[dimension] = codes
+            self.categories[dimension] = np.asarray(categories, dtype=object)
+        self.departments = list(self.categories['departamento'])
+        self.payroll = groups['Folha'].to_numpy(dtype=float)
+        self.headcount = groups['Funcionários'].to_numpy(dtype=float)
+        # Soma das células por departamento com uma multiplicação de matrizes
+        self.by_department = np.eye(len(self.departments))[self.codes['departamento']]
+        self.base_payroll = self.payroll @ self.by_department
+        self.base_headcount = self.headcount @ self.by_department
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(cube_cells(df))
+
+    def _rule_masks(self, rules):
+        """Matriz regras × células indicando quem cada reajuste atende"""
+        masks = np.ones((len(rules), len(self.payroll)), dtype=bool)
+        for position, rule in enumerate(rules):
+            for dimension in FILTERS:
+                members = _members(rule.get(dimension))
+                if members is not None:
+                    masks[position] &= np.isin(self.categories[dimension], members)[self.codes[dimension]]
+        return masks
+
+    def _hires(self, scenarios):
+        """Quantidade e custo das contratações (cenários × departamentos)"""
+        departments = list(self.departments)
+        hires = []
+        for position, scenario in enumerate(scenarios):
+            for hire in scenario.get('contratacoes') or []:
+                members = _members(hire.get('departamento'))
+                if members is None or len(members) != 1:
+                    raise ValueError(f"cenário '{scenario['nome']}': contratação sem departamento")
+                department = members[0]
+                quantity = _number(hire.get('quantidade'))
+                if quantity < 0:
+                    raise ValueError(f"cenário '{scenario['nome']}': quantidade negativa em {department}")
+                salary = hire.get('salario')
+                if salary is None or pd.isna(salary):
+                    if department not in self.departments:
+                        raise ValueError(f"cenário '{scenario['nome']}': informe o salário das contratações em {department}")
+                    code = self.departments.index(department)
+                    salary = self.base_payroll[code] / self.base_headcount[code]
+                if department not in departments:
+                    departments.append(department)
+                hires.append((position, departments.index(department), quantity, float(salary)))
+
+        quantity = np.zeros((len(scenarios), len(departments)))
+        cost = np.zeros((len(scenarios), len(departments)))
+        if hires:
+            rows, columns, counts, salaries = (np.array(values) for values in zip(*hires))
+            rows, columns = rows.astype(int), columns.astype(int)
+            np.add.at(quantity, (rows, columns), counts)
+            np.add.at(cost, (rows, columns), counts * salaries)
+        return departments, quantity, cost
+
+    def evaluate(self, scenarios):
+        """Custo por departamento de cada cenário, com a variação sobre o atual
+
+        Retorna um DataFrame indexado por (cenario, departamento) com as
+        colunas RESULT_COLUMNS, cenários na ordem recebida e departamentos
+        do maior para o menor custo.
+        """
+        scenarios = [dict(scenario, nome=str(scenario.get('nome') or f'Cenário {position + 1}'))
+                     for position, scenario in enumerate(scenarios)]
+        if not scenarios:
+            return pd.DataFrame(columns=RESULT_COLUMNS, index=pd.MultiIndex.from_tuples([], names=['cenario', 'departamento']))
+        names = [scenario['nome'] for scenario in scenarios]
+        if len(set(names)) != len(names):
+            raise ValueError("nomes de cenário repetidos")
+
+        # Regras de todos os cenários em sequência; cada cenário termina com
+        # uma regra neutra que atende todo mundo, então sempre há vencedora
+        rules, starts = [], []
+        for scenario in scenarios:
+            starts.append(len(rules))
+            rules.extend(scenario.get('reajustes') or [])
+            rules.append({})
+        percent = np.array([_number(rule.get('percentual')) for rule in rules])
+        amount = np.array([_number(rule.get('valor')) for rule in rules])
+
+        masks = self._rule_masks(rules)
+        candidates = np.where(masks, np.arange(len(rules))[:, None], len(rules))
+        winner = np.minimum.reduceat(candidates, starts, axis=0)
+
+        payroll = self.payroll * (1 + percent[winner] / 100) + amount[winner] * self.headcount
+        departments, hire_quantity, hire_cost = self._hires(scenarios)
+        extra = len(departments) - len(self.departments)
+        cost = np.pad(payroll @ self.by_department, ((0, 0), (0, extra))) + hire_cost
+        headcount = np.pad(np.tile(self.base_headcount, (len(scenarios), 1)), ((0, 0), (0, extra))) + hire_quantity
+        current = np.pad(self.base_payroll, (0, extra))
+
+        result = pd.DataFrame({
+            'cenario': np.repeat(names, len(departments)),
+            'departamento': np.tile(np.asarray(departments, dtype=object), len(scenarios)),
+            'Custo Total': cost.ravel(),
+            'Funcionários': headcount.ravel(),
+            'Custo Atual': np.tile(current, len(scenarios)),
+            'order': np.repeat(np.arange(len(scenarios)), len(departments)),
+        })
+        result = result[result['Funcionários'] > 0]
+        result['Salário Médio'] = result['Custo Total'] / result['Funcionários']
+        result['Variação'] = result['Custo Total'] - result['Custo Atual']
+        result['Variação %'] = (result['Variação'] / result['Custo Atual'].where(result['Custo Atual'] > 0) * 100)
+        result['Funcionários'] = result['Funcionários'].round().astype(int)
+        result = result.sort_values(['order', 'Custo Total'], ascending=[True, False], kind='stable')
+        return result.set_index(['cenario', 'departamento'])[RESULT_COLUMNS].round(2)
+
+    def department_costs(self, scenario):
+        """Custo por departamento de um cenário, no formato do dashboard"""
+        result = self.evaluate([scenario])
+        return result.droplevel('cenario')[COST_COLUMNS]
+
+
+def scenario_summary(result):
+    """Folha total, funcionários e variação de cada cenário avaliado"""
+    totals = result.groupby(level='cenario', sort=False)[['Custo Total', 'Funcionários', 'Custo Atual']].sum()
+    totals['Variação'] = totals['Custo Total'] - totals['Custo Atual']
+    totals['Variação %'] = totals['Variação'] / totals['Custo Atual'].where(totals['Custo Atual'] > 0) * 100
+    return totals.round(2)
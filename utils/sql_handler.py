@@ -0,0 +1,764 @@
+import json
+import threading
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import (
+    Column, Date, Float, Integer, MetaData, String, Table, Text,
+    create_engine, delete, distinct, func, insert, select, text, update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+
+from utils.data_handler import COLUMNS, HISTORY_COLUMNS, DataHandler, merge_totals
+from utils.employee_index import SEARCH_COLUMNS
+from utils.quantile_sketch import DepartmentSketches
+from utils.changes import ChangeBuffer, INSERT, UPDATE, DELETE, RESET, change_event
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+# Valores por lista IN (abaixo do limite de variáveis do SQLite e de parâmetros do Postgres)
+IN_BATCH_SIZE = 500
+
+
+def _batches(values, size=None):
+    """Divide uma lista de valores em blocos para consultas com IN"""
+    values = list(values)
+    size = size or IN_BATCH_SIZE
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def make_table(table_name='funcionarios', metadata=None):
+    """Define a tabela de funcionários (uma por conjunto de dados)
+
+    No SQLite a tabela usa AUTOINCREMENT: o ID do funcionário excluído com o
+    maior número não volta a ser usado (sem ele o SQLite reaproveita max+1).
+    """
+    return Table(
+        table_name, metadata if metadata is not None else MetaData(),
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('nome', String(255), nullable=False),
+        Column('email', String(255), nullable=False, unique=True),
+        Column('telefone', String(50)),
+        Column('departamento', String(120), index=True),
+        Column('cargo', String(120)),
+        Column('salario', Float),
+        Column('data_admissao', Date, index=True),
+        Column('status', String(30)),
+        Column('observacoes', Text),
+        Column('data_desligamento', Date),
+        sqlite_autoincrement=True,
+    )
+
+
+def make_history_table(table_name, metadata):
+    """Define a tabela do histórico de mudanças de status"""
+    return Table(
+        f"{table_name}_historico", metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('email', String(255), index=True),
+        Column('data', Date),
+        Column('status_anterior', String(30)),
+        Column('status_novo', String(30)),
+    )
+
+
+def make_state_table(table_name, metadata):
+    """Define a tabela de estado do conjunto (uma linha: versão dos dados, última gravação e totais)"""
+    return Table(
+        f"{table_name}_estado", metadata,
+        Column('id', Integer, primary_key=True, autoincrement=False),
+        Column('versao', Integer, nullable=False, default=0),
+        Column('gravado_em', String(19)),
+        Column('funcionarios', Integer, nullable=False, default=0),
+        Column('folha', Float, nullable=False, default=0),
+        # Funcionários por departamento (JSON)
+        Column('departamentos', Text),
+        # Sketches de percentis de salário por departamento (JSON)
+        Column('quantis', Text),
+    )
+
+
+def _rows_totals(rows, sign=1):
+    """Totais (como compute_totals) de pares (departamento, salário), com sinal"""
+    counts = {}
+    for department, _ in rows:
+        counts[str(department)] = counts.get(str(department), 0) + sign
+    return {
+        'total_employees': sign * len(rows),
+        'total_salary': sign * sum(float(salary) for _, salary in rows if salary is not None and not pd.isna(salary)),
+        'department_counts': counts,
+    }
+
+
+def make_changes_table(table_name, metadata):
+    """Define a tabela do feed de alterações (seq crescente gerado pelo banco)"""
+    return Table(
+        f"{table_name}_alteracoes", metadata,
+        Column('seq', Integer, primary_key=True, autoincrement=True),
+        Column('op', String(10), nullable=False),
+        Column('funcionario_id', Integer, index=True),
+        Column('momento', String(19)),
+        Column('registro', Text),
+    )
+
+
+class SQLChangeFeed:
+    """Feed de alterações em uma tabela do banco (mesma interface do ChangeFeed)"""
+
+    def __init__(self, engine, table):
+        self.engine = engine
+        self.table = table
+
+    def last_sequence(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.max(self.table.c.seq))).scalar() or 0
+
+    def append(self, changes, conn=None):
+        """Grava as alterações e retorna os seq gerados pelo banco
+
+        Com conn, os eventos entram na transação da gravação dos dados: o
+        feed tem os eventos de toda gravação confirmada e de nenhuma desfeita.
+        """
+        if conn is None:
+            with self.engine.begin() as conn:
+                return self.append(changes, conn)
+        seqs = []
+        for op, employee_id, row in changes:
+            event = change_event(None, op, employee_id, row)
+            result = conn.execute(insert(self.table).values(
+                op=op,
+                funcionario_id=employee_id,
+                momento=event['momento'],
+                registro=json.dumps(event['registro'], ensure_ascii=False) if row is not None else None,
+            ))
+            seqs.append(result.inserted_primary_key[0])
+        return seqs
+
+    def read(self, cursor=0, limit=1000):
+        c = self.table.c
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(c.seq, c.op, c.funcionario_id, c.momento, c.registro)
+                                .where(c.seq > cursor).order_by(c.seq).limit(limit)).all()
+        events = [{
+            'seq': row.seq,
+            'op': row.op,
+            'id': row.funcionario_id,
+            'momento': row.momento,
+            'registro': json.loads(row.registro) if row.registro else None,
+        } for row in rows]
+        return events, events[-1]['seq'] if events else cursor
+
+
+def _is_memory_url(url):
+    return url.startswith('sqlite') and (':memory:' in url or url in ('sqlite://', 'sqlite:///'))
+
+
+def _engine_options(url):
+    """Opções do pool de conexões conforme o banco"""
+    if url.startswith('sqlite'):
+        if _is_memory_url(url):
+            # Banco em memória precisa de uma única conexão compartilhada
+            return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+        return {'connect_args': {'check_same_thread': False}, 'pool_pre_ping': True}
+    return {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+
+
+def get_engine(url):
+    """Engine com pool compartilhado por URL (um pool por processo)"""
+    if _is_memory_url(url):
+        # Cada banco em memória é independente
+        return create_engine(url, **_engine_options(url))
+    with _engines_lock:
+        if url not in _engines:
+            _engines[url] = create_engine(url, **_engine_options(url))
+        return _engines[url]
+
+
+def _changed_salaries(changes):
+    """Pares (departamento, salário) das linhas gravadas"""
+    return [(row['departamento'], row['salario']) for _, _, row in changes]
+
+
+def _to_row(record):
+    """Converte um registro do sistema nos tipos da tabela"""
+    row = {}
+    for column in COLUMNS:
+        value = record.get(column)
+        if column == 'id':
+            # Sem ID o banco gera o próximo (autoincremento)
+            if value is not None and not pd.isna(value) and str(value).strip():
+                row[column] = int(value)
+        elif value is None or (not isinstance(value, str) and pd.isna(value)):
+            row[column] = None
+        elif column == 'salario':
+            row[column] = float(value)
+        elif column in ('data_admissao', 'data_desligamento'):
+            row[column] = pd.to_datetime(value).date() if str(value).strip() else None
+        else:
+            row[column] = str(value)
+    return row
+
+
+class SQLDataHandler(DataHandler):
+    """Backend SQLAlchemy do DataHandler (SQLite para testes, Postgres em produção)
+
+    Usa um engine com pool de conexões e executa as agregações de dashboard
+    e relatórios como consultas GROUP BY no banco, sem trazer todas as
+    linhas para o pandas.
+    """
+
+    pushdown_aggregations = True
+
+    def __init__(self, database_url, table_name='funcionarios'):
+        self.database_url = database_url
+        self.data_file = None
+        self.backup_store = None
+        self.engine = get_engine(database_url)
+        metadata = MetaData()
+        self.table = make_table(table_name, metadata)
+        self.history_table = make_history_table(table_name, metadata)
+        self.changes_table = make_changes_table(table_name, metadata)
+        self.state_table = make_state_table(table_name, metadata)
+        metadata.create_all(self.engine)
+        self._create_state()
+        self.changes = ChangeBuffer(SQLChangeFeed(self.engine, self.changes_table))
+
+    def _create_state(self):
+        """Cria a linha de estado na primeira abertura da tabela (totais contados uma vez)"""
+        try:
+            with self.engine.begin() as conn:
+                if conn.execute(select(self.state_table.c.id).where(self.state_table.c.id == 1)).first() is None:
+                    totals = self._count_totals(conn)
+                    conn.execute(insert(self.state_table).values(
+                        id=1, versao=0,
+                        funcionarios=totals['total_employees'],
+                        folha=totals['total_salary'],
+                        departamentos=json.dumps(totals['department_counts'], ensure_ascii=False),
+                        quantis=json.dumps(self._count_sketches(conn).to_dict(), ensure_ascii=False),
+                    ))
+        except IntegrityError:
+            # Outro processo criou a linha ao mesmo tempo
+            pass
+
+    def _count_totals(self, conn):
+        """Totais contados na tabela (gravações completas e criação do estado)"""
+        c = self.table.c
+        rows = conn.execute(
+            select(c.departamento, func.count(), func.coalesce(func.sum(c.salario), 0)).group_by(c.departamento)
+        ).all()
+        return {
+            'total_employees': int(sum(count for _, count, _ in rows)),
+            'total_salary': float(sum(total for _, _, total in rows)),
+            'department_counts': {str(department): int(count) for department, count, _ in rows},
+        }
+
+    def _count_sketches(self, conn):
+        """Sketches de percentis refeitos com todos os salários (gravações completas)"""
+        c = self.table.c
+        rows = conn.execute(select(c.departamento, c.salario)).all()
+        return DepartmentSketches.from_frame(pd.DataFrame(rows, columns=['departamento', 'salario']), self.sketch_accuracy)
+
+    def _stored_sketches(self, state):
+        """Sketches guardados na linha de estado, se feitos com a precisão atual"""
+        if not state.quantis:
+            return None
+        data = json.loads(state.quantis)
+        if data.get('accuracy') != self.sketch_accuracy:
+            return None
+        return DepartmentSketches.from_dict(data)
+
+    def _department_salaries(self, conn, department):
+        """Salários de um departamento (para refazer só o sketch dele)"""
+        c = self.table.c
+        return [salary for salary, in conn.execute(select(c.salario).where(c.departamento == department)).all()]
+
+    def _state(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(self.state_table).where(self.state_table.c.id == 1)).first()
+
+    def data_version(self):
+        """Versão dos dados lida do banco (vale para todos os processos)"""
+        return (self._state().versao,)
+
+    def _bump_version(self, conn, removed=None, added=None):
+        """Avança a versão e os totais dentro da transação da gravação; retorna a nova versão
+
+        removed e added são pares (departamento, salário) das linhas que
+        saíram e entraram; sem nenhum dos dois (gravação completa) os totais
+        e os sketches de percentis são contados de novo. O primeiro UPDATE trava a linha até o commit,
+        então duas gravações nunca se misturam e ninguém vê a versão nova
+        antes dos dados.
+        """
+        c = self.state_table.c
+        conn.execute(
+            update(self.state_table).where(c.id == 1)
+            .values(versao=c.versao + 1, gravado_em=datetime.now().isoformat(timespec='seconds'))
+        )
+        state = conn.execute(select(self.state_table).where(c.id == 1)).first()
+        sketches = None if removed is None and added is None else self._stored_sketches(state)
+        if sketches is None:
+            sketches = self._count_sketches(conn)
+        else:
+            sketches.update(removed or [], added or [], lambda department: self._department_salaries(conn, department))
+        if removed is None and added is None:
+            totals = self._count_totals(conn)
+        else:
+            totals = {
+                'total_employees': state.funcionarios,
+                'total_salary': state.folha,
+                'department_counts': json.loads(state.departamentos or '{}'),
+            }
+            totals = merge_totals(merge_totals(totals, _rows_totals(added or [])), _rows_totals(removed or [], -1))
+        conn.execute(update(self.state_table).where(c.id == 1).values(
+            funcionarios=totals['total_employees'],
+            folha=round(totals['total_salary'], 2),
+            departamentos=json.dumps(
+                {department: count for department, count in totals['department_counts'].items() if count > 0},
+                ensure_ascii=False,
+            ),
+            quantis=json.dumps(sketches.to_dict(), ensure_ascii=False),
+        ))
+        return (state.versao,)
+
+    def get_totals(self):
+        """Totais mantidos a cada gravação na linha de estado (uma consulta pela chave primária)"""
+        try:
+            state = self._state()
+            return {
+                'total_employees': state.funcionarios,
+                'total_salary': state.folha,
+                'departments': len(json.loads(state.departamentos or '{}')),
+                'last_write': state.gravado_em,
+            }
+        except Exception as e:
+            print(f"Erro ao ler totais: {e}")
+            return {'total_employees': 0, 'total_salary': 0.0, 'departments': 0, 'last_write': None}
+
+    def load_numeric_columns(self):
+        """Salário e admissão como arrays, trazendo só essas duas colunas"""
+        from utils.column_store import NumericColumns
+        c = self.table.c
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(c.salario, c.data_admissao).order_by(c.id)).all()
+        return NumericColumns.from_frame(pd.DataFrame(rows, columns=['salario', 'data_admissao']))
+
+    def load_salary_sketches(self):
+        """Sketches de percentis mantidos na linha de estado (refeitos se a precisão mudou)"""
+        sketches = self._stored_sketches(self._state())
+        if sketches is not None:
+            return sketches
+        with self.engine.connect() as conn:
+            return self._count_sketches(conn)
+
+    @property
+    def dialect(self):
+        return self.engine.dialect.name
+
+    def _month_expression(self):
+        """Expressão AAAA-MM da data de admissão no dialeto do banco"""
+        if self.dialect == 'sqlite':
+            return func.strftime('%Y-%m', self.table.c.data_admissao)
+        return func.to_char(self.table.c.data_admissao, 'YYYY-MM')
+
+    def _period_filter(self, query, start_date=None, end_date=None):
+        if start_date is not None:
+            query = query.where(self.table.c.data_admissao >= pd.Timestamp(start_date).date())
+        if end_date is not None:
+            query = query.where(self.table.c.data_admissao <= pd.Timestamp(end_date).date())
+        return query
+
+    def _frame(self, rows):
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        if not df.empty:
+            df['data_admissao'] = pd.to_datetime(df['data_admissao']).dt.strftime('%Y-%m-%d')
+            df['data_desligamento'] = pd.to_datetime(df['data_desligamento']).dt.strftime('%Y-%m-%d').fillna('')
+        return df
+
+    def _record_rows(self, op, conn, column, values):
+        """Registra inclusões ou atualizações relendo as linhas gravadas"""
+        columns = [self.table.c[name] for name in COLUMNS]
+        rows = []
+        for batch in _batches(values):
+            rows.extend(conn.execute(select(*columns).where(self.table.c[column].in_(batch))).all())
+        rows.sort(key=lambda row: row.id)
+        return [(op, int(row['id']), row) for row in self._frame(rows).to_dict('records')]
+
+    def _log_changes(self, conn, changes):
+        """Grava os eventos no feed dentro da transação dos dados; retorna os seq"""
+        return self.changes.feed.append(changes, conn)
+
+    def _sync_id_sequence(self, conn):
+        """Após gravar IDs explícitos, avança a sequência do Postgres (o SQLite
+        guarda o maior id já usado na sqlite_sequence)
+
+        A sequência nunca recua: se o maior id foi excluído, o próximo
+        continua acima dele.
+        """
+        if self.dialect == 'postgresql':
+            sequence = f"pg_get_serial_sequence('{self.table.name}', 'id')"
+            conn.execute(text(
+                f"SELECT setval({sequence}, GREATEST("
+                f"COALESCE((SELECT MAX(id) FROM {self.table.name}), 0) + 1, nextval({sequence})), false)"
+            ))
+
+    # ------------------------------------------------------------------
+    # CRUD
+    # ------------------------------------------------------------------
+    def load_data(self):
+        """Carrega todos os funcionários do banco"""
+        try:
+            columns = [self.table.c[name] for name in COLUMNS]
+            with self.engine.connect() as conn:
+                rows = conn.execute(select(*columns).order_by(self.table.c.id)).all()
+            return self._frame(rows)
+        except Exception as e:
+            print(f"Erro ao carregar dados: {e}")
+            return pd.DataFrame(columns=COLUMNS)
+
+    def save_data(self, df):
+        """Substitui todos os registros em uma única transação"""
+        try:
+            rows = [_to_row(record) for record in df.to_dict('records')]
+            with self.engine.begin() as conn:
+                conn.execute(delete(self.table))
+                if rows:
+                    conn.execute(insert(self.table), rows)
+                self._sync_id_sequence(conn)
+                version = self._bump_version(conn)
+                seqs = self._log_changes(conn, [(RESET, None, None)])
+            self.changes.reset(version, seqs)
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar dados: {e}")
+            return False
+
+    def add_employee(self, employee_data):
+        """Adiciona um novo funcionário"""
+        try:
+            with self.engine.begin() as conn:
+                exists = conn.execute(
+                    select(self.table.c.id).where(self.table.c.email == employee_data['email'])
+                ).first()
+                if exists:
+                    return False
+                conn.execute(insert(self.table), [_to_row(employee_data)])
+                changes = self._record_rows(INSERT, conn, 'email', [employee_data['email']])
+                version = self._bump_version(conn, added=_changed_salaries(changes))
+                seqs = self._log_changes(conn, changes)
+            self.changes.record(changes, version, seqs)
+            return True
+        except Exception as e:
+            print(f"Erro ao adicionar funcionário: {e}")
+            return False
+
+    def add_employees(self, employees):
+        """Adiciona vários funcionários em uma única transação"""
+        try:
+            employees = list(employees)
+            emails = [employee['email'] for employee in employees]
+            with self.engine.begin() as conn:
+                existing = set()
+                for batch in _batches(emails):
+                    existing.update(conn.execute(
+                        select(self.table.c.email).where(self.table.c.email.in_(batch))
+                    ).scalars())
+                accepted, rejected = [], []
+                for employee in employees:
+                    if employee['email'] in existing:
+                        rejected.append(employee['email'])
+                        continue
+                    existing.add(employee['email'])
+                    accepted.append(_to_row(employee))
+                if accepted:
+                    conn.execute(insert(self.table), accepted)
+                    changes = self._record_rows(INSERT, conn, 'email', [row['email'] for row in accepted])
+                    version = self._bump_version(conn, added=_changed_salaries(changes))
+                    seqs = self._log_changes(conn, changes)
+            if accepted:
+                self.changes.record(changes, version, seqs)
+            return len(accepted), rejected
+        except Exception as e:
+            print(f"Erro ao adicionar funcionários: {e}")
+            return 0, None
+
+    def update_employee(self, email, updated_data):
+        """Atualiza um funcionário existente"""
+        try:
+            c = self.table.c
+            with self.engine.begin() as conn:
+                current = conn.execute(select(c.id, c.status, c.departamento, c.salario).where(c.email == email)).first()
+                if current is None:
+                    return False
+
+                # Registrar mudança de status (histórico para headcount por data)
+                old_status = current.status
+                new_status = updated_data.get('status', old_status)
+                updated_data = dict(updated_data)
+                # O ID não muda
+                updated_data.pop('id', None)
+                if new_status != old_status:
+                    today = datetime.now().date()
+                    exit_date = updated_data.get('data_desligamento')
+                    if new_status == 'Inativo' and (exit_date is None or pd.isna(exit_date) or exit_date == ''):
+                        updated_data['data_desligamento'] = today
+                    elif old_status == 'Inativo':
+                        updated_data['data_desligamento'] = None
+
+                values = {key: value for key, value in _to_row(updated_data).items() if key in updated_data}
+                conn.execute(update(self.table).where(c.email == email).values(**values))
+
+                new_email = values.get('email', email)
+                if new_email != email:
+                    conn.execute(
+                        update(self.history_table)
+                        .where(self.history_table.c.email == email)
+                        .values(email=new_email)
+                    )
+                if new_status != old_status:
+                    conn.execute(insert(self.history_table), [{
+                        'email': new_email,
+                        'data': today,
+                        'status_anterior': old_status,
+                        'status_novo': new_status,
+                    }])
+                changes = self._record_rows(UPDATE, conn, 'id', [current.id])
+                version = self._bump_version(
+                    conn, removed=[(current.departamento, current.salario)], added=_changed_salaries(changes)
+                )
+                seqs = self._log_changes(conn, changes)
+            self.changes.record(changes, version, seqs)
+            return True
+        except Exception as e:
+            print(f"Erro ao atualizar funcionário: {e}")
+            return False
+
+    def get_employee(self, employee_id, index=None):
+        """Funcionário pela chave primária (dicionário) ou None"""
+        if index is not None:
+            return super().get_employee(employee_id, index)
+        try:
+            columns = [self.table.c[name] for name in COLUMNS]
+            with self.engine.connect() as conn:
+                rows = conn.execute(select(*columns).where(self.table.c.id == int(employee_id))).all()
+            df = self._frame(rows)
+            return df.iloc[0].to_dict() if not df.empty else None
+        except Exception as e:
+            print(f"Erro ao buscar funcionário: {e}")
+            return None
+
+    def search_employees(self, query, limit=20, index=None):
+        """Busca por nome ou email no banco, trazendo só os primeiros candidatos"""
+        if index is not None:
+            return super().search_employees(query, limit, index)
+        columns = SEARCH_COLUMNS
+        try:
+            c = self.table.c
+            statement = select(*[c[name] for name in columns]).order_by(c.nome, c.id).limit(limit)
+            query = (query or '').strip().lower()
+            if query:
+                statement = statement.where(func.lower(c.nome).contains(query, autoescape=True) | func.lower(c.email).contains(query, autoescape=True))
+            with self.engine.connect() as conn:
+                rows = conn.execute(statement).all()
+            return pd.DataFrame(rows, columns=columns)
+        except Exception as e:
+            print(f"Erro ao buscar funcionários: {e}")
+            return pd.DataFrame(columns=columns)
+
+    def load_status_history(self):
+        """Carrega o histórico de mudanças de status"""
+        try:
+            columns = [self.history_table.c[name] for name in HISTORY_COLUMNS]
+            with self.engine.connect() as conn:
+                rows = conn.execute(select(*columns).order_by(self.history_table.c.id)).all()
+            history = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+            history['data'] = history['data'].astype(str)
+            return history
+        except Exception as e:
+            print(f"Erro ao carregar histórico: {e}")
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    def delete_employee(self, email):
+        """Exclui um funcionário"""
+        try:
+            with self.engine.begin() as conn:
+                c = self.table.c
+                deleted = conn.execute(select(c.id, c.departamento, c.salario).where(c.email == email)).all()
+                result = conn.execute(delete(self.table).where(c.email == email))
+                if result.rowcount == 0:
+                    return False
+                version = self._bump_version(conn, removed=[(row.departamento, row.salario) for row in deleted])
+                changes = [(DELETE, int(row.id), None) for row in deleted]
+                seqs = self._log_changes(conn, changes)
+            self.changes.record(changes, version, seqs)
+            return True
+        except Exception as e:
+            print(f"Erro ao excluir funcionário: {e}")
+            return False
+
+    def create_backup(self):
+        """Cria um backup dos dados"""
+        df = self.load_data()
+        if df.empty:
+            return None
+        return df.to_csv(index=False)
+
+    def create_incremental_backup(self):
+        """Backups incrementais são feitos pelo próprio banco de dados"""
+        print("Backup incremental não disponível no backend SQL")
+        return None
+
+    def list_backups(self):
+        return []
+
+    def restore_backup(self, uploaded_file, chunksize=50000):
+        """Restaura um backup em blocos validados dentro de uma única transação"""
+        self.last_restore_error = None
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(delete(self.table))
+                for chunk in self._read_restore_chunks(uploaded_file, chunksize):
+                    conn.execute(insert(self.table), [_to_row(r) for r in chunk.to_dict('records')])
+                self._sync_id_sequence(conn)
+                version = self._bump_version(conn)
+                seqs = self._log_changes(conn, [(RESET, None, None)])
+            self.changes.reset(version, seqs)
+            return True
+        except Exception as e:
+            self.last_restore_error = str(e)
+            print(f"Erro ao restaurar backup: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Agregações executadas no banco
+    # ------------------------------------------------------------------
+    def department_costs(self, df=None):
+        """Custo total, salário médio e número de funcionários por departamento"""
+        if df is not None:
+            return super().department_costs(df)
+        c = self.table.c
+        query = (
+            select(
+                c.departamento,
+                func.sum(c.salario).label('Custo Total'),
+                func.avg(c.salario).label('Salário Médio'),
+                # Como o count do pandas: só salários preenchidos
+                func.count(c.salario).label('Funcionários'),
+            )
+            .group_by(c.departamento)
+            .order_by(func.sum(c.salario).desc())
+        )
+        with self.engine.connect() as conn:
+            result = pd.DataFrame(conn.execute(query).all(), columns=['departamento', 'Custo Total', 'Salário Médio', 'Funcionários'])
+        return result.set_index('departamento').round(2)
+
+    def salary_stats_by_department(self, start_date=None, end_date=None, df=None):
+        """Média, mediana, mínimo e máximo salarial por departamento no período"""
+        if df is not None:
+            return super().salary_stats_by_department(start_date, end_date, df)
+        c = self.table.c
+        columns = ['departamento', 'Média', 'Mínimo', 'Máximo']
+        aggregates = [c.departamento, func.avg(c.salario), func.min(c.salario), func.max(c.salario)]
+
+        if self.dialect == 'postgresql':
+            aggregates.append(func.percentile_cont(0.5).within_group(c.salario))
+            columns.append('Mediana')
+
+        query = self._period_filter(select(*aggregates).group_by(c.departamento), start_date, end_date)
+        with self.engine.connect() as conn:
+            stats = pd.DataFrame(conn.execute(query).all(), columns=columns).set_index('departamento')
+
+            if 'Mediana' not in stats.columns:
+                # SQLite não tem mediana: traz só as duas colunas necessárias
+                projection = self._period_filter(select(c.departamento, c.salario), start_date, end_date)
+                salaries = pd.DataFrame(conn.execute(projection).all(), columns=['departamento', 'salario'])
+                stats['Mediana'] = salaries.groupby('departamento')['salario'].median()
+
+        return stats[['Média', 'Mediana', 'Mínimo', 'Máximo']].astype(float).round(2)
+
+    def monthly_hires(self, df=None):
+        """Número de contratações por mês (índice no formato AAAA-MM)"""
+        if df is not None:
+            return super().monthly_hires(df)
+        month = self._month_expression().label('mes')
+        query = (
+            select(month, func.count())
+            .where(self.table.c.data_admissao.is_not(None))
+            .group_by(month)
+            .order_by(month)
+        )
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        return pd.Series(
+            [count for _, count in rows],
+            index=[month for month, _ in rows],
+            name='contratacoes',
+            dtype='int64',
+        )
+
+    def status_by_department(self, df=None):
+        """Quantidade de funcionários por departamento e status"""
+        if df is not None:
+            return super().status_by_department(df)
+        c = self.table.c
+        query = select(c.departamento, c.status, func.count()).group_by(c.departamento, c.status)
+        with self.engine.connect() as conn:
+            counts = pd.DataFrame(conn.execute(query).all(), columns=['departamento', 'status', 'total'])
+        if counts.empty:
+            return pd.DataFrame()
+        return counts.pivot(index='departamento', columns='status', values='total').fillna(0).astype(int)
+
+    def cube_cells(self, df=None):
+        """Células do cubo calculadas com um único GROUP BY no banco"""
+        if df is not None:
+            return super().cube_cells(df)
+        from utils.cube import DIMENSIONS, MEASURES, NO_MONTH
+        c = self.table.c
+        month = func.coalesce(self._month_expression(), NO_MONTH).label('mes')
+        cargo = func.coalesce(c.cargo, '').label('cargo')
+        status = func.coalesce(c.status, '').label('status')
+        query = (
+            select(c.departamento, cargo, status, month,
+                   func.count(), func.sum(c.salario), func.min(c.salario), func.max(c.salario))
+            .group_by(c.departamento, cargo, status, month)
+            .order_by(c.departamento, cargo, status, month)
+        )
+        with self.engine.connect() as conn:
+            cells = pd.DataFrame(conn.execute(query).all(), columns=DIMENSIONS + MEASURES)
+        cells['Folha'] = cells['Folha'].astype(float)
+        return cells
+
+    def get_statistics(self):
+        """Retorna estatísticas básicas dos dados"""
+        try:
+            c = self.table.c
+            query = select(
+                func.count(),
+                func.coalesce(func.sum(c.salario), 0),
+                func.coalesce(func.avg(c.salario), 0),
+                func.count(distinct(c.departamento)),
+            )
+            with self.engine.connect() as conn:
+                total, total_salary, avg_salary, departments = conn.execute(query).one()
+            return {
+                'total_employees': total,
+                'total_salary': float(total_salary),
+                'avg_salary': float(avg_salary),
+                'departments': departments
+            }
+        except Exception as e:
+            print(f"Erro ao calcular estatísticas: {e}")
+            return {
+                'total_employees': 0,
+                'total_salary': 0,
+                'avg_salary': 0,
+                'departments': 0
+            }
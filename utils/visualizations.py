@@ -1,7 +1,9 @@
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from datetime import datetime
+from utils.headcount import HeadcountIndex
 
 def create_visualizations(df):
     """Cria visualizações para o dashboard"""
@@ -46,8 +48,7 @@ def create_visualizations(df):
     
     # Gráfico de linha - Contratações ao longo do tempo
     if 'data_admissao' in df.columns:
-        df_temp = df.copy()
-        df_temp['data_admissao'] = pd.to_datetime(df_temp['data_admissao'])
+        df_temp = df.assign(data_admissao=pd.to_datetime(df['data_admissao']))
         monthly_hires = df_temp.groupby(df_temp['data_admissao'].dt.to_period('M')).size()
         
         visualizations['hiring_trend'] = px.line(
@@ -105,31 +106,43 @@ def create_department_analysis(df):
     
     return analysis
 
-def create_salary_analysis(df):
-    """Cria análises específicas de salários"""
-    if df.empty:
+# Faixas salariais (intervalos fechados à direita, como pd.cut)
+SALARY_BINS = [0, 3000, 5000, 8000, 12000, float('inf')]
+SALARY_LABELS = ['Até R$3.000', 'R$3.001-5.000', 'R$5.001-8.000', 'R$8.001-12.000', 'Acima de R$12.000']
+
+def create_salary_analysis(df, salaries=None):
+    """Cria análises específicas de salários
+    
+    Se salaries for informado (array NumPy, possivelmente mapeado do disco),
+    as estatísticas são calculadas direto sobre ele, sem usar o DataFrame.
+    """
+    if salaries is None:
+        if df.empty:
+            return None
+        salaries = df['salario']
+    
+    values = np.asarray(salaries, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
         return None
     
     analysis = {}
     
     # Estatísticas gerais
-    analysis['total_payroll'] = df['salario'].sum()
-    analysis['avg_salary'] = df['salario'].mean()
-    analysis['median_salary'] = df['salario'].median()
-    analysis['salary_std'] = df['salario'].std()
-    
-    # Quartis
-    analysis['q1'] = df['salario'].quantile(0.25)
-    analysis['q3'] = df['salario'].quantile(0.75)
+    analysis['total_payroll'] = float(values.sum())
+    analysis['avg_salary'] = float(values.mean())
+    analysis['salary_std'] = float(values.std(ddof=1)) if len(values) > 1 else float('nan')
     
-    # Funcionários por faixa salarial
-    salary_ranges = pd.cut(
-        df['salario'], 
-        bins=[0, 3000, 5000, 8000, 12000, float('inf')],
-        labels=['Até R$3.000', 'R$3.001-5.000', 'R$5.001-8.000', 'R$8.001-12.000', 'Acima de R$12.000']
+    # Mediana e quartis (uma única ordenação parcial)
+    analysis['q1'], analysis['median_salary'], analysis['q3'] = (
+        float(q) for q in np.quantile(values, [0.25, 0.5, 0.75])
     )
     
-    range_counts = pd.Series(salary_ranges).value_counts().sort_index()
+    # Funcionários por faixa salarial
+    positions = np.searchsorted(SALARY_BINS, values, side='left')
+    in_range = (positions > 0) & (positions < len(SALARY_BINS))
+    counts = np.bincount(positions[in_range] - 1, minlength=len(SALARY_LABELS))
+    range_counts = pd.Series(counts, index=pd.CategoricalIndex(SALARY_LABELS, categories=SALARY_LABELS, ordered=True))
     analysis['salary_ranges_chart'] = px.bar(
         x=range_counts.index,
         y=range_counts.values,
@@ -139,7 +152,7 @@ def create_salary_analysis(df):
     
     return analysis
 
-def create_growth_analysis(df):
+def create_growth_analysis(df, history=None):
     """Cria análises de crescimento da empresa"""
     if df.empty or 'data_admissao' not in df.columns:
         return None
@@ -147,8 +160,7 @@ def create_growth_analysis(df):
     analysis = {}
     
     # Converter datas
-    df_temp = df.copy()
-    df_temp['data_admissao'] = pd.to_datetime(df_temp['data_admissao'])
+    df_temp = df.assign(data_admissao=pd.to_datetime(df['data_admissao']))
     
     # Contratações por mês
     monthly_hires = df_temp.groupby(df_temp['data_admissao'].dt.to_period('M')).size()
@@ -159,17 +171,19 @@ def create_growth_analysis(df):
         labels={'x': 'Mês', 'y': 'Contratações'}
     )
     
-    # Crescimento cumulativo
-    df_sorted = df_temp.sort_values('data_admissao')
-    df_sorted['employees_cumulative'] = range(1, len(df_sorted) + 1)
-    
-    analysis['cumulative_growth'] = px.line(
-        df_sorted,
-        x='data_admissao',
-        y='employees_cumulative',
-        title="Crescimento Cumulativo de Funcionários",
-        labels={'data_admissao': 'Data', 'employees_cumulative': 'Total de Funcionários'}
-    )
+    # Headcount real ao longo do tempo (descontando desligamentos)
+    headcount_index = HeadcountIndex.from_frame(df, history)
+    first_day = headcount_index.first_day()
+    if first_day is not None:
+        headcount = headcount_index.series(first_day, datetime.now(), freq='MS').reset_index()
+        analysis['cumulative_growth'] = px.line(
+            headcount,
+            x='data',
+            y='Headcount',
+            title="Headcount ao Longo do Tempo",
+            labels={'data': 'Data', 'Headcount': 'Total de Funcionários'},
+            hover_data=['Folha']
+        )
     
     # Taxa de crescimento mensal
     monthly_growth = monthly_hires.pct_change().fillna(0) * 100
@@ -182,15 +196,26 @@ def create_growth_analysis(df):
     
     return analysis
 
-def create_status_analysis(df):
-    """Cria análises por status dos funcionários"""
-    if df.empty or 'status' not in df.columns:
-        return None
+def create_status_analysis(df, cube=None):
+    """Cria análises por status dos funcionários
+    
+    Com o cubo agregado (SalaryCube), as contagens saem das células do cubo
+    em vez de agrupar as linhas do cadastro.
+    """
+    if cube is not None:
+        if cube.cells.empty:
+            return None
+        status_count = cube.rollup(['status'])['Funcionários'].sort_values(ascending=False)
+        status_dept = cube.pivot('departamento', 'status').astype(int)
+    else:
+        if df.empty or 'status' not in df.columns:
+            return None
+        status_count = df['status'].value_counts()
+        status_dept = df.groupby(['departamento', 'status']).size().unstack(fill_value=0)
     
     analysis = {}
     
     # Distribuição por status
-    status_count = df['status'].value_counts()
     analysis['status_pie'] = px.pie(
         values=status_count.values,
         names=status_count.index,
@@ -198,7 +223,6 @@ def create_status_analysis(df):
     )
     
     # Status por departamento
-    status_dept = df.groupby(['departamento', 'status']).size().unstack(fill_value=0)
     analysis['status_by_dept'] = px.bar(
         status_dept,
         title="Status por Departamento",